@@ -0,0 +1,118 @@
+"""Compare windowed and full-text email scanning.
+
+Runs the email search used by ``read_contactinfo_from_webpage`` on
+generated pages, once scanning the whole page with ``EMAIL_REGEX`` (the
+previous behavior) and once only around each ``"@"``, checks that both find
+the same addresses and reports their timings.
+
+Usage::
+
+    python benchmarks/bench_email_extraction.py [--json results.json]
+"""
+import argparse
+import json
+import random
+import string
+import timeit
+
+from schoolparser.scrape import find_emails
+
+
+def _staff_directory_page(n_staff=200, seed=0):
+    """A district staff directory, with one email and phone per staff row."""
+    rng = random.Random(seed)
+    rows = []
+    for idx in range(n_staff):
+        first = "".join(rng.choices(string.ascii_lowercase, k=6))
+        last = "".join(rng.choices(string.ascii_lowercase, k=8))
+        rows.append(
+            f'<tr><td class="name">{first.title()} {last.title()}</td>'
+            f"<td>Counselor, grades 9-12</td>"
+            f'<td><a href="mailto:{first}.{last}@sfusd.org">{first}.{last}@sfusd.org</a></td>'
+            f"<td>(415)-555-{idx:04d}</td></tr>"
+        )
+    return "<html><body><table>" + "\n".join(rows) + "</table></body></html>"
+
+
+def _minified_script_page(size=50_000, n_emails=5, seed=0):
+    """A page dominated by an inline minified script without whitespace."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits + "_$."
+    script = "".join(rng.choices(alphabet, k=size))
+    emails = " ".join(f"office{idx}@ousd.org" for idx in range(n_emails))
+    return f"<html><script>{script}</script><body>{emails}</body></html>"
+
+
+def _pathological_page(size=10_000):
+    """A single run of address characters with no ``"@"`` at all."""
+    return "<html><body>" + "a" * size + "</body></html>"
+
+
+PAGES = {
+    "staff_directory": _staff_directory_page,
+    "minified_script": _minified_script_page,
+    "pathological": _pathological_page,
+}
+
+
+def run(repeat=3):
+    """Time both scanning modes on every generated page.
+
+    Parameters
+    ----------
+    repeat : int
+        Number of timed runs per page and mode; the best is reported.
+
+    Returns
+    -------
+    results : list of dict
+        Per page: its size, number of emails found, best time of each mode
+        in seconds, the speedup and whether both modes agree.
+    """
+    results = []
+    for name, make_page in PAGES.items():
+        text = make_page()
+        full = find_emails(text, windowed=False)
+        windowed = find_emails(text, windowed=True)
+        full_time = min(
+            timeit.repeat(lambda: find_emails(text, windowed=False), number=1, repeat=repeat)
+        )
+        windowed_time = min(
+            timeit.repeat(lambda: find_emails(text, windowed=True), number=1, repeat=repeat)
+        )
+        results.append(
+            {
+                "page": name,
+                "n_chars": len(text),
+                "n_emails": len(windowed),
+                "full_scan_s": full_time,
+                "windowed_s": windowed_time,
+                "speedup": full_time / windowed_time if windowed_time else None,
+                "same_results": full == windowed,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat)
+    for result in results:
+        print(
+            f"{result['page']:>16}: {result['n_chars']:>8} chars, "
+            f"{result['n_emails']:>4} emails, "
+            f"full {result['full_scan_s'] * 1e3:9.2f} ms, "
+            f"windowed {result['windowed_s'] * 1e3:7.2f} ms, "
+            f"same results: {result['same_results']}"
+        )
+    if args.json:
+        with open(args.json, "w") as fout:
+            json.dump(results, fout, indent=4)
+
+
+if __name__ == "__main__":
+    main()
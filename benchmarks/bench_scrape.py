@@ -0,0 +1,280 @@
+"""Benchmark crawling, contact extraction and dataframe building offline.
+
+Serves a generated district-style site from a local HTTP server (see
+``synthetic_site.py``) and measures the throughput and peak Python memory of
+
+- ``Crawler.crawl``, sequential and asynchronous,
+- ``Crawler.get_all_website_links`` on every page,
+- ``read_contactinfo_from_webpage`` on every page, without rendering and
+  with a stub email domain check,
+- ``scraped_emails_to_df`` on a generated result set,
+
+and the time to import the main modules, each in a fresh interpreter.
+
+Each benchmark is timed ``--repeat`` times and the best run is reported;
+peak memory comes from one extra run under ``tracemalloc``. Reports are
+written as JSON and can be compared against an earlier report.
+
+Usage::
+
+    python benchmarks/bench_scrape.py [--pages 200] [--latency 0.01]
+        [--json report.json] [--compare old_report.json]
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from synthetic_site import SyntheticSite
+
+import schoolparser
+from schoolparser.scrape import Crawler, read_contactinfo_from_webpage
+from schoolparser.validate import EmailValidator
+from schoolparser.write import scraped_emails_to_df
+
+
+def _deliverable(domain):
+    """Offline stand-in for the DNS deliverability check."""
+
+
+def _measure(func, repeat):
+    """Return the best time of ``func`` in seconds and its peak memory in bytes."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def _crawl(site, asynchronous):
+    crawler = Crawler(max_concurrency=10, max_per_host=10)
+    crawler.crawl(
+        site.url, max_urls=site.n_pages, verbose=False, asynchronous=asynchronous
+    )
+
+
+def _get_all_website_links(site):
+    crawler = Crawler()
+    for idx in range(site.n_pages):
+        crawler.get_all_website_links(site.page_url(idx))
+
+
+def _read_contactinfo(site):
+    validator = EmailValidator(resolver=_deliverable)
+    for idx in range(site.n_pages):
+        read_contactinfo_from_webpage(
+            site.page_url(idx), render="never", validator=validator
+        )
+
+
+def _emails(n_schools, n_urls, n_emails):
+    return {
+        f"school {school}": {
+            f"https://school{school}.district.org/staff/{url}": {
+                f"staff{email}.{url}@school{school}.district.org"
+                for email in range(n_emails)
+            }
+            for url in range(n_urls)
+        }
+        for school in range(n_schools)
+    }
+
+
+def run(site, n_rows=100_000, repeat=3):
+    """Run all benchmarks against a started :class:`SyntheticSite`.
+
+    Parameters
+    ----------
+    site : SyntheticSite
+        The site to crawl and scrape.
+    n_rows : int
+        Approximate number of rows of the ``scraped_emails_to_df`` benchmark.
+    repeat : int
+        Number of timed runs per benchmark; the best is reported.
+
+    Returns
+    -------
+    results : list of dict
+        Per benchmark: the number of items processed and their ``unit``,
+        the best time in seconds, the throughput in items per second and
+        the peak traced memory in bytes.
+    """
+    emails = _emails(n_schools=max(1, n_rows // 1000), n_urls=10, n_emails=100)
+    n_emails = sum(len(e) for urls in emails.values() for e in urls.values())
+    benchmarks = [
+        ("crawl", site.n_pages, "pages", lambda: _crawl(site, False)),
+        ("crawl_async", site.n_pages, "pages", lambda: _crawl(site, True)),
+        (
+            "get_all_website_links",
+            site.n_pages,
+            "pages",
+            lambda: _get_all_website_links(site),
+        ),
+        (
+            "read_contactinfo_from_webpage",
+            site.n_pages,
+            "pages",
+            lambda: _read_contactinfo(site),
+        ),
+        (
+            "scraped_emails_to_df",
+            n_emails,
+            "rows",
+            lambda: scraped_emails_to_df(emails),
+        ),
+    ]
+
+    results = []
+    for name, n_items, unit, func in benchmarks:
+        seconds, peak = _measure(func, repeat)
+        results.append(
+            {
+                "name": name,
+                "n_items": n_items,
+                "unit": unit,
+                "seconds": seconds,
+                "throughput": n_items / seconds if seconds else None,
+                "peak_memory_bytes": peak,
+            }
+        )
+    return results
+
+
+IMPORTED_MODULES = ("schoolparser.base", "schoolparser.scrape", "schoolparser.write")
+
+
+def import_times(modules=IMPORTED_MODULES, repeat=3):
+    """Time importing each module in a fresh interpreter.
+
+    Parameters
+    ----------
+    modules : tuple of str
+        The modules to import.
+    repeat : int
+        Number of imports per module; the best is reported.
+
+    Returns
+    -------
+    results : list of dict
+        Per module: the best cumulative import time in seconds, as reported
+        by ``python -X importtime``, and the third-party packages it loaded.
+    """
+    results = []
+    for module in modules:
+        seconds = []
+        for _ in range(repeat):
+            process = subprocess.run(
+                [
+                    sys.executable, "-X", "importtime", "-c",
+                    f"import sys, {module}; print(*sorted(sys.modules))",
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                check=True,
+            )
+            for line in process.stderr.splitlines():
+                fields = [field.strip() for field in line.split("|")]
+                if len(fields) == 3 and fields[2] == module:
+                    seconds.append(int(fields[1]) / 1e6)
+        loaded = set(process.stdout.split())
+        results.append(
+            {
+                "module": module,
+                "seconds": min(seconds),
+                "heavy_dependencies": [
+                    name
+                    for name in ("requests", "bs4", "requests_html", "pyppeteer",
+                                 "email_validator", "pandas")
+                    if name in loaded
+                ],
+            }
+        )
+    return results
+
+
+def compare(report, baseline):
+    """Print the throughput of ``report`` relative to a ``baseline`` report."""
+    old = {result["name"]: result for result in baseline["results"]}
+    print(f"Compared to schoolparser {baseline['schoolparser_version']} "
+          f"({baseline['timestamp']}):")
+    for result in report["results"]:
+        if result["name"] not in old or not old[result["name"]]["throughput"]:
+            continue
+        ratio = result["throughput"] / old[result["name"]]["throughput"]
+        print(f"{result['name']:>30}: {ratio:6.2f}x throughput")
+    old = {result["module"]: result for result in baseline.get("import_times", [])}
+    for result in report["import_times"]:
+        if result["module"] in old and result["seconds"]:
+            ratio = old[result["module"]]["seconds"] / result["seconds"]
+            print(f"{'import ' + result['module']:>30}: {ratio:6.2f}x faster")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--fan-out", type=int, default=5)
+    parser.add_argument("--emails-per-page", type=int, default=10)
+    parser.add_argument("--phones-per-page", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write the report to this JSON file.")
+    parser.add_argument("--compare", help="Earlier JSON report to compare with.")
+    args = parser.parse_args()
+
+    site = SyntheticSite(
+        n_pages=args.pages,
+        fan_out=args.fan_out,
+        emails_per_page=args.emails_per_page,
+        phones_per_page=args.phones_per_page,
+        page_size=args.page_size,
+        latency=args.latency,
+    )
+    with site:
+        results = run(site, n_rows=args.rows, repeat=args.repeat)
+
+    report = {
+        "schoolparser_version": schoolparser.__version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now().isoformat(),
+        "site": site.config(),
+        "repeat": args.repeat,
+        "results": results,
+        "import_times": import_times(repeat=args.repeat),
+    }
+    for result in results:
+        print(
+            f"{result['name']:>30}: {result['n_items']:>7} {result['unit']:<5} "
+            f"in {result['seconds']:8.3f} s, "
+            f"{result['throughput']:10.1f} {result['unit']}/s, "
+            f"peak {result['peak_memory_bytes'] / 1e6:8.1f} MB"
+        )
+    for result in report["import_times"]:
+        print(
+            f"{'import ' + result['module']:>30}: {result['seconds'] * 1e3:8.1f} ms, "
+            f"loads {', '.join(result['heavy_dependencies']) or 'no heavy dependencies'}"
+        )
+    if args.compare:
+        with open(args.compare) as fin:
+            compare(report, json.load(fin))
+    if args.json:
+        with open(args.json, "w") as fout:
+            json.dump(report, fout, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Local HTTP server serving a generated district-style school website.
+
+Every page of the site carries a navigation bar, links to ``fan_out`` deeper
+pages and a few external sites, a staff table with ``emails_per_page``
+addresses and ``phones_per_page`` phone numbers, and filler text up to
+``page_size`` bytes. Pages are generated deterministically from their index,
+so runs with the same configuration see the same site.
+
+Usage::
+
+    with SyntheticSite(n_pages=200, latency=0.01) as site:
+        Crawler().crawl(site.url, max_urls=200)
+"""
+import random
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+_FILLER = (
+    "Our counseling office supports students with college applications, "
+    "course planning, scholarships and social-emotional wellness. "
+)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # the default listen backlog of 5 makes concurrent clients wait on SYN
+    # retransmits, which would penalize exactly the engines being compared
+    request_queue_size = 128
+
+
+class SyntheticSite(object):
+    """Generated school website served from a background thread.
+
+    Parameters
+    ----------
+    n_pages : int
+        Number of pages on the site. Page 0 is the home page.
+    fan_out : int
+        Number of links from each page to deeper pages.
+    emails_per_page : int
+        Number of staff email addresses on each page.
+    phones_per_page : int
+        Number of phone numbers on each page.
+    page_size : int
+        Approximate size of each page in bytes, reached with filler text.
+    latency : float
+        Seconds the server waits before answering each request.
+    seed : int
+        Seed of the generated names.
+    """
+
+    def __init__(
+        self,
+        n_pages=100,
+        fan_out=5,
+        emails_per_page=10,
+        phones_per_page=5,
+        page_size=20_000,
+        latency=0.0,
+        seed=0,
+    ):
+        self.n_pages = n_pages
+        self.fan_out = fan_out
+        self.emails_per_page = emails_per_page
+        self.phones_per_page = phones_per_page
+        self.page_size = page_size
+        self.latency = latency
+        self.seed = seed
+
+        self.requests = 0
+        self.bytes_sent = 0
+        self._pages = dict()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        """Url of the home page."""
+        return self.page_url(0)
+
+    def page_url(self, idx):
+        """Url of page ``idx``."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/page/{idx}.html"
+
+    def config(self):
+        """The site configuration as a dictionary."""
+        return {
+            "n_pages": self.n_pages,
+            "fan_out": self.fan_out,
+            "emails_per_page": self.emails_per_page,
+            "phones_per_page": self.phones_per_page,
+            "page_size": self.page_size,
+            "latency": self.latency,
+            "seed": self.seed,
+        }
+
+    def start(self):
+        """Start serving on a free local port."""
+        site = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = site.get_page(self.path)
+                if site.latency:
+                    time.sleep(site.latency)
+                if body is None:
+                    self.send_error(404)
+                    return
+                # counted before answering, so a client that got the page
+                # sees it counted
+                with site._lock:
+                    site.requests += 1
+                    site.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def get_page(self, path):
+        """Return the HTML bytes served at ``path``, or None if not found."""
+        if not (path.startswith("/page/") and path.endswith(".html")):
+            return None
+        try:
+            idx = int(path[len("/page/"):-len(".html")])
+        except ValueError:
+            return None
+        if not 0 <= idx < self.n_pages:
+            return None
+        with self._lock:
+            page = self._pages.get(idx)
+        if page is None:
+            page = self._make_page(idx)
+            with self._lock:
+                self._pages[idx] = page
+        return page
+
+    def _make_page(self, idx):
+        rng = random.Random(self.seed * 1_000_003 + idx)
+        nav = "".join(
+            f'<li><a href="/page/{link}.html">Section {link}</a></li>'
+            for link in range(min(self.n_pages, 8))
+        )
+        children = "".join(
+            f'<li><a href="/page/{link}.html">Page {link}</a></li>'
+            for link in (
+                (idx * self.fan_out + k + 1) % self.n_pages
+                for k in range(self.fan_out)
+            )
+        )
+        external = (
+            '<a href="https://twitter.com/district">Twitter</a> '
+            '<a href="https://www.facebook.com/district">Facebook</a> '
+            '<a href="https://www.instagram.com/district/">Instagram</a>'
+        )
+        rows = []
+        for k in range(max(self.emails_per_page, self.phones_per_page)):
+            first = "".join(rng.choices(string.ascii_lowercase, k=6))
+            last = "".join(rng.choices(string.ascii_lowercase, k=8))
+            email = (
+                f'<a href="mailto:{first}.{last}@district.org">'
+                f"{first}.{last}@district.org</a>"
+                if k < self.emails_per_page
+                else ""
+            )
+            phone = (
+                f"({rng.randint(200, 999)})-555-{rng.randint(0, 9999):04d}"
+                if k < self.phones_per_page
+                else ""
+            )
+            rows.append(
+                f"<tr><td>{first.title()} {last.title()}</td><td>Counselor</td>"
+                f"<td>{email}</td><td>{phone}</td></tr>"
+            )
+        html = (
+            f"<html><head><title>Page {idx}</title></head><body>"
+            f"<nav><ul>{nav}</ul></nav><main><h1>Page {idx}</h1>"
+            f"<table>{''.join(rows)}</table><ul>{children}</ul>"
+        )
+        tail = f"</main><footer>{external}</footer></body></html>"
+        n_filler = max(0, self.page_size - len(html) - len(tail))
+        filler = (_FILLER * (n_filler // len(_FILLER) + 1))[:n_filler]
+        return (html + f"<p>{filler}</p>" + tail).encode()
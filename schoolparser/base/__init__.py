@@ -1 +1,2 @@
-from .config import SCHOOL_URLS, SCHOOL_SOCIAL_URLS, logger
+from .config import SCHOOL_URLS, SCHOOL_SOCIAL_URLS, configure_logging, logger
+from .utils import normalize_url
@@ -1,30 +1,97 @@
 import logging
-import os
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
 
-schoolparser_log_name = Path(os.path.normpath(
-    os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "../", "logs", "schoolparser.log"
-    )
-))
-schoolparser_log_name.parent.mkdir(exist_ok=True)
+# kept out of the package tree, with the other files schoolparser caches
+schoolparser_log_name = (
+    Path.home() / ".cache" / "schoolparser" / "logs" / "schoolparser.log"
+)
 
 logger = logging.getLogger(__name__)
+logger.propagate = True
 
-# set logging level
-logger.setLevel(logging.DEBUG)
 
-# add file handler
-file_handler = RotatingFileHandler(
-    schoolparser_log_name, maxBytes=2000000, backupCount=10
-)
-formatter = logging.Formatter(
-    "%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s"
-)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.propagate = True
+# file handlers of configured log files, keyed by absolute path
+_log_handlers = dict()
+
+
+def configure_logging(log_fpath=None, level=logging.DEBUG, queued=True):
+    """Write the schoolparser log to a rotating file.
+
+    Importing schoolparser does not create any log file or directory;
+    applications call this once at startup instead.
+
+    Parameters
+    ----------
+    log_fpath : str | pathlib.Path | None
+        The log file. Defaults to
+        ``~/.cache/schoolparser/logs/schoolparser.log``.
+    level : int
+        Logging level of the schoolparser logger.
+    queued : bool
+        If True (default), logging calls only put their record on a queue,
+        and a background thread formats and writes it to the file. Disk
+        I/O and message formatting then stay out of the crawl loop. The
+        queue is flushed at interpreter exit.
+
+    Returns
+    -------
+    file_handler : logging.handlers.RotatingFileHandler
+        The handler writing the log file.
+    """
+    import atexit
+    import queue
+    from logging.handlers import QueueListener, RotatingFileHandler
+
+    if log_fpath is None:
+        log_fpath = schoolparser_log_name
+    log_fpath = Path(log_fpath).absolute()
+
+    # set logging level
+    logger.setLevel(level)
+
+    if log_fpath in _log_handlers:
+        return _log_handlers[log_fpath]
+
+    # add file handler
+    log_fpath.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = RotatingFileHandler(log_fpath, maxBytes=2000000, backupCount=10)
+    formatter = logging.Formatter(
+        "%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s"
+    )
+    file_handler.setFormatter(formatter)
+    _log_handlers[log_fpath] = file_handler
+
+    if not queued:
+        logger.addHandler(file_handler)
+        return file_handler
+
+    log_queue = queue.SimpleQueue() if hasattr(queue, "SimpleQueue") else queue.Queue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    return file_handler
+
+
+class _DeferredQueueHandler(logging.Handler):
+    """Put log records on a queue unformatted.
+
+    Unlike :class:`logging.handlers.QueueHandler`, records are not formatted
+    before they are queued, so ``%``-style messages are only formatted by
+    the thread writing them. This is safe because the queue never leaves
+    the process.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__()
+        self.queue = log_queue
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
 
 # list of school urls
 SCHOOL_URLS = {
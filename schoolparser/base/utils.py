@@ -0,0 +1,29 @@
+from urllib.parse import urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url):
+    """Normalize ``url`` so equivalent spellings compare equal.
+
+    The scheme and host are lower-cased, default ports and fragments are
+    dropped, and an empty path becomes ``/``. The query string is kept, as
+    it can select different content.
+
+    Parameters
+    ----------
+    url : str
+        The url to normalize.
+
+    Returns
+    -------
+    url : str
+        The normalized url.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    host, _, port = netloc.rpartition(":")
+    if host and _DEFAULT_PORTS.get(scheme) == port:
+        netloc = host
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
@@ -0,0 +1,366 @@
+import collections
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from schoolparser.base import logger, normalize_url
+from schoolparser.schedule import fetch_slot
+
+
+class ResponseCache(object):
+    """Persistent on-disk cache of HTTP response bodies.
+
+    Bodies are stored together with their ``ETag`` and ``Last-Modified``
+    headers in a SQLite database. Stale entries are revalidated with a
+    conditional GET, so an unchanged page costs a ``304 Not Modified``
+    instead of a full download.
+
+    Parameters
+    ----------
+    cache_dir : str | pathlib.Path
+        Directory holding the cache database.
+    ttl : float
+        Seconds a cached response is served without contacting the server.
+        Default of 0 revalidates on every fetch.
+    max_bytes : int
+        Maximum total size of cached bodies. Least recently used entries are
+        evicted beyond this.
+
+    Attributes
+    ----------
+    stats : collections.Counter
+        Counts of ``"fresh"`` (served without a request), ``"revalidated"``
+        (304), and ``"downloaded"`` responses.
+    """
+
+    def __init__(self, cache_dir, ttl=0, max_bytes=500_000_000):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = collections.Counter()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "responses.sqlite"), check_same_thread=False
+        )
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT, "
+                "size INTEGER, fetched_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+
+    def __getstate__(self):
+        # an unpickled cache opens its own connection to the same database
+        return {"cache_dir": self.cache_dir, "ttl": self.ttl, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def get(self, url, timeout=None, headers=None, scheduler=None):
+        """Fetch the body at ``url``, from the cache when it is still valid.
+
+        Parameters
+        ----------
+        url : str
+            The url to fetch.
+        timeout : float | None
+            Request timeout in seconds.
+        headers : dict | None
+            Extra request headers.
+        scheduler : schoolparser.schedule.HostScheduler | None
+            Politeness scheduler to wait on before contacting the server.
+
+        Returns
+        -------
+        content : bytes
+            The response body.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses "
+                "WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            body, etag, last_modified, fetched_at = entry
+            if now - fetched_at < self.ttl:
+                self._touch(url, now, fetched_at)
+                self.stats["fresh"] += 1
+                return body
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+
+        import requests
+
+        with fetch_slot(scheduler, url):
+            response = requests.get(url, headers=request_headers, timeout=timeout)
+        if entry is not None and response.status_code == 304:
+            self._touch(url, now, now)
+            self.stats["revalidated"] += 1
+            return body
+
+        self.stats["downloaded"] += 1
+        content = response.content
+        if response.ok:
+            self._store(
+                url,
+                content,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                now,
+            )
+        return content
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
+
+    def _touch(self, url, accessed_at, fetched_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ?, fetched_at = ? WHERE url = ?",
+                (accessed_at, fetched_at, url),
+            )
+
+    def _store(self, url, content, etag, last_modified, now):
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, content, etag, last_modified, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under ``max_bytes``."""
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} responses from {self.cache_dir}.")
+
+
+class FetchRegistry(object):
+    """Run-level registry of fetched and parsed pages.
+
+    Schools under the same district domain reach the same header, footer and
+    navigation pages. The registry makes sure each normalized url is
+    fetched, rendered and parsed at most once per run, and hands the same
+    result to every school that reaches it. Concurrent requests for a url
+    being computed wait for that computation instead of repeating it.
+
+    Results are shared, so callers must not modify them.
+
+    Attributes
+    ----------
+    stats : collections.Counter
+        Counts of ``"computed"`` and ``"shared"`` results.
+    """
+
+    def __init__(self):
+        self.stats = collections.Counter()
+        self._results = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def __getstate__(self):
+        # results are not shared between processes
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def get_or_compute(self, kind, url, compute):
+        """Return the ``kind`` result for ``url``, computing it only once.
+
+        Parameters
+        ----------
+        kind : hashable
+            What is computed for the url, e.g. ``"links"`` or ``"contacts"``.
+        url : str
+            The url the result is for.
+        compute : callable
+            Function of no arguments computing the result. Exceptions it
+            raises are re-raised to every caller.
+
+        Returns
+        -------
+        result : object
+            The result of ``compute``.
+        """
+        key = (kind, normalize_url(url))
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+            self.stats["computed" if owner else "shared"] += 1
+
+        if owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+    def get(self, kind, url):
+        """Return the ``kind`` result for ``url`` if it was already computed.
+
+        Results still being computed, or whose computation raised, are not
+        returned.
+
+        Parameters
+        ----------
+        kind : hashable
+            What was computed for the url, see :meth:`get_or_compute`.
+        url : str
+            The url the result is for.
+
+        Returns
+        -------
+        found : bool
+            Whether the result was computed.
+        result : object
+            The result, or None if it was not found.
+        """
+        key = (kind, normalize_url(url))
+        with self._lock:
+            future = self._results.get(key)
+        if future is None or not future.done() or future.exception() is not None:
+            return False, None
+        with self._lock:
+            self.stats["shared"] += 1
+        return True, future.result()
+
+
+class ContentFingerprints(object):
+    """Persistent fingerprints of page contents and what was extracted from them.
+
+    Most pages, e.g. staff directories, change a few times a year. Storing
+    a fingerprint of each page's visible text together with the result
+    extracted from it lets the next run reuse the result, skipping
+    extraction, email validation and rendering, as long as the page is
+    unchanged.
+
+    Parameters
+    ----------
+    cache_dir : str | pathlib.Path
+        Directory holding the fingerprint database.
+
+    Attributes
+    ----------
+    stats : collections.Counter
+        Counts of ``"unchanged"`` pages whose result was reused, and of
+        ``"changed"`` and ``"new"`` pages that were extracted again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.stats = collections.Counter()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "fingerprints.sqlite"), check_same_thread=False
+        )
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "kind TEXT, url TEXT, fingerprint TEXT, result BLOB, "
+                "updated_at REAL, PRIMARY KEY (kind, url))"
+            )
+
+    def __getstate__(self):
+        # an unpickled store opens its own connection to the same database
+        return {"cache_dir": self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def get(self, kind, url, fingerprint):
+        """Look up the result extracted from ``url`` when it had ``fingerprint``.
+
+        Parameters
+        ----------
+        kind : str
+            What was extracted, e.g. ``"contactinfo"``.
+        url : str
+            The url of the page.
+        fingerprint : str
+            Fingerprint of the page as fetched now.
+
+        Returns
+        -------
+        unchanged : bool
+            Whether the page had the same fingerprint last time.
+        result : object
+            The stored result if the page is unchanged, else None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, result FROM fingerprints "
+                "WHERE kind = ? AND url = ?",
+                (kind, normalize_url(url)),
+            ).fetchone()
+        if row is None:
+            self.stats["new"] += 1
+            return False, None
+        if row[0] != fingerprint:
+            self.stats["changed"] += 1
+            return False, None
+        self.stats["unchanged"] += 1
+        return True, pickle.loads(row[1])
+
+    def put(self, kind, url, fingerprint, result):
+        """Store the ``result`` extracted from ``url`` with ``fingerprint``."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                (kind, normalize_url(url), fingerprint, pickle.dumps(result),
+                 time.time()),
+            )
+
+    def clear(self):
+        """Remove all fingerprints."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fingerprints")
+
+    def close(self):
+        """Close the fingerprint database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,230 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+
+def _to_json(obj):
+    """Encode ``obj`` as JSON, writing sets as sorted lists."""
+
+    def _default(value):
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        raise TypeError(f"Cannot checkpoint {type(value).__name__}: {value!r}")
+
+    return json.dumps(obj, default=_default)
+
+
+class Checkpoint(object):
+    """Durable state of a scrape run, so a restarted run can resume it.
+
+    The state is written to a SQLite database as the run goes:
+
+    - the result (or failure) of every url scraped, per ``kind`` of scrape,
+      e.g. ``"contact"`` or ``"social"``,
+    - the frontier, visited pages and links found of each crawl, see
+      :meth:`schoolparser.scrape.Crawler.crawl`, appended page by page,
+    - the schools a scrape has finished, with their final result.
+
+    Results must be JSON serializable; sets are stored as sorted lists.
+    A run that completes should :meth:`clear` its checkpoint, so the next
+    run starts over.
+
+    Parameters
+    ----------
+    fpath : str | pathlib.Path
+        Path of the SQLite database file.
+    """
+
+    def __init__(self, fpath):
+        self.fpath = Path(fpath)
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.fpath), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "kind TEXT, school TEXT, url TEXT, result TEXT, error TEXT, "
+                "PRIMARY KEY (kind, school, url))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawls (seed TEXT PRIMARY KEY, state TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_pages ("
+                "seed TEXT, url TEXT, links TEXT, PRIMARY KEY (seed, url))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_frontier ("
+                "seed TEXT, url TEXT, depth INTEGER, score REAL, "
+                "PRIMARY KEY (seed, url))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS schools ("
+                "kind TEXT, school TEXT, result TEXT, PRIMARY KEY (kind, school))"
+            )
+
+    def save_result(self, kind, school, url, result, error=None):
+        """Record the result of scraping ``url``, or the error it failed with.
+
+        Parameters
+        ----------
+        kind : str
+            What was scraped, e.g. ``"contact"``.
+        school : str
+            The school the url belongs to.
+        url : str
+            The scraped url.
+        result : object
+            JSON serializable result. Ignored if ``error`` is given.
+        error : str | None
+            Description of the failure, if the url failed.
+        """
+        result = None if error is not None else _to_json(result)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (kind, school, url, result, error),
+            )
+
+    def load_results(self, kind, failed=False):
+        """Return the recorded results of a ``kind`` of scrape.
+
+        Parameters
+        ----------
+        kind : str
+            What was scraped.
+        failed : bool
+            Whether to return the errors of failed urls instead of the
+            results of successful ones.
+
+        Returns
+        -------
+        results : dict
+            Result (or error) keyed by ``(school, url)``.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT school, url, result, error FROM results WHERE kind = ?",
+                (kind,),
+            ).fetchall()
+        if failed:
+            return {(school, url): error for school, url, _, error in rows if error}
+        return {
+            (school, url): json.loads(result)
+            for school, url, result, error in rows
+            if error is None
+        }
+
+    def update_crawl(self, seed, counters, page_url=None, links=None, scheduled=()):
+        """Record the progress of the crawl starting at ``seed``.
+
+        Only what changed is written, so a page costs the same however
+        large the crawl has grown.
+
+        Parameters
+        ----------
+        seed : str
+            The url the crawl started from.
+        counters : dict
+            JSON serializable counters of the crawl, e.g. ``pages_fetched``
+            and the final ``report``. They replace those recorded.
+        page_url : str | None
+            The page just visited, which leaves the frontier.
+        links : tuple of list | None
+            The ``(internal, external)`` links found on ``page_url``, to
+            restore the urls the crawl found with. None records none.
+        scheduled : iterable of tuple
+            The ``(url, depth, score)`` items just added to the frontier.
+        """
+        counters = _to_json(counters)
+        scheduled = [(seed, url, depth, score) for url, depth, score in scheduled]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawls VALUES (?, ?)", (seed, counters)
+            )
+            if page_url is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO crawl_pages VALUES (?, ?, ?)",
+                    (seed, page_url, None if links is None else _to_json(links)),
+                )
+                self._conn.execute(
+                    "DELETE FROM crawl_frontier WHERE seed = ? AND url = ?",
+                    (seed, page_url),
+                )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO crawl_frontier VALUES (?, ?, ?, ?)", scheduled
+            )
+
+    def load_crawl(self, seed):
+        """Return the recorded state of the crawl starting at ``seed``, if any.
+
+        Returns
+        -------
+        state : dict | None
+            The recorded counters, with the ``frontier`` items in the order
+            they were scheduled, the ``visited`` pages, and the
+            ``internal_urls`` and ``external_urls`` found on them.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM crawls WHERE seed = ?", (seed,)
+            ).fetchone()
+            if row is None:
+                return None
+            state = json.loads(row[0])
+            if "frontier" in state:
+                # written whole, before crawls were recorded page by page
+                return state
+            pages = self._conn.execute(
+                "SELECT url, links FROM crawl_pages WHERE seed = ? ORDER BY rowid",
+                (seed,),
+            ).fetchall()
+            frontier = self._conn.execute(
+                "SELECT url, depth, score FROM crawl_frontier WHERE seed = ? "
+                "ORDER BY rowid",
+                (seed,),
+            ).fetchall()
+        internal_urls, external_urls = set(), set()
+        for _, links in pages:
+            if links is not None:
+                internal, external = json.loads(links)
+                internal_urls.update(internal)
+                external_urls.update(external)
+        state.update(
+            frontier=[list(item) for item in frontier],
+            visited=[url for url, _ in pages],
+            internal_urls=internal_urls,
+            external_urls=external_urls - internal_urls,
+        )
+        return state
+
+    def mark_done(self, kind, school, result=None):
+        """Record that a ``kind`` of scrape finished ``school``."""
+        result = _to_json(result)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO schools VALUES (?, ?, ?)",
+                (kind, school, result),
+            )
+
+    def load_done(self, kind):
+        """Return the final result of each school a ``kind`` of scrape finished."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT school, result FROM schools WHERE kind = ?", (kind,)
+            ).fetchall()
+        return {school: json.loads(result) for school, result in rows}
+
+    def clear(self):
+        """Remove all recorded state."""
+        with self._lock, self._conn:
+            for table in (
+                "results", "crawls", "crawl_pages", "crawl_frontier", "schools"
+            ):
+                self._conn.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        """Close the checkpoint database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,227 @@
+import sys
+from array import array
+
+# how pages are ranked by ``LinkGraph.rank``
+RANK_METHODS = ("pagerank", "in_degree")
+
+
+class LinkGraph(object):
+    """Graph of the internal links found by a crawl.
+
+    Urls are interned to integer ids in the order they are first seen, and
+    edges are appended to two ``array.array`` of 32-bit ids, so a link
+    costs 8 bytes. The edges are compacted to a CSR (compressed sparse row)
+    adjacency on demand for ranking, which needs numpy.
+
+    Each page's links are recorded once; recording a page again, e.g.
+    when a crawl resumes, is a no-op.
+
+    Parameters
+    ----------
+    intern_links : bool
+        Whether to keep the url of every page linked to. If False, pages
+        are keyed by the 64-bit fingerprint of their url (see
+        :func:`schoolparser.visited.url_fingerprint`) and only the pages
+        whose links were recorded keep their url, for crawls that keep the
+        links seen in a :class:`schoolparser.visited.VisitedStore` rather
+        than as strings.
+
+    Attributes
+    ----------
+    urls : list of str
+        The url of each page, by id. None for pages only linked to, if
+        ``intern_links`` is False.
+    """
+
+    def __init__(self, intern_links=True):
+        self.intern_links = intern_links
+        self.urls = []
+        self._ids = dict()
+        self._src = array("i")
+        self._dst = array("i")
+        # whether the links of each page were recorded, by id
+        self._recorded = bytearray()
+        self._csr = None
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __contains__(self, url):
+        return self._key(url) in self._ids
+
+    @property
+    def n_edges(self):
+        """Number of links recorded."""
+        return len(self._src)
+
+    def nbytes(self):
+        """Approximate memory of the graph in bytes.
+
+        Counts the edges, the ids and their keys, and the urls kept, also
+        those that other objects, e.g. the crawler's url sets, hold too.
+        """
+        size = sum(
+            sys.getsizeof(obj)
+            for obj in (self._src, self._dst, self._recorded, self._ids, self.urls)
+        )
+        for key, idx in self._ids.items():
+            size += sys.getsizeof(key) + sys.getsizeof(idx)
+        if not self.intern_links:
+            size += sum(sys.getsizeof(url) for url in self.urls if url is not None)
+        return size
+
+    def add_page(self, url, links):
+        """Record the links from the page at ``url``.
+
+        Parameters
+        ----------
+        url : str
+            The page the links were found on.
+        links : iterable of str
+            The internal links on the page. Links back to the page itself
+            are ignored.
+        """
+        src = self._intern(url)
+        if self._recorded[src]:
+            return
+        self.urls[src] = url
+        self._recorded[src] = 1
+        for link in links:
+            dst = self._intern(link)
+            if dst != src:
+                self._src.append(src)
+                self._dst.append(dst)
+        self._csr = None
+
+    def get_id(self, url):
+        """Return the integer id of ``url``, or None if it is not in the graph."""
+        return self._ids.get(self._key(url))
+
+    def to_csr(self):
+        """Return the links as a CSR adjacency.
+
+        Returns
+        -------
+        indptr : np.ndarray
+            Array of ``len(self) + 1`` offsets; the links of page ``i`` are
+            ``indices[indptr[i]:indptr[i + 1]]``.
+        indices : np.ndarray
+            The ids of the linked pages, grouped by the linking page.
+        """
+        import numpy as np
+
+        if self._csr is None:
+            n = len(self.urls)
+            src = np.asarray(self._src, dtype=np.intc)
+            dst = np.asarray(self._dst, dtype=np.intc)
+            order = np.argsort(src, kind="stable")
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+            self._csr = indptr, dst[order]
+        return self._csr
+
+    def in_degree(self):
+        """Return the number of pages linking to each page, by id."""
+        import numpy as np
+
+        _, indices = self.to_csr()
+        return np.bincount(indices, minlength=len(self.urls))
+
+    def pagerank(self, damping=0.85, max_iter=50, tol=1e-6):
+        """Return the PageRank of each page, by id.
+
+        Power iteration over the CSR adjacency. Pages without recorded
+        links (not crawled yet, or dead ends) spread their rank evenly.
+
+        Parameters
+        ----------
+        damping : float
+            Probability of following a link rather than jumping to a
+            random page.
+        max_iter : int
+            Maximum number of iterations.
+        tol : float
+            Stop once the ranks change by less than this in total.
+
+        Returns
+        -------
+        ranks : np.ndarray
+            Rank of each page, summing to 1.
+        """
+        import numpy as np
+
+        n = len(self.urls)
+        if n == 0:
+            return np.zeros(0)
+        indptr, indices = self.to_csr()
+        out_degree = np.diff(indptr)
+        dangling = out_degree == 0
+        src = np.repeat(np.arange(n, dtype=np.intc), out_degree)
+        inv_degree = np.zeros(n)
+        inv_degree[~dangling] = 1.0 / out_degree[~dangling]
+
+        ranks = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            shares = (ranks * inv_degree)[src]
+            new_ranks = damping * np.bincount(indices, weights=shares, minlength=n)
+            new_ranks += (1.0 - damping + damping * ranks[dangling].sum()) / n
+            converged = np.abs(new_ranks - ranks).sum() < tol
+            ranks = new_ranks
+            if converged:
+                break
+        return ranks
+
+    def rank(self, method="pagerank", urls=None, top=None):
+        """Return urls ordered by their rank in the graph, highest first.
+
+        Parameters
+        ----------
+        method : str
+            One of ``RANK_METHODS``.
+        urls : iterable of str | None
+            Only rank these urls. Urls not in the graph rank last. Defaults
+            to all urls in the graph, or to the pages whose links were
+            recorded if ``intern_links`` is False.
+        top : int | None
+            Only return this many urls.
+
+        Returns
+        -------
+        ranked : list of tuple
+            ``(url, score)`` pairs, highest score first, ties in the order
+            the urls were first seen.
+        """
+        if method not in RANK_METHODS:
+            raise ValueError(f"method must be one of {RANK_METHODS}, not {method!r}.")
+        scores = self.pagerank() if method == "pagerank" else self.in_degree()
+        if urls is None:
+            urls = [url for url in self.urls if url is not None]
+        else:
+            urls = list(urls)
+        ids = [self.get_id(url) for url in urls]
+        ranked = sorted(
+            (
+                (url, float(scores[idx]) if idx is not None else 0.0, idx)
+                for url, idx in zip(urls, ids)
+            ),
+            key=lambda item: (-item[1], len(self.urls) if item[2] is None else item[2]),
+        )
+        return [(url, score) for url, score, _ in ranked[:top]]
+
+    def _key(self, url):
+        """Return the key ``url`` is interned by."""
+        if self.intern_links:
+            return url
+        from schoolparser.visited import url_fingerprint
+
+        return url_fingerprint(url)[1]
+
+    def _intern(self, url):
+        key = self._key(url)
+        idx = self._ids.get(key)
+        if idx is None:
+            idx = len(self.urls)
+            self._ids[key] = idx
+            self.urls.append(url if self.intern_links else None)
+            self._recorded.append(0)
+        return idx
@@ -0,0 +1,263 @@
+import bisect
+import collections
+import contextlib
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, float("inf"),
+)
+
+# stages of a scrape, in pipeline order
+STAGES = ("dns", "fetch", "render", "parse", "regex", "validation", "write")
+
+
+class _Histogram(object):
+    """Latency histogram over ``LATENCY_BUCKETS``."""
+
+    __slots__ = ("counts", "n", "total", "max", "errors")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def add(self, seconds, error=False):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.n += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.errors += error
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.n += other.n
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.errors += other.errors
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        rank = q * self.n
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "n": self.n,
+            "errors": self.errors,
+            "total_s": self.total,
+            "mean_s": self.total / self.n if self.n else 0.0,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "max_s": self.max,
+            "buckets": {
+                str(bound): count
+                for bound, count in zip(LATENCY_BUCKETS, self.counts)
+                if count
+            },
+        }
+
+
+class Metrics(object):
+    """Per-stage latency histograms and counters of a scrape run.
+
+    Every observation is recorded three times: for the whole run, for the
+    host of its url and for the school being scraped, if any (see
+    :func:`for_school`). Recording takes a lock and a bisect, so metrics
+    can stay on in production runs.
+
+    Stages are listed in ``STAGES``. Counters such as ``"pages"`` and
+    ``"bytes"`` are kept with the same breakdown.
+    """
+
+    def __init__(self):
+        self._histograms = collections.defaultdict(_Histogram)
+        self._counters = collections.Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __getstate__(self):
+        with self._lock:
+            return {
+                "histograms": dict(self._histograms),
+                "counters": self._counters.copy(),
+            }
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._histograms.update(state["histograms"])
+        self._counters.update(state["counters"])
+
+    @property
+    def school(self):
+        """The school being scraped by the current thread, if set."""
+        return getattr(self._local, "school", None)
+
+    @contextlib.contextmanager
+    def timed(self, stage, url=None):
+        """Time the body as one ``stage`` observation for ``url``.
+
+        An exception raised by the body is counted as an error of the
+        stage and re-raised.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(stage, time.perf_counter() - start, url, error=True)
+            raise
+        self.observe(stage, time.perf_counter() - start, url)
+
+    def observe(self, stage, seconds, url=None, error=False):
+        """Record a ``stage`` latency of ``seconds`` for ``url``."""
+        with self._lock:
+            for key in self._keys(stage, url):
+                self._histograms[key].add(seconds, error)
+
+    def count(self, name, n=1, url=None):
+        """Add ``n`` to the counter ``name`` for ``url``."""
+        with self._lock:
+            for key in self._keys(name, url):
+                self._counters[key] += n
+
+    def merge(self, other):
+        """Add the observations of another :class:`Metrics` to this one."""
+        state = other.__getstate__()
+        with self._lock:
+            for key, histogram in state["histograms"].items():
+                self._histograms[key].merge(histogram)
+            self._counters.update(state["counters"])
+
+    def to_dict(self):
+        """Return the metrics as a JSON serializable dictionary.
+
+        Returns
+        -------
+        metrics : dict
+            ``"stages"`` and ``"counters"`` of the whole run, and the same
+            ``"by_host"`` and ``"by_school"``.
+        """
+        result = {
+            "stages": {},
+            "counters": {},
+            "by_host": collections.defaultdict(lambda: {"stages": {}, "counters": {}}),
+            "by_school": collections.defaultdict(lambda: {"stages": {}, "counters": {}}),
+        }
+        with self._lock:
+            histograms = {key: h.to_dict() for key, h in self._histograms.items()}
+            counters = self._counters.copy()
+        for (name, dim, label), value in histograms.items():
+            self._place(result, dim, label)["stages"][name] = value
+        for (name, dim, label), value in counters.items():
+            self._place(result, dim, label)["counters"][name] = value
+        result["by_host"] = dict(result["by_host"])
+        result["by_school"] = dict(result["by_school"])
+        return result
+
+    def summary(self, top=10):
+        """Return a human readable summary of the run.
+
+        Parameters
+        ----------
+        top : int
+            Number of hosts and schools listed, slowest first.
+
+        Returns
+        -------
+        summary : str
+            Latency per stage, counters, and the total time per host and
+            per school.
+        """
+        metrics = self.to_dict()
+        stages = sorted(
+            metrics["stages"].items(),
+            key=lambda item: STAGES.index(item[0]) if item[0] in STAGES else len(STAGES),
+        )
+        lines = [
+            f"{'stage':>12} {'n':>8} {'errors':>7} {'total s':>9} "
+            f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+        ]
+        for stage, h in stages:
+            lines.append(
+                f"{stage:>12} {h['n']:>8} {h['errors']:>7} {h['total_s']:>9.2f} "
+                f"{h['mean_s'] * 1e3:>9.1f} {h['p50_s'] * 1e3:>9.1f} "
+                f"{h['p95_s'] * 1e3:>9.1f} {h['max_s'] * 1e3:>9.1f}"
+            )
+        for name, value in sorted(metrics["counters"].items()):
+            lines.append(f"{name}: {value}")
+        for dim in ("by_host", "by_school"):
+            totals = {
+                label: sum(h["total_s"] for h in value["stages"].values())
+                for label, value in metrics[dim].items()
+            }
+            slowest = sorted(totals.items(), key=lambda item: -item[1])[:top]
+            if slowest:
+                lines.append(f"Slowest {dim[3:]}s:")
+            for label, total in slowest:
+                counters = metrics[dim][label]["counters"]
+                lines.append(
+                    f"  {label}: {total:.2f} s, {counters.get('pages', 0)} pages, "
+                    f"{counters.get('bytes', 0)} bytes"
+                )
+        return "\n".join(lines)
+
+    def dump_json(self, fpath):
+        """Write :meth:`to_dict` to the JSON file ``fpath``."""
+        with open(fpath, "w") as fout:
+            json.dump(self.to_dict(), fout, indent=4)
+
+    def _keys(self, name, url):
+        keys = [(name, "all", None)]
+        if url is not None:
+            keys.append((name, "host", urlparse(url).netloc))
+        school = self.school
+        if school is not None:
+            keys.append((name, "school", school))
+        return keys
+
+    @staticmethod
+    def _place(result, dim, label):
+        if dim == "all":
+            return result
+        return result["by_host" if dim == "host" else "by_school"][label]
+
+
+@contextlib.contextmanager
+def timed(metrics, stage, url=None):
+    """Time the body as a ``stage`` of ``url`` in ``metrics``, if given."""
+    if metrics is None:
+        yield
+        return
+    with metrics.timed(stage, url):
+        yield
+
+
+def count(metrics, name, n=1, url=None):
+    """Add ``n`` to the counter ``name`` in ``metrics``, if given."""
+    if metrics is not None:
+        metrics.count(name, n, url)
+
+
+@contextlib.contextmanager
+def for_school(metrics, school):
+    """Attribute what the current thread records in ``metrics`` to ``school``."""
+    if metrics is None:
+        yield
+        return
+    previous = metrics.school
+    metrics._local.school = school
+    try:
+        yield
+    finally:
+        metrics._local.school = previous
@@ -0,0 +1,223 @@
+import asyncio
+import atexit
+import threading
+
+from schoolparser.base import logger
+
+# Chromium flags of the pooled browsers, as requests_html launches them
+_BROWSER_ARGS = ["--no-sandbox"]
+
+
+class _PooledBrowser(object):
+    """A headless browser driven from its own event-loop thread.
+
+    Each browser owns an :class:`requests_html.AsyncHTMLSession`, whose
+    Chromium instance is launched on first use and reused for every render
+    until the browser is recycled.
+
+    Chromium is launched here rather than by the session: the session
+    launches it with pyppeteer's default signal handlers, which can only
+    be installed from the main thread and so fail on the browser's own
+    event-loop thread, after Chromium has already been started.
+    """
+
+    def __init__(self):
+        # requests_html pulls in pyppeteer, so it is only imported once a
+        # page is rendered
+        from requests_html import AsyncHTMLSession
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self.session = AsyncHTMLSession(loop=self.loop)
+        self.tabs = 0
+        self.renders = 0
+        self.failures = 0
+
+    def render(self, url, timeout):
+        """Render ``url`` in a new tab and return the rendered HTML bytes."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._render(url, timeout), self.loop
+        )
+        return future.result()
+
+    async def _launch(self):
+        """Launch Chromium for the session, if it is not running yet."""
+        if getattr(self.session, "_browser", None) is not None:
+            return
+        import pyppeteer
+
+        self.session._browser = await pyppeteer.launch(
+            ignoreHTTPSErrors=not self.session.verify,
+            headless=True,
+            args=_BROWSER_ARGS,
+            # signal handlers can only be set from the main thread
+            handleSIGINT=False,
+            handleSIGTERM=False,
+            handleSIGHUP=False,
+        )
+
+    async def _render(self, url, timeout):
+        from requests_html import HTML
+
+        await self._launch()
+        html = HTML(session=self.session, url=url, html="<html></html>", async_=True)
+        await html.arender(timeout=timeout)
+        return html.raw_html
+
+    def is_alive(self):
+        """Whether the browser process (if launched) is still running."""
+        browser = getattr(self.session, "_browser", None)
+        if browser is None or browser.process is None:
+            return True
+        return browser.process.poll() is None
+
+    def close(self):
+        """Close the browser and stop its event loop."""
+        try:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result()
+        except Exception as e:
+            logger.warning(f"Failed to close browser cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class RenderPool(object):
+    """Pool of long-lived headless browsers for JavaScript rendering.
+
+    Browsers are launched lazily and reused across urls and schools, so
+    Chromium start-up is paid once per browser instead of once per url.
+    Renders are spread over the least busy browser, each in its own tab.
+
+    Parameters
+    ----------
+    n_browsers : int
+        Number of browser instances kept in the pool.
+    max_tabs : int | None
+        Maximum number of tabs open at once across the whole pool. Defaults
+        to ``n_browsers``, i.e. one tab per browser.
+    max_renders : int
+        Number of renders after which a browser is recycled, to bound the
+        memory a long-lived Chromium accumulates.
+    max_failures : int
+        Number of consecutive failed renders after which a browser is
+        recycled.
+    """
+
+    def __init__(self, n_browsers=2, max_tabs=None, max_renders=200, max_failures=3):
+        if max_tabs is None:
+            max_tabs = n_browsers
+        self.n_browsers = n_browsers
+        self.max_tabs = max_tabs
+        self.max_renders = max_renders
+        self.max_failures = max_failures
+
+        self._browsers = [None] * n_browsers
+        self._lock = threading.Lock()
+        self._tabs = threading.BoundedSemaphore(max_tabs)
+        self._closed = False
+
+    def __getstate__(self):
+        # browsers are not shared between processes; an unpickled pool
+        # launches its own
+        return {
+            "n_browsers": self.n_browsers,
+            "max_tabs": self.max_tabs,
+            "max_renders": self.max_renders,
+            "max_failures": self.max_failures,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def render(self, url, timeout=20):
+        """Render a JavaScript driven webpage.
+
+        Parameters
+        ----------
+        url : str
+            The url to render.
+        timeout : float
+            Page load timeout in seconds.
+
+        Returns
+        -------
+        raw_html : bytes
+            The HTML of the page after JavaScript has run.
+        """
+        with self._tabs:
+            browser = self._acquire()
+            try:
+                raw_html = browser.render(url, timeout)
+            except Exception:
+                browser.failures += 1
+                raise
+            else:
+                browser.failures = 0
+            finally:
+                self._release(browser)
+        return raw_html
+
+    def close(self):
+        """Close all browsers in the pool."""
+        with self._lock:
+            self._closed = True
+            browsers, self._browsers = self._browsers, [None] * self.n_browsers
+        for browser in browsers:
+            if browser is not None:
+                browser.close()
+
+    def _acquire(self):
+        """Pick the least busy healthy browser and open a tab on it."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RenderPool is closed.")
+            for idx, browser in enumerate(self._browsers):
+                if browser is None:
+                    self._browsers[idx] = _PooledBrowser()
+            browser = min(self._browsers, key=lambda b: b.tabs)
+            browser.tabs += 1
+        return browser
+
+    def _release(self, browser):
+        """Close the tab on ``browser``, recycling the browser if unhealthy."""
+        with self._lock:
+            browser.tabs -= 1
+            browser.renders += 1
+            healthy = (
+                browser.renders < self.max_renders
+                and browser.failures < self.max_failures
+                and browser.is_alive()
+            )
+            if healthy or browser.tabs > 0 or browser not in self._browsers:
+                return
+            self._browsers[self._browsers.index(browser)] = None
+        logger.info(
+            f"Recycling browser after {browser.renders} renders "
+            f"and {browser.failures} consecutive failures."
+        )
+        browser.close()
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Return the process-wide default :class:`RenderPool`.
+
+    The pool is created on first use and closed at interpreter exit.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = RenderPool()
+            atexit.register(_render_pool.close)
+    return _render_pool
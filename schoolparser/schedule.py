@@ -0,0 +1,191 @@
+import collections
+import contextlib
+import itertools
+import threading
+import time
+from urllib.parse import urlparse
+
+from schoolparser.base import logger
+
+
+class _TokenBucket(object):
+    """Token bucket refilled at ``rate`` tokens per second up to ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take a token, returning the seconds to wait until it is valid."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostScheduler(object):
+    """Per-host politeness scheduler for page fetches.
+
+    Each host gets a token bucket, so no single district server sees more
+    than ``rate`` requests per second (after an initial ``burst``), while a
+    global cap bounds the number of fetches in flight across all hosts. A
+    ``Crawl-delay`` in a host's robots.txt lowers that host's rate further.
+
+    The scheduler is thread-safe and meant to be shared by everything that
+    fetches during a run.
+
+    Parameters
+    ----------
+    rate : float
+        Requests per second allowed against a single host.
+    burst : int
+        Number of requests a host may receive back to back.
+    max_concurrency : int
+        Maximum number of fetches in flight across all hosts.
+    respect_robots : bool
+        Whether to honor ``Crawl-delay`` from each host's robots.txt.
+    user_agent : str
+        User agent to look up in robots.txt.
+    """
+
+    def __init__(
+        self,
+        rate=2.0,
+        burst=2,
+        max_concurrency=16,
+        respect_robots=True,
+        user_agent="*",
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+
+        self._buckets = dict()
+        self._lock = threading.Lock()
+        self._host_locks = collections.defaultdict(threading.Lock)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def __getstate__(self):
+        # an unpickled scheduler, e.g. in a worker process, limits only the
+        # fetches of its own process
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "max_concurrency": self.max_concurrency,
+            "respect_robots": self.respect_robots,
+            "user_agent": self.user_agent,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        """Wait until ``url`` may be fetched, and hold a fetch slot.
+
+        Parameters
+        ----------
+        url : str
+            The url about to be fetched.
+        """
+        bucket = self._get_bucket(urlparse(url).netloc, urlparse(url).scheme)
+        with self._lock:
+            wait = bucket.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        with self._slots:
+            yield
+
+    def crawl_delay(self, host, scheme="https"):
+        """Return the robots.txt ``Crawl-delay`` of ``host`` in seconds, if any."""
+        if not self.respect_robots:
+            return None
+        from urllib.robotparser import RobotFileParser
+
+        import requests
+
+        parser = RobotFileParser()
+        try:
+            response = requests.get(f"{scheme}://{host}/robots.txt", timeout=10)
+        except Exception as e:
+            logger.info(f"Could not read robots.txt of {host}: {e}")
+            return None
+        if not response.ok:
+            return None
+        parser.parse(response.text.splitlines())
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            delay = max(delay or 0, rate.seconds / rate.requests)
+        return float(delay) if delay else None
+
+    def _get_bucket(self, host, scheme):
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            return bucket
+        # robots.txt is read once per host, without blocking other hosts
+        with self._lock:
+            host_lock = self._host_locks[host]
+        with host_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.rate, self.burst
+                delay = self.crawl_delay(host, scheme)
+                if delay:
+                    rate, burst = min(rate, 1.0 / delay), 1
+                    logger.info(f"Honoring crawl-delay of {delay}s for {host}.")
+                bucket = _TokenBucket(rate, burst)
+                with self._lock:
+                    self._buckets[host] = bucket
+        return bucket
+
+
+@contextlib.contextmanager
+def fetch_slot(scheduler, url):
+    """Hold a fetch slot for ``url`` from ``scheduler``, if one is given.
+
+    Parameters
+    ----------
+    scheduler : HostScheduler | None
+        The scheduler to wait on. No waiting happens if None.
+    url : str
+        The url about to be fetched.
+    """
+    if scheduler is None:
+        yield
+        return
+    with scheduler.slot(url):
+        yield
+
+
+def interleave_by_host(items, key=None):
+    """Reorder urls round-robin over their hosts.
+
+    Consecutive fetches then go to different hosts, so parallel workers do
+    not queue up behind a single host's rate limit.
+
+    Parameters
+    ----------
+    items : iterable
+        The urls, or items holding urls, to reorder.
+    key : callable | None
+        Function returning the url of an item. Items are urls if None.
+
+    Returns
+    -------
+    items : list
+        The same items, interleaved across hosts.
+    """
+    by_host = collections.OrderedDict()
+    for item in items:
+        url = item if key is None else key(item)
+        by_host.setdefault(urlparse(url).netloc, []).append(item)
+    interleaved = itertools.zip_longest(*by_host.values())
+    return [item for group in interleaved for item in group if item is not None]
@@ -1,18 +1,26 @@
+import collections
+import hashlib
+import heapq
+import itertools
+import logging
+import os
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from urllib.parse import urlparse, urljoin
 
 import colorama
-import requests
-from bs4 import BeautifulSoup as bs
-from requests_html import HTMLSession
-
-from email_validator import validate_email, EmailNotValidError
-
 
 from schoolparser.base import logger
+from schoolparser.graph import LinkGraph
+from schoolparser.metrics import Metrics, count, for_school, timed
+from schoolparser.schedule import fetch_slot
+from schoolparser.validate import get_email_validator
+
+# how the links found by a crawl are logged
+LINK_LOG_MODES = ("page", "all")
 
-# init the colorama module
-colorama.init()
+# colors of logged links; colorama.init() is left to console applications
 GREEN = colorama.Fore.GREEN
 GRAY = colorama.Fore.LIGHTBLACK_EX
 RESET = colorama.Fore.RESET
@@ -20,32 +28,357 @@ RESET = colorama.Fore.RESET
 # email address links
 url = "https://www.randomlists.com/email-addresses"
 EMAIL_REGEX = r"""(?:[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*|"(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21\x23-\x5b\x5d-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])*")@(?:(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?|\[(?:(?:(2(5[0-5]|[0-4][0-9])|1[0-9][0-9]|[1-9]?[0-9]))\.){3}(?:(2(5[0-5]|[0-4][0-9])|1[0-9][0-9]|[1-9]?[0-9])|[a-z0-9-]*[a-z0-9]:(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21-\x5a\x53-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])+)\])"""
+_EMAIL_PATTERN = re.compile(EMAIL_REGEX)
+
+# characters around an "@" searched for an email address; this bounds both
+# the local part and the domain (RFC 5321 allows at most 64 and 255)
+EMAIL_WINDOW = 256
 
 # different regex patterns for phone numbers
 # PHONE_REGEX = r"""\(?\b[2-9][0-9]{2}\)?[-][2-9][0-9]{2}[-][0-9]{4}\b"""
 PHONE_REGEX = r"""(\(?\d{3}\)?[-]\d{3}\D{0,3}\d{4}).*?"""
 
-# social media regex to grab urls
-TWITTER_REGEX = r"""http(s)?:\/\/(.*\.)?twitter\.com\/[A-z0-9_]+\/?"""
-LINKEDIN_REGEX = r"""http(s)?:\/\/([\w]+\.)?linkedin\.com\/in\/[A-z0-9_-]+\/?"""
-FACEBOOK_REGEX = r"""http(s)?:\/\/(www\.)?(facebook|fb)\.com\/[A-z0-9_\-\.]+\/?"""
-INSTAGRAM_REGEX = r"""https?:\/\/(www\.)?instagram\.com\/([A-Za-z0-9_](?:(?:[A-Za-z0-9_]|(?:\.(?!\.))){0,28}(?:[A-Za-z0-9_]))?)"""
+# social media regex to grab urls, keyed by platform and without the scheme
+_SCHEME_REGEX = r"""https?:\/\/"""
+SOCIAL_MEDIA_REGEX = {
+    "twitter": r"""([\w-]+\.)*twitter\.com\/[A-z0-9_]+\/?""",
+    "facebook": r"""(www\.)?(facebook|fb)\.com\/[A-z0-9_\-\.]+\/?""",
+    "instagram": r"""(www\.)?instagram\.com\/([A-Za-z0-9_](?:(?:[A-Za-z0-9_]|(?:\.(?!\.))){0,28}(?:[A-Za-z0-9_]))?)""",
+    "linkedin": r"""([\w]+\.)?linkedin\.com\/in\/[A-z0-9_-]+\/?""",
+}
+TWITTER_REGEX = _SCHEME_REGEX + SOCIAL_MEDIA_REGEX["twitter"]
+LINKEDIN_REGEX = _SCHEME_REGEX + SOCIAL_MEDIA_REGEX["linkedin"]
+FACEBOOK_REGEX = _SCHEME_REGEX + SOCIAL_MEDIA_REGEX["facebook"]
+INSTAGRAM_REGEX = _SCHEME_REGEX + SOCIAL_MEDIA_REGEX["instagram"]
+
+# social media platforms keyed by the domain names their urls contain
+SOCIAL_MEDIA_DOMAINS = {
+    "twitter.com/": "twitter",
+    "facebook.com/": "facebook",
+    "fb.com/": "facebook",
+    "instagram.com/": "instagram",
+    "linkedin.com/": "linkedin",
+}
+_SOCIAL_MEDIA_PATTERNS = {
+    platform: re.compile(_SCHEME_REGEX + regex)
+    for platform, regex in SOCIAL_MEDIA_REGEX.items()
+}
+# how far before a domain name the url scheme may start
+_SOCIAL_MEDIA_LOOKBEHIND = 256
+
+# how pages are fetched: static HTML first and render only when needed
+# ("auto"), always render, or never render
+RENDER_MODES = ("auto", "always", "never")
+
+# weights of the words in the anchor text or url path of a link that lead
+# towards staff contact information (or away from it), used to fetch the
+# most promising links first; words match as prefixes, e.g. "counsel"
+# matches "counselors" and "counseling"
+CONTACT_LINK_WORDS = {
+    "counsel": 5.0,
+    "guidance": 4.0,
+    "staff": 4.0,
+    "directory": 4.0,
+    "faculty": 4.0,
+    "contact": 3.0,
+    "teacher": 2.0,
+    "administrat": 2.0,
+    "department": 1.5,
+    "about": 1.0,
+    "calendar": -3.0,
+    "event": -2.0,
+    "news": -2.0,
+    "login": -3.0,
+    "athletic": -1.0,
+    "lunch": -1.0,
+}
+# bonus of links in site-wide navigation, where staff directories are linked
+CONTACT_LINK_SECTIONS = {"nav": 1.0, "header": 0.5, "footer": 0.5}
+_WORD_REGEX = re.compile(r"[a-z]+")
+
+# static pages with less visible text than this are treated as JS-only
+MIN_STATIC_TEXT_LENGTH = 500
+_SCRIPT_OR_STYLE_REGEX = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+_TAG_REGEX = re.compile(r"<[^>]+>")
+_APP_SHELL_REGEX = re.compile(
+    r"""<div[^>]+id=["'](root|app|__next|__nuxt)["'][^>]*>\s*</div>""", re.I
+)
+
+
+class Page(object):
+    """A fetched webpage, parsed lazily and at most once.
+
+    The decoded text, DOM, links and visible text are each computed on first
+    access and then reused, so link, email, phone and social media
+    extraction can all read from the same instance.
+
+    Parameters
+    ----------
+    url : str
+        The url the page was fetched from.
+    content : bytes
+        The raw HTML.
+    rendered : bool
+        Whether ``content`` is the HTML after JavaScript rendering.
+    """
+
+    def __init__(self, url, content, rendered=False):
+        self.url = url
+        self.content = content
+        self.rendered = rendered
+        self._text = None
+        self._dom = None
+        self._links = None
+        self._link_scores = None
+        self._visible_text = None
+        self._fingerprint = None
+
+    def __repr__(self):
+        return f"<Page url={self.url!r} rendered={self.rendered}>"
+
+    @property
+    def text(self):
+        """The decoded HTML."""
+        if self._text is None:
+            self._text = self.content.decode(errors="replace")
+        return self._text
+
+    @property
+    def dom(self):
+        """The parsed ``BeautifulSoup`` document."""
+        if self._dom is None:
+            from bs4 import BeautifulSoup as bs
+
+            self._dom = bs(self.content, "html.parser", from_encoding="iso-8859-1")
+        return self._dom
+
+    @property
+    def links(self):
+        """Tuple of the internal and external links on the page."""
+        if self._links is None:
+            self._links = _parse_links(self)
+        return self._links
+
+    @property
+    def link_scores(self):
+        """Dictionary of the internal links on the page and their contact score."""
+        if self._link_scores is None:
+            self._link_scores = _score_links(self)
+        return self._link_scores
+
+    @property
+    def visible_text(self):
+        """The text outside of tags, scripts and styles, whitespace collapsed."""
+        if self._visible_text is None:
+            text = _TAG_REGEX.sub(" ", _SCRIPT_OR_STYLE_REGEX.sub(" ", self.text))
+            self._visible_text = " ".join(text.split())
+        return self._visible_text
+
+    @property
+    def fingerprint(self):
+        """Hex digest of the visible text, identifying the page content."""
+        if self._fingerprint is None:
+            digest = hashlib.sha1(self.visible_text.encode(errors="replace"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def is_js_only(self):
+        """Check whether the page needs JavaScript to show its content."""
+        if _APP_SHELL_REGEX.search(self.text):
+            return True
+        return len(self.visible_text) < MIN_STATIC_TEXT_LENGTH
+
+
+CrawledPage = collections.namedtuple("CrawledPage", ["url", "depth", "page", "links"])
+CrawledPage.__doc__ = """A page fetched by :meth:`Crawler.iter_crawl`.
+
+``page`` is the fetched :class:`Page`, or None if the page was not fetched
+again because its results are shared through the registry, and ``links``
+the new internal links found on it.
+"""
+
+
+class PriorityFrontier(object):
+    """Crawl frontier that hands out the highest scoring link of a free host.
+
+    Items are ``(url, depth, score)`` tuples, kept in one heap per host so
+    links of hosts that are busy are skipped without being popped. Links
+    with the same score are handed out in the order they were added, so a
+    frontier of equal scores is crawled breadth-first, like a
+    ``collections.deque``.
+
+    Parameters
+    ----------
+    items : iterable of tuple
+        Initial ``(url, depth)`` or ``(url, depth, score)`` items.
+    """
+
+    def __init__(self, items=()):
+        self._heaps = dict()
+        self._order = itertools.count()
+        self._len = 0
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        """Iterate over the items, highest score first."""
+        entries = [entry for heap in self._heaps.values() for entry in heap]
+        for neg_score, _, page_url, depth in sorted(entries):
+            yield page_url, depth, -neg_score
+
+    def append(self, item):
+        """Add a ``(url, depth)`` or ``(url, depth, score)`` item."""
+        page_url, depth, score = _frontier_item(item)
+        heap = self._heaps.setdefault(urlparse(page_url).netloc, [])
+        heapq.heappush(heap, (-score, next(self._order), page_url, depth))
+        self._len += 1
+
+    def popleft(self, busy=()):
+        """Remove and return the highest scoring item of a host not in ``busy``.
+
+        Parameters
+        ----------
+        busy : container of str
+            Hosts whose items are skipped.
+
+        Returns
+        -------
+        item : tuple | None
+            The ``(url, depth, score)`` item, or None if every host with
+            items left is busy.
+        """
+        best = None
+        for host, heap in self._heaps.items():
+            if host not in busy and (best is None or heap[0] < self._heaps[best][0]):
+                best = host
+        if best is None:
+            return None
+        heap = self._heaps[best]
+        neg_score, _, page_url, depth = heapq.heappop(heap)
+        if not heap:
+            del self._heaps[best]
+        self._len -= 1
+        return page_url, depth, -neg_score
+
+
+def _remaining(deadline):
+    """Seconds left until ``deadline``, as a request timeout, or None."""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.001)
+
+
+def _unscheduled(links, scheduled):
+    """Return the ``links`` not in ``scheduled`` yet, and add them to it.
+
+    ``scheduled`` None means every link is new, see ``Crawler._scheduled``.
+    """
+    if scheduled is None:
+        return links
+    links = [link for link in links if link not in scheduled]
+    scheduled.update(links)
+    return links
+
+
+def _frontier_item(item):
+    """Return a checkpointed frontier item as ``(url, depth, score)``."""
+    page_url, depth = item[0], item[1]
+    return page_url, depth, item[2] if len(item) > 2 else 0.0
 
 
 class Crawler(object):
     """Web-crawler for url links, and social media.
 
     To run crawler, initialize class and run ``crawl()`` function.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        Maximum number of page fetches in flight at once when crawling
+        with ``asynchronous=True``.
+    max_per_host : int
+        Maximum number of page fetches in flight at once against a single
+        host when crawling with ``asynchronous=True``.
+    render_pool : schoolparser.render.RenderPool | None
+        Browser pool used to render JavaScript driven pages. Defaults to the
+        process-wide pool from :func:`schoolparser.render.get_render_pool`.
+    cache : schoolparser.cache.ResponseCache | None
+        Optional persistent response cache for static page fetches.
+    scheduler : schoolparser.schedule.HostScheduler | None
+        Optional politeness scheduler, shared with other fetchers of the run,
+        that rate limits fetches per host.
+    registry : schoolparser.cache.FetchRegistry | None
+        Optional run-level registry, shared across schools, so each page is
+        fetched and parsed at most once per run.
+    fingerprints : schoolparser.cache.ContentFingerprints | None
+        Optional store of page fingerprints, so social media links are only
+        extracted again from pages that changed since the last run.
+    metrics : schoolparser.metrics.Metrics | None
+        Optional metrics to record fetch, render, parse and regex timings in.
+    log_links : str
+        One of ``LINK_LOG_MODES``. ``"page"`` (default) logs the number of
+        new links found on each page, ``"all"`` logs every new link.
+    link_graph : bool
+        Whether to record which page links to which in ``graph``, a
+        :class:`schoolparser.graph.LinkGraph`, to rank pages by. Otherwise
+        ``graph`` is None. With a ``visited`` store, the graph only keeps
+        the urls of the pages fetched, see ``LinkGraph(intern_links=False)``.
+    visited : schoolparser.visited.VisitedStore | None
+        Optional compact store of the links seen, for crawls too large to
+        keep every link string in memory. New links are told apart from
+        seen ones by the store alone: they are not kept in
+        ``internal_urls`` or ``external_urls``, nor in the checkpointed
+        crawl state, and only the urls left to crawl (the frontier) and the
+        pages fetched are held as strings. Cleared by :meth:`reset`.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency=10,
+        max_per_host=2,
+        render_pool=None,
+        cache=None,
+        scheduler=None,
+        registry=None,
+        fingerprints=None,
+        metrics=None,
+        log_links="page",
+        link_graph=False,
+        visited=None,
+    ):
+        if log_links not in LINK_LOG_MODES:
+            raise ValueError(
+                f"log_links must be one of {LINK_LOG_MODES}, not {log_links!r}."
+            )
         self.internal_urls = set()
         self.external_urls = set()
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.render_pool = render_pool
+        self.cache = cache
+        self.scheduler = scheduler
+        self.registry = registry
+        self.fingerprints = fingerprints
+        self.metrics = metrics
+        self.log_links = log_links
+        self.visited = visited
+        self.graph = self._new_graph() if link_graph else None
+
+    def _new_graph(self):
+        """Return an empty link graph, keyed by fingerprint with a visited store."""
+        return LinkGraph(intern_links=self.visited is None)
 
     def reset(self):
-        """Reset internal and external urls."""
+        """Reset internal and external urls, the link graph and visited store."""
         self.internal_urls = set()
         self.external_urls = set()
+        if self.graph is not None:
+            self.graph = self._new_graph()
+        if self.visited is not None:
+            self.visited.clear()
 
     def get_urls(self):
         """Return internal/external urls found as a dictionary."""
@@ -54,142 +387,1244 @@ class Crawler(object):
             "external_urls": self.external_urls,
         }
 
-    def crawl(self, url, max_urls=50, verbose=True):
+    def crawl(
+        self,
+        url,
+        max_urls=50,
+        verbose=True,
+        asynchronous=False,
+        max_depth=None,
+        timeout=None,
+        checkpoint=None,
+    ):
         """
         Crawls a web page and extracts all links.
 
         You'll find all links in `external_urls` and `internal_urls` global set variables.
 
+        Pages are visited breadth-first from an explicit frontier, so memory
+        and runtime per seed are bounded by ``max_urls``, ``max_depth`` and
+        ``timeout``.
+
         Parameters
         ----------
         url : str
             The url to start crawling down.
         max_urls : int
-            number of max urls to crawl, default is 30.
+            number of max urls to fetch, default is 50.
         verbose : bool
             Verbosity
+        asynchronous : bool
+            Whether to crawl with the asyncio engine, which keeps up to
+            ``max_concurrency`` fetches in flight (``max_per_host`` per host).
+        max_depth : int | None
+            Maximum link depth from ``url`` to follow. The seed is depth 0.
+            None (default) does not limit depth.
+        timeout : float | None
+            Wall-clock deadline in seconds for crawling this seed. None
+            (default) does not limit the crawl time.
+        checkpoint : schoolparser.checkpoint.Checkpoint | None
+            Optional checkpoint to record the frontier and visited urls in
+            after every page. A crawl of the same seed then resumes where it
+            stopped, and a finished crawl is not repeated.
+
+        Returns
+        -------
+        report : dict
+            Crawl report with ``pages_fetched`` against the ``max_urls``
+            budget, the ``max_depth_reached``, the number of urls left
+            unvisited in the ``frontier`` and whether the crawl ``timed_out``.
         """
-        # initialize total urls
-        total_urls_visited = 0
+        if asynchronous:
+            import asyncio
 
-        # get all links from a website
-        links = self.get_all_website_links(url)
+            loop = asyncio.new_event_loop()
+            try:
+                return loop.run_until_complete(
+                    self.crawl_async(
+                        url,
+                        max_urls=max_urls,
+                        verbose=verbose,
+                        max_depth=max_depth,
+                        timeout=timeout,
+                        checkpoint=checkpoint,
+                    )
+                )
+            finally:
+                loop.close()
 
-        if verbose:
-            print(f"Found {len(links)} website links at {url}.")
+        state = self._resume_crawl(url, checkpoint, verbose)
+        if state["report"] is not None:
+            return state["report"]
 
-        for link in links:
-            if total_urls_visited > max_urls:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        frontier = collections.deque(tuple(item[:2]) for item in state["frontier"])
+        visited = set(state["visited"])
+        scheduled = self._scheduled(visited | {page_url for page_url, _ in frontier})
+        pages_fetched = state["pages_fetched"]
+        max_depth_reached = state["max_depth_reached"]
+        timed_out = False
+
+        while frontier and pages_fetched < max_urls:
+            if deadline is not None and time.monotonic() >= deadline:
+                timed_out = True
                 break
-            self.crawl(link, max_urls=max_urls, verbose=verbose)
 
-    def get_all_website_links(self, url):
+            page_url, depth = frontier.popleft()
+
+            # get all links from a website
+            page_links = self._get_page_links(page_url, timeout=_remaining(deadline))
+            links = []
+            if page_links is not None:
+                links = self._record_links(page_links, page_url)
+            pages_fetched += 1
+            max_depth_reached = max(max_depth_reached, depth)
+
+            if verbose:
+                print(f"Found {len(links)} website links at {page_url}.")
+
+            new_items = []
+            if max_depth is None or depth < max_depth:
+                for link in _unscheduled(links, scheduled):
+                    new_items.append((link, depth + 1))
+            frontier.extend(new_items)
+
+            visited.add(page_url)
+            self._checkpoint_crawl(
+                checkpoint, url, pages_fetched, max_depth_reached,
+                page_url, page_links, new_items,
+            )
+
+        report = self._crawl_report(
+            url, pages_fetched, max_urls, max_depth_reached, len(frontier),
+            timed_out, verbose,
+        )
+        self._checkpoint_crawl(
+            checkpoint, url, pages_fetched, max_depth_reached, report=report
+        )
+        return report
+
+    async def crawl_async(
+        self,
+        url,
+        max_urls=50,
+        verbose=True,
+        max_depth=None,
+        timeout=None,
+        checkpoint=None,
+    ):
+        """Crawl a web page and extract all links concurrently.
+
+        Pages are fetched in a thread pool, bounded globally by
+        ``max_concurrency`` and per host by ``max_per_host``. Links are
+        parsed on the event loop, so ``internal_urls`` and ``external_urls``
+        are filled exactly as in :meth:`crawl`.
+
+        Parameters
+        ----------
+        url : str
+            The url to start crawling down.
+        max_urls : int
+            number of max urls to fetch.
+        verbose : bool
+            Verbosity
+        max_depth : int | None
+            Maximum link depth from ``url`` to follow.
+        timeout : float | None
+            Wall-clock deadline in seconds for crawling this seed.
+        checkpoint : schoolparser.checkpoint.Checkpoint | None
+            Optional checkpoint to resume from and record the crawl in.
+
+        Returns
+        -------
+        report : dict
+            See :meth:`crawl`.
+        """
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = collections.defaultdict(
+            lambda: asyncio.Semaphore(self.max_per_host)
+        )
+        state = self._resume_crawl(url, checkpoint, verbose)
+        if state["report"] is not None:
+            return state["report"]
+
+        queue = asyncio.Queue()
+        for page_url, depth, *_ in state["frontier"]:
+            queue.put_nowait((page_url, depth))
+        visited = set(state["visited"])
+        scheduled = self._scheduled(
+            visited | {item[0] for item in state["frontier"]}
+        )
+        pages_fetched = state["pages_fetched"]
+        max_depth_reached = state["max_depth_reached"]
+        unvisited = 0
+        timed_out = False
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        # fetches run in other threads, so they are attributed to the school
+        # being crawled explicitly
+        school = None if self.metrics is None else self.metrics.school
+
+        def _get_page_links(page_url):
+            with for_school(self.metrics, school):
+                return self._get_page_links(page_url, timeout=_remaining(deadline))
+
+        async def _worker(executor):
+            nonlocal pages_fetched, max_depth_reached, unvisited
+            while True:
+                page_url, depth = await queue.get()
+                try:
+                    if pages_fetched >= max_urls:
+                        unvisited += 1
+                        continue
+                    pages_fetched += 1
+                    max_depth_reached = max(max_depth_reached, depth)
+
+                    async with host_limits[urlparse(page_url).netloc]:
+                        async with global_limit:
+                            page_links = await loop.run_in_executor(
+                                executor, _get_page_links, page_url
+                            )
+                    new_items = []
+                    if page_links is not None:
+                        links = self._record_links(page_links, page_url)
+                        if verbose:
+                            print(f"Found {len(links)} website links at {page_url}.")
+                        if max_depth is None or depth < max_depth:
+                            for link in _unscheduled(links, scheduled):
+                                new_items.append((link, depth + 1))
+                    for item in new_items:
+                        queue.put_nowait(item)
+
+                    visited.add(page_url)
+                    self._checkpoint_crawl(
+                        checkpoint, url, pages_fetched, max_depth_reached,
+                        page_url, page_links, new_items,
+                    )
+                finally:
+                    queue.task_done()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        workers = [
+            asyncio.ensure_future(_worker(executor))
+            for _ in range(self.max_concurrency)
+        ]
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # fetches still in flight at the deadline are dropped
+            executor.shutdown(wait=False)
+
+        report = self._crawl_report(
+            url, pages_fetched, max_urls, max_depth_reached,
+            unvisited + queue.qsize(),
+            timed_out, verbose,
+        )
+        self._checkpoint_crawl(
+            checkpoint, url, pages_fetched, max_depth_reached, report=report
+        )
+        return report
+
+    def iter_crawl(
+        self,
+        url,
+        max_urls=50,
+        verbose=True,
+        max_depth=None,
+        timeout=None,
+        checkpoint=None,
+        prioritize=False,
+        shared=None,
+    ):
+        """Crawl from ``url``, yielding each page as soon as it is fetched.
+
+        Pages are fetched breadth-first (or best-first, see ``prioritize``)
+        in a thread pool, up to
+        ``max_concurrency`` at once (``max_per_host`` per host), while the
+        caller processes the pages already yielded. No new fetches start
+        while the caller holds on to a page, so at most
+        ``max_concurrency`` fetched pages wait in memory at any time.
+        ``internal_urls`` and ``external_urls`` are filled as in
+        :meth:`crawl`.
+
+        With a registry, the links of each page are shared through it as
+        ``"links"`` results, while pages themselves are not, so that they
+        can be freed as soon as the caller is done with them.
+
+        Parameters
+        ----------
+        url : str
+            The url to start crawling down.
+        max_urls : int
+            number of max urls to fetch.
+        verbose : bool
+            Verbosity
+        max_depth : int | None
+            Maximum link depth from ``url`` to follow.
+        timeout : float | None
+            Wall-clock deadline in seconds for crawling this seed. Fetches
+            still in flight at the deadline are dropped.
+        checkpoint : schoolparser.checkpoint.Checkpoint | None
+            Optional checkpoint to resume from and record the crawl in, see
+            :meth:`crawl`. A page is recorded as visited once the caller
+            asks for the next one, so pages done before a resume are not
+            yielded again (their links are in ``internal_urls``), while the
+            page being processed when the crawl stopped is.
+        prioritize : bool
+            Whether to fetch the links most likely to lead to staff contact
+            information first, scored by :attr:`Page.link_scores`, instead
+            of breadth-first.
+        shared : hashable | None
+            Registry kind of the result the caller extracts from each page,
+            e.g. ``("social_media_links", "auto")``. Pages whose links and
+            ``shared`` result are both in the registry already are not
+            fetched again, and are yielded without their ``page``. Ignored
+            with ``prioritize``, which needs every page to score its links.
+
+        Yields
+        ------
+        page : CrawledPage
+            A fetched page, its depth and the new internal links on it.
+            Pages that fail to fetch are skipped.
+
+        Returns
+        -------
+        report : dict
+            See :meth:`crawl`, as the value of the ``StopIteration``.
+        """
+        state = self._resume_crawl(url, checkpoint, verbose)
+        if state["report"] is not None:
+            return state["report"]
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        frontier = PriorityFrontier(state["frontier"])
+        visited = set(state["visited"])
+        scheduled = self._scheduled(visited | {item[0] for item in frontier})
+        in_flight = dict()
+        per_host = collections.Counter()
+        pages_fetched = state["pages_fetched"]
+        max_depth_reached = state["max_depth_reached"]
+        timed_out = False
+
+        # the page yielded last, until the caller asks for the next one
+        unacked = []
+
+        def _checkpoint(page_url=None, page_links=None, new_items=(), report=None):
+            # pages fetched but not processed yet stay in the frontier
+            n_pending = len(unacked) + len(in_flight)
+            self._checkpoint_crawl(
+                checkpoint, url, pages_fetched - n_pending, max_depth_reached,
+                page_url, page_links, new_items, report,
+            )
+
+        # fetches run in other threads, so they are attributed to the school
+        # being crawled explicitly
+        school = None if self.metrics is None else self.metrics.school
+
+        def _fetch_page(page_url):
+            if self.registry is not None and shared is not None and not prioritize:
+                found, page_links = self.registry.get("links", page_url)
+                if found and page_links is None:
+                    # failed to fetch earlier in the run
+                    return None
+                if found and self.registry.get(shared, page_url)[0]:
+                    return None, page_links
+            with for_school(self.metrics, school):
+                content = self._fetch_content(page_url, timeout=_remaining(deadline))
+                if content is None:
+                    return None
+                page = Page(page_url, content)
+                with timed(self.metrics, "parse", page_url):
+                    page_links = page.links
+                    if prioritize:
+                        page.link_scores
+                if self.registry is not None:
+                    page_links = self.registry.get_or_compute(
+                        "links", page_url, lambda: page_links
+                    )
+                return page, page_links
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            while frontier or in_flight:
+                # start fetches, skipping hosts that are already busy
+                busy = {
+                    host for host, n in per_host.items() if n >= self.max_per_host
+                }
+                while (
+                    frontier
+                    and len(in_flight) < self.max_concurrency
+                    and pages_fetched < max_urls
+                ):
+                    item = frontier.popleft(busy)
+                    if item is None:
+                        break
+                    page_url, depth, _ = item
+                    host = urlparse(page_url).netloc
+                    future = executor.submit(_fetch_page, page_url)
+                    in_flight[future] = (item, host)
+                    per_host[host] += 1
+                    if per_host[host] >= self.max_per_host:
+                        busy.add(host)
+                    pages_fetched += 1
+                    max_depth_reached = max(max_depth_reached, depth)
+                if not in_flight:
+                    break
+
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                done, _ = wait(
+                    in_flight, timeout=remaining, return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    timed_out = True
+                    break
+
+                for future in done:
+                    item, host = in_flight.pop(future)
+                    page_url, depth, _ = item
+                    per_host[host] -= 1
+                    fetched = future.result()
+                    if fetched is None:
+                        visited.add(page_url)
+                        _checkpoint(page_url)
+                        continue
+                    page, page_links = fetched
+                    links = self._record_links(page_links, page_url)
+                    if verbose:
+                        print(f"Found {len(links)} website links at {page_url}.")
+                    new_items = []
+                    if max_depth is None or depth < max_depth:
+                        scores = page.link_scores if prioritize else {}
+                        for link in _unscheduled(links, scheduled):
+                            new_items.append((link, depth + 1, scores.get(link, 0.0)))
+                    for new_item in new_items:
+                        frontier.append(new_item)
+                    unacked.append(item)
+                    yield CrawledPage(page_url, depth, page, links)
+                    unacked.clear()
+                    visited.add(page_url)
+                    _checkpoint(page_url, page_links, new_items)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        report = self._crawl_report(
+            url, pages_fetched, max_urls, max_depth_reached,
+            len(frontier) + len(in_flight), timed_out, verbose,
+        )
+        _checkpoint(report=report)
+        return report
+
+    def _scheduled(self, urls):
+        """Return the set of urls a crawl has scheduled, starting with ``urls``.
+
+        With a ``visited`` store, ``urls`` are added to the store and None
+        is returned: the links :meth:`_record_links` returns are new to the
+        store, so they are not scheduled yet.
+        """
+        if self.visited is None:
+            return set(urls)
+        for page_url in urls:
+            self.visited.add(page_url)
+        return None
+
+    def _resume_crawl(self, url, checkpoint, verbose):
+        """Return the checkpointed state of the crawl from ``url``.
+
+        The urls it found are added to ``internal_urls`` and
+        ``external_urls``. A crawl without checkpointed state starts from
+        ``url`` itself.
+        """
+        state = None if checkpoint is None else checkpoint.load_crawl(url)
+        if state is None:
+            return {
+                "frontier": [(url, 0)],
+                "visited": [],
+                "pages_fetched": 0,
+                "max_depth_reached": 0,
+                "report": None,
+            }
+        self.internal_urls.update(state["internal_urls"])
+        self.external_urls.update(state["external_urls"])
+        if verbose:
+            action = "Already crawled" if state["report"] else "Resuming crawl of"
+            print(f"{action} {url} ({state['pages_fetched']} pages fetched).")
+        return state
+
+    def _checkpoint_crawl(
+        self, checkpoint, url, pages_fetched, max_depth_reached, page_url=None,
+        page_links=None, new_items=(), report=None,
+    ):
+        """Record the progress of the crawl from ``url`` in ``checkpoint``, if given.
+
+        Only the page just visited, its ``page_links`` and the ``new_items``
+        it added to the frontier are written, see
+        :meth:`schoolparser.checkpoint.Checkpoint.update_crawl`.
+        """
+        if checkpoint is None:
+            return
+        if self.visited is not None:
+            # the links found are in the visited store, not in the url sets
+            page_links = None
+        checkpoint.update_crawl(
+            url,
+            {
+                "pages_fetched": pages_fetched,
+                "max_depth_reached": max_depth_reached,
+                "report": report,
+            },
+            page_url=page_url,
+            links=page_links,
+            scheduled=[_frontier_item(item) for item in new_items],
+        )
+
+    @staticmethod
+    def _crawl_report(
+        url, pages_fetched, max_urls, max_depth_reached, frontier, timed_out,
+        verbose,
+    ):
+        """Summarize a finished crawl of the seed ``url``."""
+        if verbose:
+            print(
+                f"Fetched {pages_fetched}/{max_urls} pages from {url}"
+                f"{' (timed out)' if timed_out else ''}."
+            )
+        return {
+            "url": url,
+            "pages_fetched": pages_fetched,
+            "max_urls": max_urls,
+            "max_depth_reached": max_depth_reached,
+            "frontier": frontier,
+            "timed_out": timed_out,
+        }
+
+    def get_all_website_links(self, url, timeout=None):
         """Get all website links at a specific url.
 
         Parameters
         ----------
         url : str
             The url to search for website links.
+        timeout : float | None
+            Timeout in seconds of the request, see ``requests.get``.
 
         Returns
         -------
         urls : set
             A set of urls found.
         """
-        # all URLs of `url`
-        urls = set()
-        # domain name of the URL without the protocol
-        domain_name = urlparse(url).netloc
+        page_links = self._get_page_links(url, timeout=timeout)
+        if page_links is None:
+            return []
+        return self._record_links(page_links, url)
+
+    def _get_page_links(self, url, timeout=None):
+        """Fetch and parse the links at ``url``, once per run with a registry."""
+        if self.registry is not None:
+            return self.registry.get_or_compute(
+                "links", url, lambda: self._fetch_page_links(url, timeout)
+            )
+        return self._fetch_page_links(url, timeout)
 
+    def _fetch_page_links(self, url, timeout=None):
+        """Fetch ``url`` and parse its links, or None if the request fails."""
+        content = self._fetch_content(url, timeout)
+        if content is None:
+            return None
+        with timed(self.metrics, "parse", url):
+            return Page(url, content).links
+
+    def _fetch_content(self, url, timeout=None):
+        """Fetch the raw content at ``url``, or None if the request fails."""
         try:
-            soup = bs(
-                requests.get(url).content, "html.parser", from_encoding="iso-8859-1"
+            return _fetch_static(
+                url,
+                timeout=timeout,
+                cache=self.cache,
+                scheduler=self.scheduler,
+                metrics=self.metrics,
             )
         except Exception as e:
             print(e)
-            return []
+            return None
 
-        for a_tag in soup.findAll("a"):
-            href = a_tag.attrs.get("href")
-            if href == "" or href is None:
-                # href empty tag
-                continue
-
-            # join the URL if it's relative (not absolute link)
-            href = urljoin(url, href)
-            parsed_href = urlparse(href)
-            # remove URL GET parameters, URL fragments, etc.
-            href = parsed_href.scheme + "://" + parsed_href.netloc + parsed_href.path
-            if not _is_valid(href):
-                # not a valid URL
-                continue
-            if href in self.internal_urls:
+    def _record_links(self, page_links, url=None):
+        """Add parsed ``page_links`` to the crawl and return the new internal ones."""
+        log_each = self.log_links == "all" and logger.isEnabledFor(logging.INFO)
+        urls = set()
+        n_external = 0
+        internal_links, external_links = page_links
+        if self.graph is not None and url is not None:
+            self.graph.add_page(url, internal_links)
+        for href in external_links:
+            if self.visited is not None:
+                if not self.visited.add(href):
+                    continue
+            elif href in self.internal_urls or href in self.external_urls:
                 # already in the set
                 continue
-            if domain_name not in href:
-                # external link
-                if href not in self.external_urls:
-                    logger.info(f"{GRAY}[!] External link: {href}{RESET}")
-                    self.external_urls.add(href)
+            else:
+                self.external_urls.add(href)
+            if log_each:
+                logger.info("%s[!] External link: %s%s", GRAY, href, RESET)
+            n_external += 1
+        for href in internal_links:
+            if self.visited is not None:
+                if not self.visited.add(href):
+                    continue
+            elif href in self.internal_urls:
+                # already in the set
                 continue
-            logger.info(f"{GREEN}[*] Internal link: {href}{RESET}")
+            else:
+                self.internal_urls.add(href)
+            if log_each:
+                logger.info("%s[*] Internal link: %s%s", GREEN, href, RESET)
             urls.add(href)
-            self.internal_urls.add(href)
+        if self.log_links == "page":
+            logger.info(
+                "[*] %d new internal and %d new external links at %s",
+                len(urls), n_external, url,
+            )
         return urls
 
-    def get_social_media_links(self, url):
+    def get_social_media_links(self, url, render="auto", stats=None, page=None):
         """Get all social media links at specified url.
 
         Parameters
         ----------
         url : str
             Url to search for social media links.
+        render : str
+            One of ``RENDER_MODES``. ``"auto"`` (default) parses the static
+            HTML first and renders the page only if no handles are found or
+            the page looks JavaScript-only.
+        stats : collections.Counter | None
+            Counter to record ``"static"`` and ``"rendered"`` page fetches in.
+        page : Page | None
+            The static page at ``url``, if already fetched, e.g. by
+            :meth:`iter_crawl`.
 
         Returns
         -------
         handle_list : list
             A list of social media handles found.
         """
-        # initiate an HTTP session
-        session = HTMLSession()
-
-        # get the HTTP Response
-        response = session.get(url)
-
         try:
-            # for JAVA-Script driven websites
-            response.html.render()
+            return _fetch_tiered(
+                url,
+                lambda page: _extract_social_media_links(page, metrics=self.metrics),
+                kind="social_media_links",
+                render=render,
+                render_pool=self.render_pool,
+                cache=self.cache,
+                scheduler=self.scheduler,
+                registry=self.registry,
+                fingerprints=self.fingerprints,
+                metrics=self.metrics,
+                stats=stats,
+                timeout=8,
+                page=page,
+            )
         except Exception as e:
             print(url, e)
             return []
 
-        social_media_regex = [
-            TWITTER_REGEX,
-            FACEBOOK_REGEX,
-            INSTAGRAM_REGEX,
-            LINKEDIN_REGEX,
-        ]
-        handle_list = []
-        for regex in social_media_regex:
-            for re_match in re.finditer(regex, response.html.raw_html.decode()):
-                handle_found = re_match.group()
-                handle_list.append(handle_found)
-        return handle_list
+    def discover_social_media(
+        self,
+        url,
+        max_urls=50,
+        platforms=tuple(SOCIAL_MEDIA_REGEX),
+        render="auto",
+        verbose=True,
+        stats=None,
+        checkpoint=None,
+        school=None,
+    ):
+        """Crawl a school website until it has a handle for every platform.
 
+        Links are discovered with :meth:`iter_crawl` while the social media
+        links of every fetched page are extracted (and, if needed, rendered)
+        in a thread pool. Links found but not crawled are searched after
+        the crawl, best ranked first if the crawler has a link ``graph``.
+        As soon as every platform in ``platforms`` has a handle, the crawl
+        stops and outstanding fetches and renders are cancelled.
 
-def _is_valid(url):
-    """Check whether `url` is a valid URL."""
-    parsed = urlparse(url)
-    return bool(parsed.netloc) and bool(parsed.scheme)
+        Parameters
+        ----------
+        url : str
+            The homepage or any other page of the school to start from.
+        max_urls : int
+            number of max urls to crawl.
+        platforms : tuple of str
+            Platforms to find a handle for, keys of ``SOCIAL_MEDIA_REGEX``.
+        render : str
+            One of ``RENDER_MODES``, see :meth:`get_social_media_links`.
+        verbose : bool
+            Verbosity
+        stats : collections.Counter | None
+            Counter to record ``"static"``, ``"rendered"`` and
+            ``"cancelled"`` page fetches in.
+        checkpoint : schoolparser.checkpoint.Checkpoint | None
+            Optional checkpoint to resume the crawl from and to record the
+            links of every searched url in, as ``"social"`` results.
+        school : str | None
+            The school the urls are recorded for in ``checkpoint``.
+
+        Returns
+        -------
+        handles : dict
+            Social media urls found per platform, from one
+            ``socials.extract`` call over all handles of the school.
+        """
+        import socials
+
+        if stats is None:
+            stats = collections.Counter()
+        done = dict()
+        if checkpoint is not None:
+            done = {
+                page_url: handle_list
+                for (done_school, page_url), handle_list in checkpoint.load_results(
+                    "social"
+                ).items()
+                if done_school == school
+            }
+
+        handle_lists = []
+        missing = set(platforms)
+        metrics_school = None if self.metrics is None else self.metrics.school
+
+        def _search(page_url, page=None):
+            if page_url in done:
+                return done[page_url]
+            with for_school(self.metrics, metrics_school):
+                handle_list = self.get_social_media_links(
+                    page_url, render=render, stats=stats, page=page
+                )
+            if checkpoint is not None:
+                checkpoint.save_result("social", school, page_url, handle_list)
+            return handle_list
+
+        def _collect(future):
+            handle_list = future.result()
+            handle_lists.append(handle_list)
+            for handle in handle_list:
+                for domain, platform in SOCIAL_MEDIA_DOMAINS.items():
+                    if domain in handle:
+                        missing.discard(platform)
+            return not missing
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        futures = set()
+        searched = set()
+        found = set()
+        crawl = self.iter_crawl(
+            url, max_urls, verbose, checkpoint=checkpoint,
+            shared=("social_media_links", render),
+        )
+        try:
+            found_all = False
+            for crawled in crawl:
+                searched.add(crawled.url)
+                found.update(crawled.links)
+                futures.add(executor.submit(_search, crawled.url, crawled.page))
+                for future in [future for future in futures if future.done()]:
+                    futures.discard(future)
+                    found_all = _collect(future) or found_all
+                if found_all:
+                    break
+            crawl.close()
+
+            if not found_all:
+                # then the links found but not crawled, which are only in
+                # ``internal_urls`` for pages crawled before a resume
+                leftover = (self.internal_urls | found) - searched
+                if self.graph is not None:
+                    leftover = [
+                        page_url for page_url, _ in self.graph.rank(urls=leftover)
+                    ]
+                for page_url in leftover:
+                    futures.add(executor.submit(_search, page_url))
+                for future in as_completed(list(futures)):
+                    futures.discard(future)
+                    if _collect(future):
+                        break
+        finally:
+            crawl.close()
+            n_cancelled = sum(future.cancel() for future in futures)
+            stats["cancelled"] += n_cancelled
+            executor.shutdown(wait=False)
+
+        if verbose:
+            print(
+                f"Found handles for {len(platforms) - len(missing)}/{len(platforms)} "
+                f"platforms at {url}, cancelled {n_cancelled} searches."
+            )
+        all_handles = list(
+            dict.fromkeys(handle for handle_list in handle_lists for handle in handle_list)
+        )
+        if not all_handles:
+            return dict()
+        return socials.extract(all_handles).get_matches_per_platform()
+
+    def discover_contacts(
+        self,
+        url,
+        max_urls=20,
+        max_contact_pages=3,
+        validator=None,
+        verbose=True,
+        timeout=None,
+        checkpoint=None,
+        school=None,
+    ):
+        """Crawl a school website best-first until it finds staff contacts.
+
+        Links are fetched highest scoring first (see ``prioritize`` in
+        :meth:`iter_crawl`), so counseling, staff and directory pages are
+        reached from the homepage without hand-curated urls and without
+        crawling the whole site. Emails and phone numbers are extracted
+        from every fetched page.
+
+        Parameters
+        ----------
+        url : str
+            The homepage or any other page of the school to start from.
+        max_urls : int
+            number of max urls to fetch.
+        max_contact_pages : int | None
+            Stop once this many pages with email addresses are found. None
+            fetches all ``max_urls`` pages.
+        validator : schoolparser.validate.EmailValidator | None
+            Validator to check email domains with. Defaults to the
+            process-wide validator.
+        verbose : bool
+            Verbosity
+        timeout : float | None
+            Wall-clock deadline in seconds for crawling this seed.
+        checkpoint : schoolparser.checkpoint.Checkpoint | None
+            Optional checkpoint to resume the crawl from, see :meth:`crawl`.
+            The contacts of every page are recorded in it as soon as they
+            are extracted, as ``"contact_page"`` results, and reused when
+            the crawl resumes.
+        school : str | None
+            The school the pages are recorded for in ``checkpoint``.
+
+        Returns
+        -------
+        emails : dict
+            Set of emails per url, for the urls where any were found.
+        phones : dict
+            Set of phone numbers per url, for the urls where any were found.
+        report : dict
+            ``pages_fetched``, ``contact_pages`` found and
+            ``fetches_to_first_contact``, the number of pages fetched up to
+            and including the first page with an email address (None if
+            none was found).
+        """
+        emails = dict()
+        phones = dict()
+        report = {
+            "url": url,
+            "pages_fetched": 0,
+            "contact_pages": 0,
+            "fetches_to_first_contact": None,
+        }
+
+        def _add(page_url, result):
+            report["pages_fetched"] = max(report["pages_fetched"], result["fetch"])
+            if result["phones"]:
+                phones[page_url] = set(result["phones"])
+            if not result["emails"]:
+                return
+            emails[page_url] = set(result["emails"])
+            report["contact_pages"] = len(emails)
+            first = report["fetches_to_first_contact"]
+            if first is None or result["fetch"] < first:
+                report["fetches_to_first_contact"] = result["fetch"]
+
+        # pages searched before the crawl stopped
+        done = dict()
+        if checkpoint is not None:
+            done = {
+                page_url: result
+                for (done_school, page_url), result in checkpoint.load_results(
+                    "contact_page"
+                ).items()
+                if done_school == school
+            }
+        for page_url, result in sorted(done.items(), key=lambda item: item[1]["fetch"]):
+            _add(page_url, result)
+
+        def _enough():
+            return max_contact_pages is not None and len(emails) >= max_contact_pages
+
+        crawl = self.iter_crawl(
+            url, max_urls, verbose, timeout=timeout, checkpoint=checkpoint,
+            prioritize=True,
+        )
+        try:
+            for crawled in [] if _enough() else crawl:
+                if crawled.url in done:
+                    continue
+                email_list, phone_list = _extract_contactinfo(
+                    crawled.page, validator=validator, metrics=self.metrics
+                )
+                result = {
+                    "emails": email_list,
+                    "phones": phone_list,
+                    "fetch": report["pages_fetched"] + 1,
+                }
+                if checkpoint is not None:
+                    checkpoint.save_result("contact_page", school, crawled.url, result)
+                _add(crawled.url, result)
+                if _enough():
+                    break
+        finally:
+            crawl.close()
+
+        if verbose:
+            print(
+                f"Found {sum(map(len, emails.values()))} emails on "
+                f"{len(emails)} pages in {report['pages_fetched']} fetches from "
+                f"{url}, the first after {report['fetches_to_first_contact']}."
+            )
+        return emails, phones, report
+
+
+def _parse_links(page):
+    """Parse the links on a fetched page.
+
+    Parameters
+    ----------
+    page : Page
+        The fetched page.
+
+    Returns
+    -------
+    internal_links : list of str
+        Links within the domain of the page.
+    external_links : list of str
+        Links to other domains.
+    """
+    url = page.url
+    internal_links = dict()
+    external_links = dict()
+    # domain name of the URL without the protocol
+    domain_name = urlparse(url).netloc
+
+    for a_tag in page.dom.findAll("a"):
+        href = a_tag.attrs.get("href")
+        if href == "" or href is None:
+            # href empty tag
+            continue
+
+        # join the URL if it's relative (not absolute link)
+        parsed_href = urlparse(urljoin(url, href))
+        if not (parsed_href.netloc and parsed_href.scheme):
+            # not a valid URL
+            continue
+        # remove URL GET parameters, URL fragments, etc.
+        href = parsed_href.scheme + "://" + parsed_href.netloc + parsed_href.path
+        if domain_name not in href:
+            # external link
+            external_links[href] = None
+            continue
+        internal_links[href] = None
+    return list(internal_links), list(external_links)
+
+
+def _score_links(page):
+    """Score the internal links on a fetched page by where they likely lead.
+
+    A link scores the ``CONTACT_LINK_WORDS`` weights of the words in its
+    anchor text and in its url path, plus the ``CONTACT_LINK_SECTIONS``
+    bonus of the page section it is in and up to 0.5 for coming early in
+    the page.
+
+    Parameters
+    ----------
+    page : Page
+        The fetched page.
+
+    Returns
+    -------
+    scores : dict
+        Score of each internal link, the highest if it is linked more than
+        once.
+    """
+    url = page.url
+    domain_name = urlparse(url).netloc
+    a_tags = [a_tag for a_tag in page.dom.findAll("a") if a_tag.attrs.get("href")]
+    scores = dict()
+    for idx, a_tag in enumerate(a_tags):
+        parsed_href = urlparse(urljoin(url, a_tag.attrs["href"]))
+        if not (parsed_href.netloc and parsed_href.scheme):
+            continue
+        href = parsed_href.scheme + "://" + parsed_href.netloc + parsed_href.path
+        if domain_name not in href:
+            continue
+        score = _score_words(a_tag.get_text(" ")) + _score_words(parsed_href.path)
+        section = a_tag.find_parent(list(CONTACT_LINK_SECTIONS))
+        if section is not None:
+            score += CONTACT_LINK_SECTIONS[section.name]
+        score += 0.5 * (1 - idx / len(a_tags))
+        scores[href] = max(score, scores.get(href, score))
+    return scores
+
+
+def _score_words(text):
+    """Sum the ``CONTACT_LINK_WORDS`` weights of the words in ``text``."""
+    words = set(_WORD_REGEX.findall(text.lower()))
+    return sum(
+        weight
+        for prefix, weight in CONTACT_LINK_WORDS.items()
+        if any(word.startswith(prefix) for word in words)
+    )
+
+
+def _fetch_static(url, timeout=None, cache=None, scheduler=None, metrics=None):
+    """Fetch the static HTML at ``url``, through ``cache`` if given."""
+    import requests
+
+    with timed(metrics, "fetch", url):
+        if cache is not None:
+            content = cache.get(url, timeout=timeout, scheduler=scheduler)
+        else:
+            with fetch_slot(scheduler, url):
+                content = requests.get(url, timeout=timeout).content
+    count(metrics, "pages", url=url)
+    count(metrics, "bytes", len(content), url=url)
+    return content
+
+
+def _fetch_tiered(
+    url, extract, kind=None, found=bool, render="auto", render_pool=None,
+    cache=None, scheduler=None, registry=None, fingerprints=None, metrics=None,
+    stats=None, timeout=20, page=None,
+):
+    """Fetch ``url`` and extract from it, rendering JavaScript only if needed.
+
+    Parameters
+    ----------
+    url : str
+        The url to fetch.
+    extract : callable
+        Function of the fetched :class:`Page` returning the extracted result.
+    kind : str | None
+        Name of what is extracted, keying the result in ``registry``.
+        Defaults to the name of ``extract``.
+    found : callable
+        Function of the extracted result telling whether anything was found.
+    render : str
+        One of ``RENDER_MODES``.
+    render_pool : schoolparser.render.RenderPool | None
+        Browser pool to render with. Defaults to the process-wide pool.
+    cache : schoolparser.cache.ResponseCache | None
+        Optional persistent response cache for the static fetch.
+    scheduler : schoolparser.schedule.HostScheduler | None
+        Optional politeness scheduler to wait on before each fetch.
+    registry : schoolparser.cache.FetchRegistry | None
+        Optional run-level registry; if given, ``url`` is fetched and
+        extracted at most once per run and the result is shared.
+    fingerprints : schoolparser.cache.ContentFingerprints | None
+        Optional store of page fingerprints. If the visible text of the
+        static page is unchanged since the result was stored, that result is
+        returned without extracting or rendering. Pages whose static HTML
+        looks JavaScript-only are always extracted again.
+    metrics : schoolparser.metrics.Metrics | None
+        Optional metrics to record fetch, render and parse timings in.
+    stats : collections.Counter | None
+        Counter to record ``"static"`` and ``"rendered"`` page fetches in.
+    timeout : float
+        Request and render timeout in seconds.
+    page : Page | None
+        The static page at ``url``, if already fetched, e.g. by
+        :meth:`Crawler.iter_crawl`. It is then not fetched again.
+
+    Returns
+    -------
+    result : object
+        The result of ``extract`` on the static or rendered page.
+    """
+    if render not in RENDER_MODES:
+        raise ValueError(f"render must be one of {RENDER_MODES}, not {render!r}.")
+    if registry is not None:
+        return registry.get_or_compute(
+            (kind or extract.__name__, render),
+            url,
+            lambda: _fetch_tiered(
+                url, extract, kind=kind, found=found, render=render,
+                render_pool=render_pool, cache=cache, scheduler=scheduler,
+                fingerprints=fingerprints, metrics=metrics, stats=stats,
+                timeout=timeout, page=page,
+            ),
+        )
+    if stats is None:
+        stats = collections.Counter()
+
+    fingerprint = None
+    if render != "always":
+        if page is None:
+            page = Page(
+                url,
+                _fetch_static(
+                    url, timeout=timeout, cache=cache, scheduler=scheduler,
+                    metrics=metrics,
+                ),
+            )
+        with timed(metrics, "parse", url):
+            page.text
+        if fingerprints is not None and not page.is_js_only():
+            fingerprint = page.fingerprint
+            fingerprint_kind = f"{kind or extract.__name__}:{render}"
+            unchanged, result = fingerprints.get(fingerprint_kind, url, fingerprint)
+            if unchanged:
+                stats["static"] += 1
+                return result
+
+        result = extract(page)
+        if render == "never" or (found(result) and not page.is_js_only()):
+            stats["static"] += 1
+            if fingerprint is not None:
+                fingerprints.put(fingerprint_kind, url, fingerprint, result)
+            return result
 
+    if render_pool is None:
+        from schoolparser.render import get_render_pool
 
-def read_contactinfo_from_webpage(url, verbose=False):
+        render_pool = get_render_pool()
+
+    # for JAVA-Script driven websites
+    with fetch_slot(scheduler, url), timed(metrics, "render", url):
+        page = Page(url, render_pool.render(url, timeout=timeout), rendered=True)
+    count(metrics, "rendered_pages", url=url)
+    count(metrics, "bytes", len(page.content), url=url)
+    with timed(metrics, "parse", url):
+        page.text
+    stats["rendered"] += 1
+    result = extract(page)
+    if fingerprint is not None:
+        fingerprints.put(fingerprint_kind, url, fingerprint, result)
+    return result
+
+
+def find_social_media_handles(text):
+    """Find social media urls of all platforms in a single pass over ``text``.
+
+    Candidates are located with plain substring search for the platform
+    domain names, and the platform's url pattern is only matched there,
+    anchored at the ``http`` scheme preceding the domain. Text without any
+    social media domain is never scanned by a regular expression.
+
+    Parameters
+    ----------
+    text : str
+        The text to search, e.g. the decoded HTML of a page.
+
+    Returns
+    -------
+    handles : list of tuple
+        ``(platform, url)`` pairs in the order they appear in ``text``,
+        where platform is a key of ``SOCIAL_MEDIA_REGEX``.
+    """
+    candidates = []
+    for domain, platform in SOCIAL_MEDIA_DOMAINS.items():
+        position = text.find(domain)
+        while position >= 0:
+            candidates.append((position, platform))
+            position = text.find(domain, position + 1)
+    candidates.sort()
+
+    handles = []
+    end = 0
+    for position, platform in candidates:
+        if position < end:
+            # inside the previous match
+            continue
+        start = text.rfind(
+            "http", max(end, position - _SOCIAL_MEDIA_LOOKBEHIND), position
+        )
+        if start < 0:
+            continue
+        re_match = _SOCIAL_MEDIA_PATTERNS[platform].match(text, start)
+        if re_match is None or re_match.end() <= position:
+            continue
+        handles.append((platform, re_match.group()))
+        end = re_match.end()
+    return handles
+
+
+def _extract_social_media_links(page, metrics=None):
+    """Extract social media handles from a fetched :class:`Page`."""
+    with timed(metrics, "regex", page.url):
+        return [handle for _, handle in find_social_media_handles(page.text)]
+
+
+def read_contactinfo_from_webpage(
+    url,
+    verbose=False,
+    render_pool=None,
+    render="auto",
+    cache=None,
+    scheduler=None,
+    registry=None,
+    validator=None,
+    fingerprints=None,
+    metrics=None,
+    stats=None,
+    page=None,
+):
     """Read email addresses and phone numbers from a webpage.
 
     Parameters
     ----------
     url : str
         URL to search for contact information from.
+    verbose : bool
+        Verbosity.
+    render_pool : schoolparser.render.RenderPool | None
+        Browser pool used to render the webpage. Defaults to the
+        process-wide pool from :func:`schoolparser.render.get_render_pool`.
+    render : str
+        One of ``RENDER_MODES``. ``"auto"`` (default) parses the static HTML
+        first and renders the page only if no email addresses are found or
+        the page looks JavaScript-only.
+    cache : schoolparser.cache.ResponseCache | None
+        Optional persistent response cache for the static fetch.
+    scheduler : schoolparser.schedule.HostScheduler | None
+        Optional politeness scheduler, shared with other fetchers of the run,
+        that rate limits fetches per host.
+    registry : schoolparser.cache.FetchRegistry | None
+        Optional run-level registry, shared across schools, so each page is
+        fetched and parsed at most once per run.
+    validator : schoolparser.validate.EmailValidator | None
+        Email validator caching deliverability per domain. Defaults to the
+        process-wide validator from
+        :func:`schoolparser.validate.get_email_validator`.
+    fingerprints : schoolparser.cache.ContentFingerprints | None
+        Optional store of page fingerprints. Contacts of a page unchanged
+        since the last run are reused without extraction, validation or
+        rendering.
+    metrics : schoolparser.metrics.Metrics | None
+        Optional metrics to record fetch, render, parse, regex and
+        validation timings in.
+    stats : collections.Counter | None
+        Counter to record ``"static"`` and ``"rendered"`` page fetches in.
+    page : Page | None
+        The static page at ``url``, if already fetched, e.g. by
+        :meth:`Crawler.iter_crawl`.
 
     Returns
     -------
@@ -198,61 +1633,287 @@ def read_contactinfo_from_webpage(url, verbose=False):
     phone_list : list
         List of found phone numbers.
     """
-    # initiate an HTTP session
-    session = HTMLSession()
+    if verbose:
+        print(f'[*] Crawling {url}...')
 
-    # get the HTTP Response
-    response = session.get(url)
+    return _fetch_tiered(
+        url,
+        lambda page: _extract_contactinfo(page, validator=validator, metrics=metrics),
+        kind="contactinfo",
+        # office phones are in the static footer of most pages, so only
+        # emails tell whether the staff list needs JavaScript
+        found=lambda result: bool(result[0]),
+        render=render,
+        render_pool=render_pool,
+        cache=cache,
+        scheduler=scheduler,
+        registry=registry,
+        fingerprints=fingerprints,
+        metrics=metrics,
+        stats=stats,
+        timeout=20,
+        page=page,
+    )
 
-    # for JAVA-Script driven websites
-    response.html.render(timeout=20)
 
-    if verbose:
-        print(f'[*] Crawling {url}...')
+def find_emails(text, windowed=True):
+    """Find email addresses in ``text``.
 
-    # search for emails
-    email_list = set()
-    for re_match in re.finditer(EMAIL_REGEX, response.html.raw_html.decode()):
-        email_found = re_match.group()
-        if "familylink" in email_found:
-            continue
-        if not email_found.endswith('.org'):
-            continue
+    Parameters
+    ----------
+    text : str
+        The text to search, e.g. the decoded HTML of a page.
+    windowed : bool
+        If True (default), ``EMAIL_REGEX`` only runs on windows of
+        ``EMAIL_WINDOW`` characters around each ``"@"``. This finds the
+        same addresses as scanning the whole text, as long as local part
+        and domain each fit in the window, but takes time linear in the
+        length of ``text``. Scanning the whole text (``windowed=False``)
+        is quadratic on long runs of address characters without an ``"@"``,
+        e.g. in minified JavaScript.
 
-        # check email
-        is_new_account = True # False for login pages
-        try:
-            # Check that the email address is valid.
-            validation = validate_email(email_found, check_deliverability=is_new_account)
-
-            # Take the normalized form of the email address
-            # for all logic beyond this point (especially
-            # before going to a database query where equality
-            # may not take into account Unicode normalization).  
-            email_found = validation.email
-        except EmailNotValidError as e:
-            # Email is not valid.
-            # The exception message is human-readable.
-            print(str(e))
-            continue
-        email_list.add(email_found)
+    Returns
+    -------
+    emails : list of str
+        The email addresses in the order they appear in ``text``.
+    """
+    if not windowed:
+        return [re_match.group() for re_match in _EMAIL_PATTERN.finditer(text)]
+
+    emails = []
+    end = 0
+    at = text.find("@")
+    while at >= 0:
+        # every email contains an "@", so only the text around one can match
+        re_match = _EMAIL_PATTERN.search(
+            text, max(end, at - EMAIL_WINDOW), at + EMAIL_WINDOW + 1
+        )
+        if re_match is not None and re_match.start() <= at < re_match.end():
+            emails.append(re_match.group())
+            end = re_match.end()
+        at = text.find("@", max(at + 1, end))
+    return emails
+
+
+def _extract_contactinfo(page, validator=None, metrics=None):
+    """Extract email addresses and phone numbers from a fetched :class:`Page`."""
+    if validator is None:
+        validator = get_email_validator()
+    text = page.text
+
+    with timed(metrics, "regex", page.url):
+        # search for emails
+        candidates = []
+        for email_found in find_emails(text):
+            if "familylink" in email_found:
+                continue
+            if not email_found.endswith('.org'):
+                continue
+            candidates.append(email_found)
 
-    # search for phone numbers
-    phone_list = set()
-    for re_match in re.finditer(PHONE_REGEX, response.html.raw_html.decode()):
-        phone_found = re_match.group()
-        phone_list.add(phone_found)
+        # search for phone numbers
+        phone_list = set()
+        for re_match in re.finditer(PHONE_REGEX, text):
+            phone_found = re_match.group()
+            phone_list.add(phone_found)
+
+    # check emails, in one batch with a lookup per domain
+    with timed(metrics, "validation", page.url):
+        email_list = set(validator.validate(candidates).values())
+    count(metrics, "emails", len(email_list), url=page.url)
 
     return email_list, phone_list
 
 
-def _scrape_contact_from_url(url, school_emails, school_phones, verbose=False):
+ContactResult = collections.namedtuple(
+    "ContactResult", ["school", "url", "emails", "phones", "error"]
+)
+ContactResult.__doc__ = """Contact information scraped from one url of a school.
+
+``emails`` and ``phones`` are sets, empty if the url failed, in which case
+``error`` describes the failure (it is None otherwise).
+"""
+
+SCRAPE_BACKENDS = ("threads", "processes")
+
+
+def scrape_contacts(school_urls, backend="threads", n_jobs=8, verbose=False, **kwargs):
+    """Scrape contact information from many urls in parallel.
+
+    Results are yielded as soon as each url is done, in completion order,
+    so callers can store or report them while the rest are still running.
+    Closing the generator early cancels the urls not started yet. From a
+    running asyncio event loop, use :func:`scrape_contacts_async` instead.
+
+    Parameters
+    ----------
+    school_urls : iterable of tuple
+        Pairs of ``(school, url)`` to scrape.
+    backend : str
+        One of ``SCRAPE_BACKENDS``. ``"threads"`` (default) runs urls in a
+        thread pool sharing ``kwargs``. ``"processes"`` runs them in a
+        process pool, so parsing and regex matching use all cores; each
+        worker process gets its own copy of the objects in ``kwargs``
+        (render pool, cache, scheduler, registry and validator), so rate
+        limits and shared pages only apply within a process. Each worker
+        closes its render pool when it exits.
+    n_jobs : int
+        Number of urls scraped at once. -1 uses one worker per CPU.
+    verbose : bool
+        Verbosity.
+    **kwargs
+        Passed on to :func:`read_contactinfo_from_webpage`, e.g.
+        ``render_pool``, ``render``, ``cache``, ``scheduler``, ``registry``,
+        ``validator``, ``fingerprints``, ``metrics`` and ``stats``.
+
+    Yields
+    ------
+    result : ContactResult
+        The contacts found at one url, or the error it failed with.
+    """
+    if backend not in SCRAPE_BACKENDS:
+        raise ValueError(
+            f"backend must be one of {SCRAPE_BACKENDS}, not {backend!r}."
+        )
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    if backend == "processes":
+        from concurrent.futures import ProcessPoolExecutor
+
+        # a worker's fetch counts and metrics are sent back and merged into
+        # ``stats`` and ``metrics``
+        stats = kwargs.pop("stats", None)
+        metrics = kwargs.pop("metrics", None)
+        executor = ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_contact_worker,
+            initargs=(verbose, kwargs),
+        )
+        with executor:
+            futures = [
+                executor.submit(_scrape_contact_in_worker, school, url)
+                for school, url in school_urls
+            ]
+            try:
+                for future in as_completed(futures):
+                    result, worker_stats, worker_metrics = future.result()
+                    if stats is not None:
+                        stats.update(worker_stats)
+                    if metrics is not None:
+                        metrics.merge(worker_metrics)
+                    yield result
+            finally:
+                for future in futures:
+                    future.cancel()
+        return
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [
+            executor.submit(_scrape_contact, school, url, verbose, kwargs)
+            for school, url in school_urls
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+async def scrape_contacts_async(school_urls, n_jobs=8, verbose=False, **kwargs):
+    """Scrape contact information from many urls, from a running event loop.
+
+    The asyncio counterpart of :func:`scrape_contacts`: urls are scraped in
+    a pool of ``n_jobs`` threads, as fetching and rendering block, while
+    the caller's event loop keeps running and awaits each result. Closing
+    the generator early cancels the urls not started yet.
+
+    Parameters
+    ----------
+    school_urls : iterable of tuple
+        Pairs of ``(school, url)`` to scrape.
+    n_jobs : int
+        Number of urls scraped at once. -1 uses one worker per CPU.
+    verbose : bool
+        Verbosity.
+    **kwargs
+        Passed on to :func:`read_contactinfo_from_webpage`, see
+        :func:`scrape_contacts`.
+
+    Yields
+    ------
+    result : ContactResult
+        The contacts found at one url, or the error it failed with.
+    """
+    import asyncio
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    executor = ThreadPoolExecutor(max_workers=n_jobs)
+    futures = [
+        executor.submit(_scrape_contact, school, url, verbose, kwargs)
+        for school, url in school_urls
+    ]
+    pending = {asyncio.wrap_future(future) for future in futures}
     try:
-        email_list, phone_list = read_contactinfo_from_webpage(url, verbose=verbose)
-        # store in dictionary
-        school_emails[url] = email_list
-        school_phones[url] = phone_list
-    except Exception as e:
-        print(f'Problematic url: ', url)
-    
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        # the executor's own futures are cancelled, as cancelling their
+        # asyncio wrappers only takes effect once the loop runs again
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _scrape_contact(school, url, verbose, kwargs):
+    """Scrape one url into a :class:`ContactResult`, catching any error."""
+    metrics = kwargs.get("metrics")
+    with for_school(metrics, school):
+        try:
+            email_list, phone_list = read_contactinfo_from_webpage(
+                url, verbose=verbose, **kwargs
+            )
+        except Exception as e:
+            count(metrics, "errors", url=url)
+            return ContactResult(
+                school, url, set(), set(), f"{type(e).__name__}: {e}"
+            )
+    return ContactResult(school, url, email_list, phone_list, None)
+
+
+# arguments of the process backend of ``scrape_contacts``, set once per worker
+_worker_verbose = False
+_worker_kwargs = dict()
+
+
+def _init_contact_worker(verbose, kwargs):
+    from multiprocessing.util import Finalize
+
+    from schoolparser.render import RenderPool
+
+    global _worker_verbose, _worker_kwargs
+    kwargs = dict(kwargs)
+    if kwargs.get("render_pool") is None:
+        kwargs["render_pool"] = RenderPool()
+    # atexit handlers do not run in pool workers, so the browsers of the
+    # worker's render pool are closed by a multiprocessing finalizer
+    Finalize(kwargs["render_pool"], kwargs["render_pool"].close, exitpriority=10)
+    _worker_verbose = verbose
+    _worker_kwargs = kwargs
+
 
+def _scrape_contact_in_worker(school, url):
+    stats = collections.Counter()
+    metrics = Metrics()
+    result = _scrape_contact(
+        school, url, _worker_verbose,
+        dict(_worker_kwargs, stats=stats, metrics=metrics),
+    )
+    return result, stats, metrics
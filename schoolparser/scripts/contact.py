@@ -1,11 +1,17 @@
 import collections
 from pathlib import Path
 
-from joblib import Parallel, delayed
 from tqdm import tqdm
 
-from schoolparser.base import SCHOOL_SOCIAL_URLS
-from schoolparser.scrape import _scrape_contact_from_url
+from schoolparser.base import SCHOOL_SOCIAL_URLS, SCHOOL_URLS, configure_logging
+from schoolparser.cache import ContentFingerprints, FetchRegistry, ResponseCache
+from schoolparser.checkpoint import Checkpoint
+from schoolparser.metrics import Metrics, for_school
+from schoolparser.render import RenderPool
+from schoolparser.schedule import HostScheduler, interleave_by_host
+from schoolparser.scrape import Crawler, scrape_contacts
+from schoolparser.store import ResultStore
+from schoolparser.validate import EmailValidator
 from schoolparser.write import scraped_emails_to_df
 
 
@@ -14,10 +20,36 @@ def main():
 
     Operates on school URLs that have been manually added.
     """
+    configure_logging()
+
     # where to save output excel file to
     datadir = Path("/Users/adam2392/Downloads/")
     fname = "school_tables_new.xls"
     overwrite = False
+    # whether to export the stored emails to the excel file
+    export_excel = True
+
+    # cache of downloaded pages, revalidated on every run
+    cache = ResponseCache(Path.home() / ".cache" / "schoolparser")
+
+    # rate limit requests against each district server
+    scheduler = HostScheduler(rate=2.0, max_concurrency=16)
+
+    # pages shared by several schools are only scraped once
+    registry = FetchRegistry()
+
+    # pages unchanged since the last run reuse the contacts found then
+    fingerprints = ContentFingerprints(Path.home() / ".cache" / "schoolparser")
+
+    # time spent per stage, host and school
+    metrics = Metrics()
+
+    # email domains are checked once and remembered for a week
+    validator = EmailValidator(
+        ttl=7 * 86400,
+        cache_path=Path.home() / ".cache" / "schoolparser" / "email_domains.json",
+        metrics=metrics,
+    )
 
     if not datadir.exists():
         raise RuntimeError(f'Please set the output directory for AAMPLIFY correctly. '
@@ -27,22 +59,101 @@ def main():
     emails = collections.defaultdict(dict)
     phones = collections.defaultdict(dict)
 
-    # go through each school and scrape contact data
-    _schools = []
-    _urls = []
-    for school, urls in SCHOOL_SOCIAL_URLS.items():
-        _schools.extend([school] * len(urls))
-        _urls.extend(urls)
-
-    # run parallel scraping
-    results = Parallel()(
-        delayed(_scrape_contact_from_url)(url, emails[_schools[i]], phones[_schools[i]], verbose=True)
-        for i, url in enumerate(tqdm(_urls))
+    # urls finished by an earlier run that died partway are not scraped again
+    checkpoint = Checkpoint(Path(datadir) / "contact_checkpoint.sqlite")
+    done = checkpoint.load_results("contact")
+    for (school, url), (email_list, phone_list) in done.items():
+        emails[school][url] = set(email_list)
+        phones[school][url] = set(phone_list)
+    if done:
+        print(f"Resuming from checkpoint with {len(done)} urls already scraped.")
+
+    # go through each school and scrape contact data, alternating hosts
+    _school_urls = interleave_by_host(
+        [
+            (school, url)
+            for school, urls in SCHOOL_SOCIAL_URLS.items()
+            for url in urls
+            if (school, url) not in done
+        ],
+        key=lambda school_url: school_url[1],
+    )
+
+    # run parallel scraping, reusing the same browsers for every url
+    render_stats = collections.Counter()
+    with RenderPool(n_browsers=2) as render_pool:
+        results = scrape_contacts(
+            _school_urls, backend="threads", n_jobs=16, verbose=True,
+            render_pool=render_pool, cache=cache, scheduler=scheduler,
+            registry=registry, validator=validator, fingerprints=fingerprints,
+            metrics=metrics, stats=render_stats,
+        )
+        for result in tqdm(results, total=len(_school_urls)):
+            checkpoint.save_result(
+                "contact", result.school, result.url,
+                (result.emails, result.phones), error=result.error,
+            )
+            if result.error is not None:
+                print(f'Problematic url: {result.url} ({result.error})')
+                continue
+            emails[result.school][result.url] = result.emails
+            phones[result.school][result.url] = result.phones
+
+    # schools without hand-curated urls are crawled from their homepage,
+    # following the links most likely to lead to staff contacts first
+    curated = {school.lower() for school in SCHOOL_SOCIAL_URLS}
+    discovered = checkpoint.load_done("contact")
+    crawler = Crawler(
+        max_concurrency=4, max_per_host=2, cache=cache, scheduler=scheduler,
+        metrics=metrics,
     )
+    for school, url in SCHOOL_URLS.items():
+        if school.lower() in curated or school in discovered:
+            continue
+        with for_school(metrics, school):
+            school_emails, school_phones, report = crawler.discover_contacts(
+                url, validator=validator, verbose=False, checkpoint=checkpoint,
+                school=school,
+            )
+        crawler.reset()
+        for page_url, email_list in school_emails.items():
+            phone_list = school_phones.get(page_url, set())
+            checkpoint.save_result(
+                "contact", school, page_url, (email_list, phone_list)
+            )
+            emails[school][page_url] = email_list
+            phones[school][page_url] = phone_list
+        checkpoint.mark_done("contact", school, report)
+        print(f"{school}: {report['contact_pages']} contact pages in "
+              f"{report['pages_fetched']} fetches, the first after "
+              f"{report['fetches_to_first_contact']}.")
+    print(f"Rendered {render_stats['rendered']} of "
+          f"{sum(render_stats.values())} pages with a headless browser.")
+    print(f"Response cache: {dict(cache.stats)}")
+    print(f"Email validation: {dict(validator.stats)}")
+    print(f"Page changes since last run: {dict(fingerprints.stats)}")
+    fingerprints.close()
+    validator.close()
 
     # create data frame of output
     output_fpath = Path(datadir) / fname
-    school_df = scraped_emails_to_df(emails, output_fpath, overwrite=overwrite)
+    store = ResultStore(Path(datadir) / "school_emails.sqlite")
+    if not len(store) and output_fpath.exists():
+        # the history written before the store existed is imported once
+        n_imported = store.import_excel(output_fpath)
+        print(f'Imported {n_imported} rows of {output_fpath} into the store.')
+    school_df = scraped_emails_to_df(
+        emails, output_fpath if export_excel else None, overwrite=overwrite,
+        store=store, metrics=metrics,
+    )
+    store.close()
+
+    print(metrics.summary())
+    metrics.dump_json(Path(datadir) / "contact_metrics.json")
+
+    # the run is complete, so the next one starts over
+    checkpoint.clear()
+    checkpoint.close()
 
     # check if any emails overlap with what we already have
     # school_df = pd.read_excel(output_fpath, index_col=None)
@@ -1,8 +1,14 @@
 import collections
+from pathlib import Path
 
-import socials
+import colorama
 
-from schoolparser.base import SCHOOL_URLS
+from schoolparser.base import SCHOOL_URLS, configure_logging
+from schoolparser.cache import ContentFingerprints, FetchRegistry, ResponseCache
+from schoolparser.checkpoint import Checkpoint
+from schoolparser.metrics import Metrics, for_school
+from schoolparser.render import RenderPool
+from schoolparser.schedule import HostScheduler
 from schoolparser.scrape import Crawler
 
 
@@ -11,39 +17,81 @@ def main():
 
     Operates on school URLs that have been manually added.
     """
+    colorama.init()
+    configure_logging()
+
     MAX_URLS = 50
+    MAX_CONCURRENCY = 10
+    MAX_PER_HOST = 4
     verbose = True
 
-    crawler = Crawler()
+    render_pool = RenderPool(n_browsers=2)
+    cache = ResponseCache(Path.home() / ".cache" / "schoolparser")
+    scheduler = HostScheduler(rate=2.0, max_concurrency=MAX_CONCURRENCY)
+    fingerprints = ContentFingerprints(Path.home() / ".cache" / "schoolparser")
+    metrics = Metrics()
+    crawler = Crawler(
+        max_concurrency=MAX_CONCURRENCY,
+        max_per_host=MAX_PER_HOST,
+        render_pool=render_pool,
+        cache=cache,
+        scheduler=scheduler,
+        registry=FetchRegistry(),
+        fingerprints=fingerprints,
+        metrics=metrics,
+        link_graph=True,
+    )
     emails = collections.defaultdict(dict)
     phones = collections.defaultdict(dict)
+    render_stats = collections.Counter()
+
+    # schools and urls finished by an earlier run that died partway are
+    # not scraped again
+    checkpoint = Checkpoint(
+        Path.home() / ".cache" / "schoolparser" / "social_checkpoint.sqlite"
+    )
 
     """ SCRAPE SOCIAL HANDLES """
-    social_handles = dict()
+    social_handles = checkpoint.load_done("social")
+    HANDLES = ["twitter", "instagram", "linkedin", "facebook"]
     for school_id, url in SCHOOL_URLS.items():
-        print(f"Looking thru {url} now...")
-        crawler.crawl(url, MAX_URLS, verbose)
-
-        # get results
-        all_school_urls = crawler.get_urls()
-        internal_urls = all_school_urls["internal_urls"]
-
-        HANDLES = ["twitter", "instagram", "linkedin", "facebook"]
-        social_handles[school_id] = dict.fromkeys(HANDLES)
-        for url in internal_urls:
-            handle_list = crawler.get_social_media_links(url)
-            if len(handle_list) > 0:
-                handle_dict = socials.extract(handle_list).get_matches_per_platform()
-                social_handles[school_id].update(**handle_dict)
-                if all(key in social_handles[school_id].keys() for key in HANDLES):
-                    break
+        if school_id in social_handles:
+            print(f"Already looked thru {url}.")
+            continue
+        with for_school(metrics, school_id):
+            print(f"Looking thru {url} now...")
+            # stops crawling the school once every platform has a handle
+            handle_dict = crawler.discover_social_media(
+                url,
+                MAX_URLS,
+                platforms=HANDLES,
+                verbose=verbose,
+                stats=render_stats,
+                checkpoint=checkpoint,
+                school=school_id,
+            )
+            social_handles[school_id] = dict.fromkeys(HANDLES)
+            social_handles[school_id].update(**handle_dict)
+            checkpoint.mark_done("social", school_id, social_handles[school_id])
 
         # reset crawler
         crawler.reset()
 
         # print(all_school_urls)
         # break
+    render_pool.close()
+    print(f"Rendered {render_stats['rendered']} of "
+          f"{render_stats['static'] + render_stats['rendered']} pages with a "
+          f"headless browser, cancelled {render_stats['cancelled']} searches.")
+    print(f"Response cache: {dict(cache.stats)}")
+    print(f"Page changes since last run: {dict(fingerprints.stats)}")
+    fingerprints.close()
     print(social_handles)
+    print(metrics.summary())
+
+    # the run is complete, so the next one starts over
+    checkpoint.clear()
+    checkpoint.close()
 
 
 if __name__ == "__main__":
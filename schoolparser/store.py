@@ -0,0 +1,312 @@
+import datetime
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+# the columns read back from an exported file
+_ANNOTATED_COLUMNS = ("school", "url", "email", "Owner", "Notes")
+
+
+def _isoformat(date):
+    """Format ``date`` as stored, so stored dates compare as strings."""
+    return pd.Timestamp(date).to_pydatetime().isoformat(
+        sep=" ", timespec="microseconds"
+    )
+
+
+def _annotation(value):
+    """Return a hand-filled ``Owner`` or ``Notes`` cell as stored."""
+    return "" if pd.isna(value) else str(value)
+
+
+def _fpath_key(fpath):
+    """Return the key of an exported file in the store."""
+    return str(Path(fpath).resolve())
+
+
+class ResultStore(object):
+    """Persistent, append-only store of scraped email addresses.
+
+    Emails are kept in a SQLite database with a unique index on
+    ``(school, url, email)``, so appending a run only writes the rows that
+    are new and never rereads earlier runs. Each row keeps the date it was
+    first scraped and the ``Owner`` and ``Notes`` filled in by hand for
+    outreach tracking.
+
+    The store is the history: an Excel file written before it existed is
+    imported once with :meth:`import_excel`, and exporting with
+    :meth:`to_excel` is optional. Annotations edited in an exported file
+    are read back on the next export, and only if the file changed since.
+
+    Parameters
+    ----------
+    fpath : str | pathlib.Path
+        Path of the SQLite database file.
+    """
+
+    def __init__(self, fpath):
+        self.fpath = Path(fpath)
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.fpath), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS emails ("
+                "school TEXT NOT NULL, url TEXT NOT NULL, email TEXT NOT NULL, "
+                "date TEXT NOT NULL, owner TEXT NOT NULL DEFAULT '', "
+                "notes TEXT NOT NULL DEFAULT '')"
+            )
+            # stores created before annotations were kept
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(emails)")
+            }
+            for column in ("owner", "notes"):
+                if column not in columns:
+                    self._conn.execute(
+                        f"ALTER TABLE emails ADD COLUMN {column} "
+                        "TEXT NOT NULL DEFAULT ''"
+                    )
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS emails_school_url_email "
+                "ON emails (school, url, email)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS emails_date ON emails (date)"
+            )
+            # modification time of each exported file, when last synced
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS exports (fpath TEXT PRIMARY KEY, "
+                "mtime INTEGER NOT NULL)"
+            )
+
+    def __len__(self):
+        with self._lock:
+            (n_rows,) = self._conn.execute("SELECT COUNT(*) FROM emails").fetchone()
+        return n_rows
+
+    def add(self, emails, date=None):
+        """Append scraped emails, skipping those already stored.
+
+        Parameters
+        ----------
+        emails : dict
+            Emails keyed by school, then by url, as collected by
+            ``scripts/contact.py``.
+        date : datetime.datetime | None
+            Date of the run. Defaults to now.
+
+        Returns
+        -------
+        n_added : int
+            Number of new ``(school, url, email)`` rows.
+        """
+        if date is None:
+            date = datetime.datetime.now()
+        date = _isoformat(date)
+        rows = [
+            (school, url, email, date)
+            for school, url_list in emails.items()
+            for url, email_list in url_list.items()
+            for email in email_list
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO emails (school, url, email, date) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            n_added = self._conn.total_changes - before
+        return n_added
+
+    def import_excel(self, fpath):
+        """Import the rows and annotations of an Excel file into an empty store.
+
+        This migrates the history written before the store existed, once.
+        Afterwards the store is the history and the file is only read back
+        for its annotations, see :meth:`read_annotations`.
+
+        Parameters
+        ----------
+        fpath : str | pathlib.Path
+            Excel file with ``school``, ``url`` and ``email`` columns, and
+            optionally ``date``, ``Owner`` and ``Notes``.
+
+        Returns
+        -------
+        n_added : int
+            Number of ``(school, url, email)`` rows imported.
+        """
+        n_rows = len(self)
+        if n_rows:
+            raise ValueError(
+                f"Excel files can only be imported into an empty store, "
+                f"{self.fpath} has {n_rows} rows."
+            )
+        fpath = Path(fpath)
+        old_df = pd.read_excel(fpath, index_col=None)
+        now = _isoformat(datetime.datetime.now())
+        rows = []
+        for row in old_df.to_dict("records"):
+            if any(pd.isna(row.get(key)) for key in ("school", "url", "email")):
+                continue
+            date = row.get("date")
+            date = now if pd.isna(date) else _isoformat(pd.Timestamp(date))
+            owner, notes = (_annotation(row.get(key)) for key in ("Owner", "Notes"))
+            rows.append(
+                (str(row["school"]), str(row["url"]), str(row["email"]), date,
+                 owner, notes)
+            )
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO emails VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            n_added = self._conn.total_changes - before
+            self._record_mtime(fpath)
+        return n_added
+
+    def read_annotations(self, fpath):
+        """Read back the ``Owner`` and ``Notes`` edited in an exported file.
+
+        The file is only read if it was modified since it was last exported
+        or read, and only its annotation columns are read.
+
+        Parameters
+        ----------
+        fpath : str | pathlib.Path
+            Excel file exported with :meth:`to_excel`.
+
+        Returns
+        -------
+        n_updated : int
+            Number of rows whose annotations changed.
+        """
+        fpath = Path(fpath)
+        if not fpath.exists():
+            return 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime FROM exports WHERE fpath = ?", (_fpath_key(fpath),)
+            ).fetchone()
+        if row is not None and row[0] == fpath.stat().st_mtime_ns:
+            return 0
+
+        annotated_df = pd.read_excel(
+            fpath,
+            index_col=None,
+            usecols=lambda column: column in _ANNOTATED_COLUMNS,
+            dtype=object,
+        )
+        rows = []
+        for row in annotated_df.to_dict("records"):
+            if any(pd.isna(row.get(key)) for key in ("school", "url", "email")):
+                continue
+            owner, notes = (_annotation(row.get(key)) for key in ("Owner", "Notes"))
+            rows.append(
+                (owner, notes, str(row["school"]), str(row["url"]),
+                 str(row["email"]), owner, notes)
+            )
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "UPDATE emails SET owner = ?, notes = ? "
+                "WHERE school = ? AND url = ? AND email = ? "
+                "AND (owner != ? OR notes != ?)",
+                rows,
+            )
+            n_updated = self._conn.total_changes - before
+            self._record_mtime(fpath)
+        return n_updated
+
+    def query(self, school=None, since=None, until=None, annotations=False):
+        """Return stored emails as a DataFrame.
+
+        Parameters
+        ----------
+        school : str | list of str | None
+            Only return emails of this school (or these schools).
+        since : datetime.datetime | None
+            Only return emails first scraped at or after this date.
+        until : datetime.datetime | None
+            Only return emails first scraped before this date.
+        annotations : bool
+            Whether to also return the ``Owner`` and ``Notes`` columns.
+
+        Returns
+        -------
+        school_df : pd.DataFrame
+            Dataframe of ``school``, ``url``, ``email`` and ``date``, in the
+            order the emails were stored.
+        """
+        clauses, params = [], []
+        if school is not None:
+            schools = [school] if isinstance(school, str) else list(school)
+            clauses.append(f"school IN ({', '.join('?' * len(schools))})")
+            params.extend(schools)
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(_isoformat(since))
+        if until is not None:
+            clauses.append("date < ?")
+            params.append(_isoformat(until))
+        columns = ["school", "url", "email", "date"]
+        if annotations:
+            columns += ["owner", "notes"]
+        sql = f"SELECT {', '.join(columns)} FROM emails"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        school_df = pd.DataFrame(rows, columns=columns)
+        school_df["date"] = pd.to_datetime(school_df["date"])
+        return school_df.rename(columns={"owner": "Owner", "notes": "Notes"})
+
+    def to_excel(self, output_fpath, **query):
+        """Export stored emails to an Excel file.
+
+        If the file was exported before, the ``Owner`` and ``Notes`` edited
+        in it since are read back first (see :meth:`read_annotations`). The
+        file is replaced only once the export is written.
+
+        Parameters
+        ----------
+        output_fpath : str | pathlib.Path
+            The Excel file to write.
+        **query
+            Filters passed on to :meth:`query`.
+
+        Returns
+        -------
+        school_df : pd.DataFrame
+            The exported dataframe, with the ``Owner`` and ``Notes`` columns
+            for outreach tracking.
+        """
+        output_fpath = Path(output_fpath)
+        self.read_annotations(output_fpath)
+        school_df = self.query(annotations=True, **query)
+        tmp_fpath = output_fpath.with_name(
+            f".{output_fpath.stem}.tmp{output_fpath.suffix}"
+        )
+        school_df.to_excel(tmp_fpath, index=None)
+        os.replace(str(tmp_fpath), str(output_fpath))
+        with self._lock, self._conn:
+            self._record_mtime(output_fpath)
+        return school_df
+
+    def _record_mtime(self, fpath):
+        """Record the modification time of ``fpath``, holding the lock."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO exports VALUES (?, ?)",
+            (_fpath_key(fpath), fpath.stat().st_mtime_ns),
+        )
+
+    def close(self):
+        """Close the store database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,245 @@
+import collections
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from schoolparser.base import logger
+from schoolparser.metrics import timed
+
+
+def dns_deliverability(domain):
+    """Check that ``domain`` accepts email, using its DNS MX (or A) records.
+
+    Parameters
+    ----------
+    domain : str
+        The ASCII domain name of an email address.
+
+    Raises
+    ------
+    email_validator.EmailUndeliverableError
+        If the domain does not exist or does not accept email.
+    """
+    from email_validator.deliverability import validate_email_deliverability
+
+    validate_email_deliverability(domain, domain)
+
+
+class EmailValidator(object):
+    """Deduplicating email validator with a per-domain deliverability cache.
+
+    Every distinct email address is syntax-checked once per run, and its
+    domain's deliverability is looked up once per ``ttl``. Domains of a
+    batch of emails are resolved concurrently. Many schools share a domain
+    such as sfusd.edu, so a run costs one lookup per domain instead of one
+    per email occurrence.
+
+    Parameters
+    ----------
+    resolver : callable
+        Function of an ASCII domain name that raises
+        ``email_validator.EmailUndeliverableError`` if the domain does not
+        accept email. Defaults to the DNS lookup :func:`dns_deliverability`.
+        Pass a stub for offline use.
+    ttl : float
+        Seconds a domain lookup is cached for.
+    cache_path : str | pathlib.Path | None
+        Optional JSON file to persist domain lookups in across runs.
+    max_workers : int
+        Maximum number of concurrent domain lookups.
+    metrics : schoolparser.metrics.Metrics | None
+        Optional metrics to record the latency of domain lookups in, as the
+        ``"dns"`` stage. Not kept when the validator is pickled.
+
+    Attributes
+    ----------
+    stats : collections.Counter
+        Counts of distinct ``"emails"`` validated, domain ``"lookups"``
+        made and domain lookups served from the ``"cached"`` results.
+    """
+
+    def __init__(
+        self,
+        resolver=dns_deliverability,
+        ttl=86400,
+        cache_path=None,
+        max_workers=8,
+        metrics=None,
+    ):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.cache_path = None if cache_path is None else Path(cache_path)
+        self.max_workers = max_workers
+        self.metrics = metrics
+        self.stats = collections.Counter()
+
+        # email -> (normalized email, domain) or None if the syntax is invalid
+        self._emails = dict()
+        # domain -> (error message or None, time checked)
+        self._domains = dict()
+        self._pending = dict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+        if self.cache_path is not None and self.cache_path.exists():
+            with open(self.cache_path) as fin:
+                self._domains = {
+                    domain: tuple(result) for domain, result in json.load(fin).items()
+                }
+
+    def __getstate__(self):
+        with self._lock:
+            domains = dict(self._domains)
+        return {
+            "resolver": self.resolver,
+            "ttl": self.ttl,
+            "cache_path": self.cache_path,
+            "max_workers": self.max_workers,
+            "domains": domains,
+        }
+
+    def __setstate__(self, state):
+        domains = state.pop("domains")
+        self.__init__(**state)
+        self._domains.update(domains)
+
+    def validate(self, emails):
+        """Validate a batch of email addresses.
+
+        Parameters
+        ----------
+        emails : iterable of str
+            Candidate email addresses, possibly with repeats.
+
+        Returns
+        -------
+        valid_emails : dict
+            The normalized form of each valid, deliverable candidate, keyed
+            by the candidate as given.
+        """
+        candidates = dict()
+        for email in emails:
+            if email not in candidates:
+                candidates[email] = self._check_syntax(email)
+
+        domains = {parsed[1] for parsed in candidates.values() if parsed is not None}
+        errors = self._check_domains(domains)
+
+        valid_emails = dict()
+        for email, parsed in candidates.items():
+            if parsed is None:
+                continue
+            normalized, domain = parsed
+            if errors[domain] is None:
+                valid_emails[email] = normalized
+        return valid_emails
+
+    def save(self):
+        """Write the domain lookups to ``cache_path``, if set."""
+        if self.cache_path is None:
+            return
+        with self._lock:
+            domains = dict(self._domains)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path, "w") as fout:
+            json.dump(domains, fout)
+
+    def close(self):
+        """Save the domain lookups and stop the lookup threads."""
+        self.save()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _check_syntax(self, email):
+        with self._lock:
+            if email in self._emails:
+                return self._emails[email]
+        from email_validator import EmailNotValidError, validate_email
+
+        try:
+            validation = validate_email(email, check_deliverability=False)
+            # Take the normalized form of the email address
+            # for all logic beyond this point (especially
+            # before going to a database query where equality
+            # may not take into account Unicode normalization).
+            parsed = (validation.email, validation.ascii_domain or validation.domain)
+        except EmailNotValidError as e:
+            # Email is not valid.
+            # The exception message is human-readable.
+            print(str(e))
+            parsed = None
+        with self._lock:
+            self._emails[email] = parsed
+            self.stats["emails"] += 1
+        return parsed
+
+    def _check_domains(self, domains):
+        """Return the deliverability error (or None) of each domain."""
+        now = time.time()
+        futures = dict()
+        owned = []
+        with self._lock:
+            for domain in domains:
+                result = self._domains.get(domain)
+                if result is not None and now - result[1] < self.ttl:
+                    self.stats["cached"] += 1
+                    futures[domain] = result[0]
+                elif domain in self._pending:
+                    futures[domain] = self._pending[domain]
+                else:
+                    future = self._pending[domain] = Future()
+                    futures[domain] = future
+                    owned.append(domain)
+            if owned and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        for domain in owned:
+            self._executor.submit(self._lookup, domain, futures[domain])
+
+        return {
+            domain: future.result() if isinstance(future, Future) else future
+            for domain, future in futures.items()
+        }
+
+    def _lookup(self, domain, future):
+        from email_validator import EmailUndeliverableError
+
+        known = True
+        try:
+            with timed(self.metrics, "dns"):
+                self.resolver(domain)
+            error = None
+        except EmailUndeliverableError as e:
+            error = str(e)
+            print(error)
+        except Exception as e:
+            # e.g. a DNS timeout, which says nothing about the domain, so the
+            # email is kept and the domain is looked up again next time
+            logger.warning(f"Could not check deliverability of {domain}: {e}")
+            error = None
+            known = False
+        with self._lock:
+            if known:
+                self._domains[domain] = (error, time.time())
+            self._pending.pop(domain, None)
+            self.stats["lookups"] += 1
+        future.set_result(error)
+
+
+_email_validator = None
+_email_validator_lock = threading.Lock()
+
+
+def get_email_validator():
+    """Return the process-wide default :class:`EmailValidator`.
+
+    It resolves domains over DNS and caches them in memory only.
+    """
+    global _email_validator
+    with _email_validator_lock:
+        if _email_validator is None:
+            _email_validator = EmailValidator()
+    return _email_validator
@@ -0,0 +1,280 @@
+import collections
+import hashlib
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from schoolparser.base import normalize_url
+
+# adds written to the on-disk set between commits
+_COMMIT_EVERY = 1000
+
+# fingerprints added to a host since its last merge, at least, before they
+# are merged into its sorted array
+_MIN_BUFFER = 64
+
+
+def url_fingerprint(url):
+    """Return the host and a 64-bit fingerprint of the normalized ``url``.
+
+    Parameters
+    ----------
+    url : str
+        The url, normalized with :func:`schoolparser.base.normalize_url`.
+
+    Returns
+    -------
+    host : str
+        The lower-cased host of the url, its partition in a
+        :class:`VisitedStore`.
+    fingerprint : int
+        Signed 64-bit BLAKE2b digest of the normalized url.
+    """
+    url = normalize_url(url)
+    digest = hashlib.blake2b(url.encode(errors="replace"), digest_size=8).digest()
+    return urlsplit(url).netloc, int.from_bytes(digest, "big", signed=True)
+
+
+class BloomFilter(object):
+    """Bloom filter over 64-bit fingerprints.
+
+    Answers whether a fingerprint may have been added (with a false
+    positive rate of about ``error_rate`` up to ``capacity`` fingerprints)
+    or was certainly not added. Its size is fixed up front at about
+    ``1.44 * log2(1 / error_rate)`` bits per fingerprint of ``capacity``.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of fingerprints the filter is sized for.
+    error_rate : float
+        False positive rate at ``capacity``.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.n_bits + 7) // 8)
+
+    def __contains__(self, fingerprint):
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(fingerprint)
+        )
+
+    def add(self, fingerprint):
+        """Add a fingerprint."""
+        for position in self._positions(fingerprint):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def clear(self):
+        """Remove all fingerprints."""
+        self._bits = bytearray(len(self._bits))
+
+    def _positions(self, fingerprint):
+        # double hashing with the two 32-bit halves of the fingerprint
+        low = fingerprint & 0xFFFFFFFF
+        high = (fingerprint >> 32) & 0xFFFFFFFF | 1
+        return [(low + i * high) % self.n_bits for i in range(self.n_hashes)]
+
+
+class _Partition(object):
+    """Fingerprints of one host: a sorted int64 array and a buffer of new ones.
+
+    The buffer is merged into the array once it holds an eighth of it, so
+    a fingerprint costs about 8 bytes and merges take amortized
+    logarithmic time.
+    """
+
+    __slots__ = ("sorted", "buffer")
+
+    def __init__(self):
+        self.sorted = np.zeros(0, dtype=np.int64)
+        self.buffer = set()
+
+    def __contains__(self, fingerprint):
+        if fingerprint in self.buffer:
+            return True
+        idx = np.searchsorted(self.sorted, fingerprint)
+        return idx < len(self.sorted) and self.sorted[idx] == fingerprint
+
+    def add(self, fingerprint):
+        self.buffer.add(fingerprint)
+        if len(self.buffer) >= max(_MIN_BUFFER, len(self.sorted) >> 3):
+            new = np.fromiter(self.buffer, dtype=np.int64, count=len(self.buffer))
+            self.sorted = np.sort(np.concatenate([self.sorted, new]))
+            self.buffer = set()
+
+
+class VisitedStore(object):
+    """Memory-compact set of visited urls, partitioned per host.
+
+    Urls are normalized (see :func:`schoolparser.base.normalize_url`) and
+    kept as 64-bit fingerprints, so equivalent spellings of a url count as
+    visited once and memory does not grow with url length. The urls
+    themselves cannot be listed back.
+
+    In memory, fingerprints are kept in one sorted numpy array per host,
+    about 8 bytes per url. With ``fpath``,
+    they are kept in a SQLite database instead, with an optional Bloom
+    filter in front of it, so memory is fixed by ``bloom_capacity`` and
+    urls never seen before are answered without a disk lookup.
+
+    Parameters
+    ----------
+    fpath : str | pathlib.Path | None
+        Path of the SQLite database file of the on-disk set. None (default)
+        keeps the set in memory.
+    bloom_capacity : int | None
+        Number of urls the Bloom filter in front of the set is sized for.
+        None (default) does not use a Bloom filter.
+    error_rate : float
+        False positive rate of the Bloom filter at ``bloom_capacity`` urls.
+
+    Attributes
+    ----------
+    stats : collections.Counter
+        Counts of ``"added"`` urls and of ``"seen"`` urls already in the
+        set, and of lookups answered by the ``"bloom"`` filter alone.
+    """
+
+    def __init__(self, fpath=None, bloom_capacity=None, error_rate=0.01):
+        self.fpath = None if fpath is None else Path(fpath)
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self.stats = collections.Counter()
+
+        self._lock = threading.Lock()
+        self._bloom = None
+        if bloom_capacity is not None:
+            self._bloom = BloomFilter(bloom_capacity, error_rate)
+        self._hosts = collections.defaultdict(_Partition)
+        self._counts = collections.Counter()
+        self._conn = None
+        self._pending = 0
+        if self.fpath is not None:
+            self.fpath.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.fpath), check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS visited ("
+                    "host TEXT NOT NULL, fingerprint INTEGER NOT NULL, "
+                    "PRIMARY KEY (host, fingerprint)) WITHOUT ROWID"
+                )
+            rows = self._conn.execute(
+                "SELECT host, COUNT(*) FROM visited GROUP BY host"
+            ).fetchall()
+            self._counts.update(dict(rows))
+            if self._bloom is not None:
+                for (fingerprint,) in self._conn.execute(
+                    "SELECT fingerprint FROM visited"
+                ):
+                    self._bloom.add(fingerprint)
+
+    def __getstate__(self):
+        # an in-memory set unpickles empty, an on-disk one reopens its database
+        if self._conn is not None:
+            with self._lock:
+                self._conn.commit()
+        return {
+            "fpath": self.fpath,
+            "bloom_capacity": self.bloom_capacity,
+            "error_rate": self.error_rate,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+    def __contains__(self, url):
+        host, fingerprint = url_fingerprint(url)
+        with self._lock:
+            return self._contains(host, fingerprint)
+
+    def add(self, url):
+        """Add ``url`` to the set.
+
+        Parameters
+        ----------
+        url : str
+            The visited url.
+
+        Returns
+        -------
+        added : bool
+            Whether the url was new, i.e. not in the set before.
+        """
+        host, fingerprint = url_fingerprint(url)
+        with self._lock:
+            if self._contains(host, fingerprint):
+                self.stats["seen"] += 1
+                return False
+            if self._conn is None:
+                self._hosts[host].add(fingerprint)
+            else:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO visited VALUES (?, ?)", (host, fingerprint)
+                )
+                self._pending += 1
+                if self._pending >= _COMMIT_EVERY:
+                    self._conn.commit()
+                    self._pending = 0
+            if self._bloom is not None:
+                self._bloom.add(fingerprint)
+            self._counts[host] += 1
+            self.stats["added"] += 1
+            return True
+
+    def count(self, host=None):
+        """Return the number of visited urls, in total or of one ``host``."""
+        with self._lock:
+            if host is None:
+                return sum(self._counts.values())
+            return self._counts[host.lower()]
+
+    def hosts(self):
+        """Return the number of visited urls per host."""
+        with self._lock:
+            return dict(self._counts)
+
+    def clear(self):
+        """Remove all urls."""
+        with self._lock:
+            self._hosts.clear()
+            self._counts.clear()
+            if self._bloom is not None:
+                self._bloom.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM visited")
+                self._pending = 0
+
+    def close(self):
+        """Write pending urls and close the on-disk set, if any."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+
+    def _contains(self, host, fingerprint):
+        if self._bloom is not None and fingerprint not in self._bloom:
+            self.stats["bloom"] += 1
+            return False
+        if self._conn is None:
+            partition = self._hosts.get(host)
+            return partition is not None and fingerprint in partition
+        row = self._conn.execute(
+            "SELECT 1 FROM visited WHERE host = ? AND fingerprint = ?",
+            (host, fingerprint),
+        ).fetchone()
+        return row is not None
@@ -1,12 +1,21 @@
-import collections
 import datetime
 from typing import Dict
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from schoolparser.metrics import Metrics, count, timed
+from schoolparser.store import ResultStore
+
 
 def scraped_emails_to_df(
-    emails: Dict, output_fpath: str = None, overwrite: bool = False
+    emails: Dict,
+    output_fpath: str = None,
+    overwrite: bool = False,
+    store: ResultStore = None,
+    verbose: bool = False,
+    metrics: Metrics = None,
 ) -> pd.DataFrame:
     """Convert scraped emails (dictionary of lists) to Dataframe.
 
@@ -16,6 +25,16 @@ def scraped_emails_to_df(
     output_fpath : str | pathlib.Path
     overwrite : bool
         Whether to overwrite or append to the existing file (default).
+        Ignored if ``store`` is given.
+    store : schoolparser.store.ResultStore | None
+        Persistent store to append the emails to, skipping ones already
+        stored. If ``output_fpath`` is given, the whole store is then
+        exported to it, see :meth:`schoolparser.store.ResultStore.to_excel`.
+    verbose : bool
+        Whether to print the dataframe.
+    metrics : schoolparser.metrics.Metrics | None
+        Optional metrics to record the time of storing and writing the
+        emails in, as the ``"write"`` stage.
 
     Returns
     -------
@@ -24,29 +43,55 @@ def scraped_emails_to_df(
         ``url`` (url that was accessed), ``email`` (scraped email address),
         and ``date`` (date generated).
     """
-    # generate list of dictionaries
-    rows = []
-    for school, url_list in emails.items():
+    # one timestamp for the whole run
+    now = datetime.datetime.now()
+
+    # assemble the columns as codes into the school and url names, repeated
+    # once per email found at that url
+    school_names = list(emails.keys())
+    url_index = dict()
+    school_codes, url_codes, counts, addresses = [], [], [], []
+    for school_code, url_list in enumerate(emails.values()):
         for url, email_list in url_list.items():
-            for email in email_list:
-                row = collections.OrderedDict()
-                row["school"] = school
-                row["url"] = url
-                row["email"] = email
-                row["date"] = datetime.datetime.now()
-                rows.append(row)
+            school_codes.append(school_code)
+            url_codes.append(url_index.setdefault(url, len(url_index)))
+            counts.append(len(email_list))
+            addresses.extend(email_list)
+    counts = np.asarray(counts, dtype=int)
 
     # create the dataframe
-    school_df = pd.DataFrame(rows)
+    school_df = pd.DataFrame(
+        {
+            "school": pd.Categorical.from_codes(
+                np.repeat(np.asarray(school_codes, dtype=int), counts),
+                categories=school_names,
+            ),
+            "url": pd.Categorical.from_codes(
+                np.repeat(np.asarray(url_codes, dtype=int), counts),
+                categories=list(url_index),
+            ),
+            "email": np.asarray(addresses, dtype=object),
+        }
+    )
+    school_df["date"] = pd.Timestamp(now)
     school_df["Owner"] = ""
     school_df["Notes"] = ""
 
-    print(school_df)
-    if output_fpath is not None:
-        print(f'Writing final parse to {output_fpath}.')
-        output_fpath = Path(output_fpath)
-        if not overwrite and output_fpath.exists():
-            old_df = pd.read_excel(output_fpath, index_col=None)
-            school_df = pd.concat((old_df, school_df))
-        school_df.to_excel(output_fpath, index=None)
+    if verbose:
+        print(school_df)
+    count(metrics, "rows", len(school_df))
+    with timed(metrics, "write"):
+        if store is not None:
+            n_added = store.add(emails, date=now)
+            print(f'Stored {n_added} new emails, {len(store)} in total.')
+            if output_fpath is not None:
+                print(f'Exporting stored emails to {output_fpath}.')
+                store.to_excel(output_fpath)
+        elif output_fpath is not None:
+            print(f'Writing final parse to {output_fpath}.')
+            output_fpath = Path(output_fpath)
+            if not overwrite and output_fpath.exists():
+                old_df = pd.read_excel(output_fpath, index_col=None)
+                school_df = pd.concat((old_df, school_df))
+            school_df.to_excel(output_fpath, index=None)
     return school_df
@@ -0,0 +1,180 @@
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from schoolparser.cache import ContentFingerprints, FetchRegistry, ResponseCache
+
+
+class _FakeResponse(object):
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.ok = status_code < 400
+
+
+class _FakeServer(object):
+    """Offline server of fixed bodies, answering conditional GETs with 304."""
+
+    def __init__(self, bodies):
+        self.bodies = dict(bodies)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        headers = headers or {}
+        self.requests.append((url, headers))
+        body = self.bodies[url]
+        etag = f'"{hash(body)}"'
+        if headers.get("If-None-Match") == etag:
+            return _FakeResponse(304)
+        return _FakeResponse(200, body, {"ETag": etag})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """A fake server of four pages of 4 bytes."""
+    server = _FakeServer({f"https://a.org/{page}": b"page" for page in "abcd"})
+    monkeypatch.setattr(requests, "get", server.get)
+    return server
+
+
+def test_response_cache_revalidates(server, tmp_path):
+    """Test that stale entries cost a 304 and changed pages are downloaded."""
+    cache = ResponseCache(tmp_path)
+    url = "https://a.org/a"
+    assert cache.get(url) == b"page"
+    assert server.requests[0][1] == {}
+
+    assert cache.get(url) == b"page"
+    assert "If-None-Match" in server.requests[1][1]
+    assert cache.stats == {"downloaded": 1, "revalidated": 1}
+
+    server.bodies[url] = b"changed"
+    assert cache.get(url) == b"changed"
+    assert cache.stats["downloaded"] == 2
+    cache.close()
+
+
+def test_response_cache_ttl(server, tmp_path):
+    """Test that fresh entries are served without a request, also reopened."""
+    cache = ResponseCache(tmp_path, ttl=60)
+    url = "https://a.org/a"
+    cache.get(url)
+    server.bodies[url] = b"changed"
+    assert cache.get(url) == b"page"
+    assert len(server.requests) == 1
+    assert cache.stats == {"downloaded": 1, "fresh": 1}
+
+    # an unpickled cache, e.g. in a worker process, reads the same database
+    reopened = pickle.loads(pickle.dumps(cache))
+    assert reopened.get(url) == b"page"
+    assert len(server.requests) == 1
+    reopened.close()
+    cache.close()
+
+
+def test_response_cache_evicts_least_recently_used(server, tmp_path):
+    """Test that the least recently used entries are evicted over max_bytes."""
+    cache = ResponseCache(tmp_path, ttl=60, max_bytes=12)
+    for page in "abc":
+        cache.get(f"https://a.org/{page}")
+    # a is used again, so b is the least recently used
+    cache.get("https://a.org/a")
+    cache.get("https://a.org/d")
+    assert len(server.requests) == 4
+
+    for page in "acd":
+        cache.get(f"https://a.org/{page}")
+    assert len(server.requests) == 4
+    cache.get("https://a.org/b")
+    assert server.requests[-1][0] == "https://a.org/b"
+    assert len(server.requests) == 5
+    cache.close()
+
+
+def test_response_cache_skips_large_bodies(server, tmp_path):
+    """Test that a body larger than the whole cache is not stored."""
+    cache = ResponseCache(tmp_path, ttl=60, max_bytes=3)
+    cache.get("https://a.org/a")
+    cache.get("https://a.org/a")
+    assert cache.stats == {"downloaded": 2}
+    cache.close()
+
+
+def test_fetch_registry_computes_once():
+    """Test that concurrent requests for a url share one computation."""
+    registry = FetchRegistry()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def _compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["a@district.org"]
+
+    urls = ["https://district.org/staff"] + ["https://District.org/staff#top"] * 3
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(registry.get_or_compute, "contacts", urls[0], _compute)
+        started.wait(5)
+        others = [
+            executor.submit(registry.get_or_compute, "contacts", url, _compute)
+            for url in urls[1:]
+        ]
+        release.set()
+        results = [first.result()] + [future.result() for future in others]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert registry.stats == {"computed": 1, "shared": 3}
+    assert registry.get("contacts", "https://district.org/staff") == (
+        True,
+        ["a@district.org"],
+    )
+    assert registry.get("links", "https://district.org/staff") == (False, None)
+
+
+def test_fetch_registry_shares_errors():
+    """Test that a failed computation raises for every caller, once."""
+    registry = FetchRegistry()
+    calls = []
+
+    def _compute():
+        calls.append(1)
+        raise requests.ConnectionError("down")
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError, match="down"):
+            registry.get_or_compute("contacts", "https://a.org/", _compute)
+    assert len(calls) == 1
+    assert registry.get("contacts", "https://a.org/") == (False, None)
+
+    # results are not shared with other processes
+    registry.get_or_compute("links", "https://b.org/", lambda: [])
+    assert len(pickle.loads(pickle.dumps(registry))) == 0
+
+
+def test_content_fingerprints(tmp_path):
+    """Test that results are reused only while the fingerprint is unchanged."""
+    fingerprints = ContentFingerprints(tmp_path)
+    url = "https://lowell.org/staff"
+    assert fingerprints.get("contactinfo", url, "v1") == (False, None)
+    fingerprints.put("contactinfo", url, "v1", ({"a@sfusd.edu"}, set()))
+    fingerprints.close()
+
+    # reopened by the next run, which reaches the url under another spelling
+    fingerprints = pickle.loads(pickle.dumps(fingerprints))
+    assert fingerprints.get("contactinfo", "https://Lowell.org/staff", "v1") == (
+        True,
+        ({"a@sfusd.edu"}, set()),
+    )
+    assert fingerprints.get("contactinfo", url, "v2") == (False, None)
+    assert fingerprints.get("social", url, "v1") == (False, None)
+    assert fingerprints.stats == {"unchanged": 1, "changed": 1, "new": 1}
+
+    fingerprints.clear()
+    assert fingerprints.get("contactinfo", url, "v1") == (False, None)
+    fingerprints.close()
@@ -0,0 +1,75 @@
+from schoolparser.checkpoint import Checkpoint
+
+
+def test_results_round_trip(tmp_path):
+    """Test that results and errors are read back, also after reopening."""
+    fpath = tmp_path / "checkpoint.sqlite"
+    checkpoint = Checkpoint(fpath)
+    checkpoint.save_result("contact", "Lowell", "https://lowell.org/", {"a@b.org"})
+    checkpoint.save_result(
+        "contact", "Lowell", "https://lowell.org/x", None, error="timed out"
+    )
+    checkpoint.save_result("social", "Lowell", "https://lowell.org/", ["fb"])
+    checkpoint.close()
+
+    checkpoint = Checkpoint(fpath)
+    assert checkpoint.load_results("contact") == {
+        ("Lowell", "https://lowell.org/"): ["a@b.org"]
+    }
+    assert checkpoint.load_results("contact", failed=True) == {
+        ("Lowell", "https://lowell.org/x"): "timed out"
+    }
+    assert checkpoint.load_results("social") == {
+        ("Lowell", "https://lowell.org/"): ["fb"]
+    }
+
+    # a retried url replaces its failure
+    checkpoint.save_result("contact", "Lowell", "https://lowell.org/x", [])
+    assert checkpoint.load_results("contact", failed=True) == {}
+    checkpoint.close()
+
+
+def test_crawls_and_schools_round_trip(tmp_path):
+    """Test that crawl states and finished schools are read back."""
+    checkpoint = Checkpoint(tmp_path / "checkpoint.sqlite")
+    seed = "https://a.org/"
+    checkpoint.update_crawl(
+        seed,
+        {"pages_fetched": 1, "report": None},
+        page_url=seed,
+        links=(["https://a.org/x", "https://a.org/y"], ["https://b.org/"]),
+        scheduled=[("https://a.org/x", 1, 0.5), ("https://a.org/y", 1, 0.0)],
+    )
+    checkpoint.update_crawl(
+        seed,
+        {"pages_fetched": 2, "report": None},
+        page_url="https://a.org/x",
+        links=(["https://a.org/", "https://a.org/z"], []),
+        scheduled=[("https://a.org/z", 2, 0.0)],
+    )
+    assert checkpoint.load_crawl(seed) == {
+        "frontier": [["https://a.org/y", 1, 0.0], ["https://a.org/z", 2, 0.0]],
+        "visited": [seed, "https://a.org/x"],
+        "internal_urls": {
+            seed, "https://a.org/x", "https://a.org/y", "https://a.org/z"
+        },
+        "external_urls": {"https://b.org/"},
+        "pages_fetched": 2,
+        "report": None,
+    }
+    assert checkpoint.load_crawl("https://b.org/") is None
+
+    # only the counters change when the crawl finishes
+    checkpoint.update_crawl(seed, {"pages_fetched": 2, "report": {"done": True}})
+    state = checkpoint.load_crawl(seed)
+    assert state["report"] == {"done": True}
+    assert len(state["frontier"]) == 2
+
+    checkpoint.mark_done("contact", "Lowell", {"n_emails": 3})
+    assert checkpoint.load_done("contact") == {"Lowell": {"n_emails": 3}}
+    assert checkpoint.load_done("social") == {}
+
+    checkpoint.clear()
+    assert checkpoint.load_crawl(seed) is None
+    assert checkpoint.load_done("contact") == {}
+    checkpoint.close()
@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.synthetic_site import SyntheticSite
+from schoolparser.cache import FetchRegistry
+from schoolparser.checkpoint import Checkpoint
+from schoolparser.scrape import Crawler
+from schoolparser.visited import VisitedStore
+
+CRAWL_MODES = ["crawl", "crawl_async", "iter_crawl"]
+
+
+def _crawl(crawler, mode, url, **kwargs):
+    """Crawl ``url`` with one of ``CRAWL_MODES`` and return the report."""
+    kwargs.setdefault("verbose", False)
+    if mode == "crawl":
+        return crawler.crawl(url, **kwargs)
+    if mode == "crawl_async":
+        return asyncio.run(crawler.crawl_async(url, **kwargs))
+    crawl = crawler.iter_crawl(url, **kwargs)
+    while True:
+        try:
+            next(crawl)
+        except StopIteration as stop:
+            return stop.value
+
+
+class _StubValidator(object):
+    """Offline email validator that can crash after a number of batches."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def validate(self, emails):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise RuntimeError("crashed")
+        return {email: email for email in emails}
+
+
+@pytest.fixture(scope="module")
+def site():
+    """A local synthetic school site of 30 pages."""
+    with SyntheticSite(n_pages=30, fan_out=3, page_size=2000) as site:
+        yield site
+
+
+@pytest.fixture(scope="module")
+def slow_site():
+    """A local synthetic school site answering after 2 seconds."""
+    with SyntheticSite(n_pages=10, page_size=2000, latency=2.0) as site:
+        yield site
+
+
+@pytest.mark.parametrize("mode", CRAWL_MODES)
+def test_crawl_max_urls(site, mode):
+    """Test that a crawl fetches at most max_urls pages."""
+    crawler = Crawler()
+    before = site.requests
+    report = _crawl(crawler, mode, site.url, max_urls=5)
+    assert report["pages_fetched"] == 5
+    assert report["frontier"] > 0
+    assert not report["timed_out"]
+    assert site.requests - before == 5
+
+
+@pytest.mark.parametrize("mode", CRAWL_MODES)
+def test_crawl_max_depth(site, mode):
+    """Test that a crawl does not follow links deeper than max_depth."""
+    crawler = Crawler()
+    report = _crawl(crawler, mode, site.url, max_urls=50, max_depth=1)
+    # the home page links to the 7 other navigation pages
+    assert report["pages_fetched"] == 8
+    assert report["max_depth_reached"] == 1
+    assert report["frontier"] == 0
+
+
+@pytest.mark.parametrize("mode", CRAWL_MODES)
+def test_crawl_timeout(slow_site, mode):
+    """Test that the timeout also cuts short requests in flight."""
+    crawler = Crawler()
+    start = time.monotonic()
+    report = _crawl(crawler, mode, slow_site.url, max_urls=5, timeout=0.5)
+    assert time.monotonic() - start < 1.5
+    assert report["timed_out"] or report["pages_fetched"] == 1
+
+
+@pytest.mark.parametrize("mode", CRAWL_MODES)
+def test_crawl_with_visited_store(site, mode):
+    """Test that a visited store replaces the sets of link strings."""
+    crawler = Crawler(visited=VisitedStore())
+    report = _crawl(crawler, mode, site.url, max_urls=50)
+    assert report["pages_fetched"] == 30
+    assert crawler.internal_urls == set()
+    assert crawler.external_urls == set()
+    assert crawler.visited.count() >= 30
+
+
+def test_crawl_resumes_from_checkpoint(site, tmp_path):
+    """Test that a stopped crawl resumes without fetching pages again."""
+    checkpoint = Checkpoint(tmp_path / "checkpoint.sqlite")
+    crawl = Crawler().iter_crawl(
+        site.url, max_urls=20, verbose=False, checkpoint=checkpoint
+    )
+    first = [next(crawl).url for _ in range(5)]
+    crawl.close()
+
+    crawl = Crawler().iter_crawl(
+        site.url, max_urls=20, verbose=False, checkpoint=checkpoint
+    )
+    crawled = [page.url for page in crawl]
+    # the page being processed when the crawl stopped is yielded again
+    assert first[-1] in crawled
+    assert not set(crawled) & set(first[:-1])
+    assert len(set(first) | set(crawled)) == 20
+    assert checkpoint.load_crawl(site.url)["report"]["pages_fetched"] == 20
+    checkpoint.close()
+
+
+def test_iter_crawl_reuses_registry():
+    """Test that pages with shared links and results are not fetched again."""
+    registry = FetchRegistry()
+    # a site of its own, so fetches dropped by other tests are not counted,
+    # a platform the site has no handle for, so no search is cancelled, and
+    # one fetch at a time, so both runs crawl the same pages
+    kwargs = dict(max_urls=10, platforms=("linkedin",), render="never")
+    with SyntheticSite(n_pages=30, fan_out=3, page_size=2000) as site:
+        Crawler(max_concurrency=1, registry=registry).discover_social_media(
+            site.url, verbose=False, **kwargs
+        )
+        before = site.requests
+        handles = Crawler(
+            max_concurrency=1, registry=registry
+        ).discover_social_media(site.url, verbose=False, **kwargs)
+        assert site.requests == before
+    assert handles["twitter"] == ["https://twitter.com/district"]
+
+
+def test_discover_contacts_resumes(site, tmp_path):
+    """Test that contacts found before a crash are kept when resuming."""
+    checkpoint = Checkpoint(tmp_path / "checkpoint.sqlite")
+    with pytest.raises(RuntimeError, match="crashed"):
+        Crawler().discover_contacts(
+            site.url, max_contact_pages=4, validator=_StubValidator(fail_after=2),
+            verbose=False, checkpoint=checkpoint, school="Lowell",
+        )
+    saved = checkpoint.load_results("contact_page")
+    assert len(saved) == 2
+
+    validator = _StubValidator()
+    emails, phones, report = Crawler().discover_contacts(
+        site.url, max_contact_pages=4, validator=validator, verbose=False,
+        checkpoint=checkpoint, school="Lowell",
+    )
+    assert {url for _, url in saved} <= set(emails)
+    assert len(emails) == 4
+    assert report["contact_pages"] == 4
+    assert report["fetches_to_first_contact"] == 1
+    # only the pages not searched before the crash are searched again
+    assert validator.calls == 2
+    assert all(len(email_list) == 10 for email_list in emails.values())
+    checkpoint.close()
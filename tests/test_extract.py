@@ -0,0 +1,67 @@
+import pytest
+
+from schoolparser.scrape import EMAIL_WINDOW, find_emails, find_social_media_handles
+
+EMAIL_TEXTS = [
+    "",
+    "no address here",
+    "Contact jane.doe@district.org or john_smith@school.k12.ca.us today.",
+    '<a href="mailto:a@b.org">a@b.org</a><td>c-d@e-f.org</td>',
+    "twice: x@y.org x@y.org, and an @ alone, and @@ and a@",
+    "user@localhost without a dot, then ok@fine.org",
+    "var s='" + "abc." * 1000 + "';" + " staff@district.org",
+]
+
+
+@pytest.mark.parametrize("text", EMAIL_TEXTS)
+def test_find_emails_windowed_matches_full_scan(text):
+    """Test that the windowed search finds what a full regex scan finds."""
+    assert find_emails(text, windowed=True) == find_emails(text, windowed=False)
+
+
+def test_find_emails_window_cuts_long_local_parts():
+    """Test that local parts longer than the window are cut to the window."""
+    text = "a" * 5000 + "@district.org and b@district.org"
+    assert find_emails(text, windowed=False) == [
+        "a" * 5000 + "@district.org",
+        "b@district.org",
+    ]
+    assert find_emails(text) == [
+        "a" * EMAIL_WINDOW + "@district.org",
+        "b@district.org",
+    ]
+
+
+def test_find_emails_in_order():
+    """Test that emails are returned in the order they appear, with repeats."""
+    text = "b@district.org, a@district.org; b@district.org"
+    assert find_emails(text) == ["b@district.org", "a@district.org", "b@district.org"]
+
+
+def test_find_social_media_handles():
+    """Test that handles of every platform are found in one pass, in order."""
+    text = (
+        '<a href="https://twitter.com/district">Twitter</a>'
+        '<a href="https://www.facebook.com/district.schools/">Facebook</a>'
+        '<a href="http://fb.com/district">fb</a>'
+        '<a href="https://www.instagram.com/district_k12">Instagram</a>'
+        '<a href="https://www.linkedin.com/in/jane-doe/">LinkedIn</a>'
+        "plain text mentioning twitter.com/nobody without a scheme"
+    )
+    assert find_social_media_handles(text) == [
+        ("twitter", "https://twitter.com/district"),
+        ("facebook", "https://www.facebook.com/district.schools/"),
+        ("facebook", "http://fb.com/district"),
+        ("instagram", "https://www.instagram.com/district_k12"),
+        ("linkedin", "https://www.linkedin.com/in/jane-doe/"),
+    ]
+
+
+def test_find_social_media_handles_without_handles():
+    """Test text without social media links, or with partial ones."""
+    assert find_social_media_handles("") == []
+    assert find_social_media_handles("<p>" + "x" * 10000 + "</p>") == []
+    # a domain inside another match is not matched again
+    assert find_social_media_handles("https://twitter.com/fb.com/") == [
+        ("twitter", "https://twitter.com/fb")
+    ]
@@ -0,0 +1,36 @@
+from schoolparser.scrape import PriorityFrontier
+
+
+def test_priority_frontier_order():
+    """Test that the best scoring item is handed out first, ties in order."""
+    frontier = PriorityFrontier(
+        [("https://a.org/", 0), ("https://a.org/x", 1, 2.0), ("https://a.org/y", 1)]
+    )
+    frontier.append(("https://a.org/z", 1, 2.0))
+    assert len(frontier) == 4
+    assert list(frontier) == [
+        ("https://a.org/x", 1, 2.0),
+        ("https://a.org/z", 1, 2.0),
+        ("https://a.org/", 0, 0.0),
+        ("https://a.org/y", 1, 0.0),
+    ]
+    popped = [frontier.popleft() for _ in range(4)]
+    assert [item[0] for item in popped] == [
+        "https://a.org/x",
+        "https://a.org/z",
+        "https://a.org/",
+        "https://a.org/y",
+    ]
+    assert len(frontier) == 0
+    assert frontier.popleft() is None
+
+
+def test_priority_frontier_skips_busy_hosts():
+    """Test that items of busy hosts are skipped without being removed."""
+    frontier = PriorityFrontier(
+        [("https://a.org/1", 1, 5.0), ("https://b.org/1", 1, 1.0)]
+    )
+    assert frontier.popleft(busy={"a.org"}) == ("https://b.org/1", 1, 1.0)
+    assert frontier.popleft(busy={"a.org"}) is None
+    assert len(frontier) == 1
+    assert frontier.popleft() == ("https://a.org/1", 1, 5.0)
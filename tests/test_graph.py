@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from schoolparser.graph import LinkGraph
+
+
+def _dense_pagerank(n, edges, damping=0.85, n_iter=200):
+    """PageRank by power iteration over a dense transition matrix."""
+    out_links = [[dst for src, dst in edges if src == i] for i in range(n)]
+    transition = np.zeros((n, n))
+    for i, links in enumerate(out_links):
+        if links:
+            for dst in links:
+                transition[dst, i] += 1.0 / len(links)
+        else:
+            transition[:, i] = 1.0 / n
+    ranks = np.full(n, 1.0 / n)
+    for _ in range(n_iter):
+        ranks = damping * transition @ ranks + (1.0 - damping) / n
+    return ranks
+
+
+@pytest.fixture
+def graph():
+    """A small site: a home page, two sections and a dead-end page."""
+    graph = LinkGraph()
+    graph.add_page("/", ["/about", "/staff", "/"])
+    graph.add_page("/about", ["/", "/staff"])
+    graph.add_page("/staff", ["/", "/staff/directory"])
+    return graph
+
+
+def test_add_page(graph):
+    """Test that urls are interned in order and self links are dropped."""
+    assert graph.urls == ["/", "/about", "/staff", "/staff/directory"]
+    assert graph.n_edges == 6
+    assert "/staff/directory" in graph
+    assert graph.get_id("/missing") is None
+
+    # recording a page again is a no-op
+    graph.add_page("/", ["/elsewhere"])
+    assert graph.n_edges == 6
+    assert "/elsewhere" not in graph
+
+
+def test_to_csr(graph):
+    """Test the CSR adjacency of the graph."""
+    indptr, indices = graph.to_csr()
+    assert indptr.tolist() == [0, 2, 4, 6, 6]
+    assert sorted(indices[indptr[0]:indptr[1]].tolist()) == [1, 2]
+    assert graph.in_degree().tolist() == [2, 1, 2, 1]
+
+
+def test_pagerank_matches_dense_power_iteration(graph):
+    """Test PageRank against a dense implementation, with a dangling page."""
+    edges = list(zip(graph._src, graph._dst))
+    ranks = graph.pagerank(tol=1e-12, max_iter=200)
+    np.testing.assert_allclose(ranks, _dense_pagerank(len(graph), edges), atol=1e-8)
+    assert ranks.sum() == pytest.approx(1.0)
+
+
+def test_pagerank_empty():
+    """Test that an empty graph has no ranks."""
+    assert len(LinkGraph().pagerank()) == 0
+
+
+def test_rank(graph):
+    """Test ranking urls, including urls not in the graph."""
+    ranked = graph.rank("in_degree")
+    assert [url for url, _ in ranked] == ["/", "/staff", "/about", "/staff/directory"]
+    ranked = graph.rank(urls=["/missing", "/staff/directory", "/"], top=2)
+    assert [url for url, _ in ranked] == ["/", "/staff/directory"]
+    with pytest.raises(ValueError, match="method must be one of"):
+        graph.rank("hits")
+
+
+def test_fingerprinted_links():
+    """Test that only recorded pages keep their url without interning links."""
+    graph = LinkGraph(intern_links=False)
+    graph.add_page("https://a.org/", ["https://a.org/about", "https://a.org/staff"])
+    graph.add_page("https://a.org/about", ["https://A.org/", "https://a.org/staff"])
+    assert graph.urls == ["https://a.org/", "https://a.org/about", None]
+    assert graph.n_edges == 4
+    # links are keyed by their normalized url
+    assert graph.get_id("https://a.org") == 0
+    assert "https://a.org/staff" in graph
+
+    ranked = graph.rank("in_degree")
+    assert [url for url, _ in ranked] == ["https://a.org/", "https://a.org/about"]
+    ranked = graph.rank(
+        "in_degree", urls=["https://a.org/about", "https://a.org/staff"]
+    )
+    assert ranked == [("https://a.org/staff", 2.0), ("https://a.org/about", 1.0)]
+
+
+def test_nbytes_counts_urls():
+    """Test that the memory estimate includes the url strings kept."""
+    short_graph, long_graph = LinkGraph(), LinkGraph()
+    short_graph.add_page("/", ["/about", "/staff"])
+    long_graph.add_page("/", ["/about" + "x" * 1000, "/staff"])
+    assert long_graph.nbytes() - short_graph.nbytes() == 1000
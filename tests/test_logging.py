@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from schoolparser.base import config, configure_logging, logger
+
+
+class _Formatted(object):
+    """Log argument recording the threads it is formatted in."""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return "formatted"
+
+
+def _wait_for(fpath, text, timeout=5):
+    """Wait until the log file ``fpath`` contains ``text``."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if fpath.exists() and text in fpath.read_text():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def restore_logger():
+    """Remove the handlers a test adds to the schoolparser logger."""
+    handlers, level = list(logger.handlers), logger.level
+    log_handlers = dict(config._log_handlers)
+    yield
+    for handler in logger.handlers[len(handlers):]:
+        logger.removeHandler(handler)
+    for fpath, handler in config._log_handlers.items():
+        if fpath not in log_handlers:
+            handler.close()
+    config._log_handlers.clear()
+    config._log_handlers.update(log_handlers)
+    logger.setLevel(level)
+
+
+def test_queued_logging(tmp_path, restore_logger):
+    """Test that records are formatted and written off the logging thread."""
+    fpath = tmp_path / "logs" / "schoolparser.log"
+    file_handler = configure_logging(fpath, level=logging.INFO)
+    # configuring the same file again adds no handler
+    n_handlers = len(logger.handlers)
+    assert configure_logging(fpath, level=logging.INFO) is file_handler
+    assert len(logger.handlers) == n_handlers
+
+    assert file_handler not in logger.handlers
+    logger.debug("Not written.")
+    logger.info("Written.")
+    assert _wait_for(fpath, "Written.")
+    assert "Not written." not in fpath.read_text()
+
+    # the handler on the logger only queues records; the log capture of
+    # pytest is attached to the logger too, so the handler is called directly
+    argument = _Formatted()
+    record = logger.makeRecord(
+        logger.name, logging.INFO, __file__, 0, "Found %s links.", (argument,), None
+    )
+    logger.handlers[-1].handle(record)
+    assert _wait_for(fpath, "Found formatted links.")
+    assert argument.threads
+    assert threading.current_thread().name not in argument.threads
+
+
+def test_unqueued_logging(tmp_path, restore_logger):
+    """Test that records are written right away without a queue."""
+    fpath = tmp_path / "schoolparser.log"
+    file_handler = configure_logging(fpath, level=logging.INFO, queued=False)
+    assert file_handler in logger.handlers
+    argument = _Formatted()
+    logger.info("Found %s links.", argument)
+    assert "Found formatted links." in fpath.read_text()
+    assert set(argument.threads) == {threading.current_thread().name}
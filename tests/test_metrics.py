@@ -0,0 +1,82 @@
+import json
+import pickle
+import threading
+
+import pytest
+
+from schoolparser.metrics import Metrics, _Histogram, count, for_school, timed
+
+
+def test_histogram_quantiles():
+    """Test that quantiles are bucket bounds, capped by the maximum."""
+    histogram = _Histogram()
+    for seconds in [0.002] * 90 + [0.3] * 10:
+        histogram.add(seconds)
+    assert histogram.quantile(0.5) == 0.0025
+    assert histogram.quantile(0.95) == 0.3
+    result = histogram.to_dict()
+    assert result["n"] == 100
+    assert result["buckets"] == {"0.0025": 90, "0.5": 10}
+    assert result["mean_s"] == pytest.approx(0.0318)
+
+
+def test_metrics_by_host_and_school():
+    """Test that observations are recorded for the run, host and school."""
+    metrics = Metrics()
+    metrics.observe("fetch", 0.1, "https://a.org/staff")
+    with for_school(metrics, "Lowell"):
+        metrics.observe("fetch", 0.2, "https://b.org/")
+        count(metrics, "pages", url="https://b.org/")
+        # other threads are not attributed to the school
+        thread = threading.Thread(target=metrics.count, args=("pages",))
+        thread.start()
+        thread.join()
+    assert metrics.school is None
+    count(None, "pages")
+
+    result = metrics.to_dict()
+    assert result["stages"]["fetch"]["n"] == 2
+    assert result["stages"]["fetch"]["total_s"] == pytest.approx(0.3)
+    assert result["counters"] == {"pages": 2}
+    assert result["by_host"]["a.org"]["stages"]["fetch"]["n"] == 1
+    assert result["by_host"]["b.org"]["counters"] == {"pages": 1}
+    assert result["by_school"]["Lowell"]["stages"]["fetch"]["max_s"] == 0.2
+    assert result["by_school"]["Lowell"]["counters"] == {"pages": 1}
+
+
+def test_timed_counts_errors():
+    """Test that a stage raising is timed as an error and re-raised."""
+    metrics = Metrics()
+    with timed(metrics, "parse"):
+        pass
+    with pytest.raises(ValueError):
+        with timed(metrics, "parse"):
+            raise ValueError
+    with timed(None, "parse"):
+        pass
+    stage = metrics.to_dict()["stages"]["parse"]
+    assert (stage["n"], stage["errors"]) == (2, 1)
+
+
+def test_metrics_merge_and_pickle(tmp_path):
+    """Test merging the metrics of worker processes and writing them out."""
+    metrics = Metrics()
+    metrics.observe("render", 1.0, "https://a.org/")
+    metrics.count("bytes", 100, "https://a.org/")
+    worker = pickle.loads(pickle.dumps(metrics))
+    worker.observe("render", 3.0, "https://a.org/")
+    metrics.merge(worker)
+
+    result = metrics.to_dict()
+    assert result["stages"]["render"]["n"] == 3
+    assert result["stages"]["render"]["max_s"] == 3.0
+    assert result["counters"]["bytes"] == 200
+
+    summary = metrics.summary()
+    assert summary.splitlines()[1].split()[:3] == ["render", "3", "0"]
+    assert "a.org: 5.00 s, 0 pages, 200 bytes" in summary
+
+    fpath = tmp_path / "metrics.json"
+    metrics.dump_json(fpath)
+    with open(fpath) as fin:
+        assert json.load(fin)["counters"] == {"bytes": 200}
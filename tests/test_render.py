@@ -0,0 +1,94 @@
+import signal
+import threading
+
+import pyppeteer
+import pytest
+
+from schoolparser.render import RenderPool
+
+
+class _FakePage(object):
+    def __init__(self):
+        self.url = None
+
+    async def goto(self, url, options=None):
+        self.url = url
+
+    async def content(self):
+        return f"<html><body><p>Rendered {self.url}</p></body></html>"
+
+    async def close(self):
+        pass
+
+
+class _FakeBrowser(object):
+    """Stands in for a pyppeteer ``Browser`` without starting Chromium."""
+
+    process = None
+
+    def __init__(self):
+        self.pages = 0
+        self.closed = False
+
+    async def newPage(self):
+        self.pages += 1
+        return _FakePage()
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def launches(monkeypatch):
+    """Replace ``pyppeteer.launch`` with a fake recording its calls."""
+    launches = []
+
+    async def _launch(**options):
+        # like pyppeteer, install signal handlers unless told not to, which
+        # fails outside of the main thread
+        for name in ("SIGINT", "SIGTERM", "SIGHUP"):
+            if options.get(f"handle{name}", True):
+                signal.signal(getattr(signal, name), signal.SIG_DFL)
+        browser = _FakeBrowser()
+        launches.append((options, threading.current_thread(), browser))
+        return browser
+
+    monkeypatch.setattr(pyppeteer, "launch", _launch)
+    return launches
+
+
+def test_render_launches_without_signal_handlers(launches):
+    """Test that browsers launched off the main thread render pages."""
+    with RenderPool(n_browsers=1) as pool:
+        raw_html = pool.render("https://district.org/", timeout=5)
+        assert b"Rendered https://district.org/" in raw_html
+        pool.render("https://district.org/staff", timeout=5)
+
+    # one launch for both renders, from the browser's own thread
+    assert len(launches) == 1
+    options, thread, browser = launches[0]
+    assert thread is not threading.main_thread()
+    assert options["headless"]
+    assert not options["handleSIGINT"]
+    assert not options["handleSIGTERM"]
+    assert not options["handleSIGHUP"]
+    assert browser.pages == 2
+    assert browser.closed
+
+
+def test_render_recycles_browsers(launches):
+    """Test that a browser is relaunched after max_renders renders."""
+    with RenderPool(n_browsers=1, max_renders=2) as pool:
+        for idx in range(5):
+            pool.render(f"https://district.org/{idx}", timeout=5)
+    assert len(launches) == 3
+    assert all(browser.closed for _, _, browser in launches)
+
+
+def test_closed_pool_does_not_render(launches):
+    """Test that a closed pool refuses to render."""
+    pool = RenderPool()
+    pool.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.render("https://district.org/")
+    assert launches == []
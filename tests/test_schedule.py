@@ -0,0 +1,100 @@
+import time
+
+import pytest
+import requests
+
+from schoolparser.schedule import HostScheduler, _TokenBucket, interleave_by_host
+
+
+class _FakeResponse(object):
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.ok = status_code < 400
+
+
+class _FakeRobots(object):
+    """Offline robots.txt files by host; None stands for a host that is down."""
+
+    def __init__(self):
+        self.files = dict()
+        self.fetched = []
+
+    def get(self, url, timeout=None):
+        host = url.split("/")[2]
+        self.fetched.append(host)
+        if host not in self.files:
+            return _FakeResponse(404)
+        if self.files[host] is None:
+            raise requests.ConnectionError(f"{host} is down")
+        return _FakeResponse(200, self.files[host])
+
+
+@pytest.fixture
+def robots(monkeypatch):
+    """Serve robots.txt files without a network."""
+    robots = _FakeRobots()
+    monkeypatch.setattr(requests, "get", robots.get)
+    return robots
+
+
+def test_token_bucket():
+    """Test that a bucket allows a burst, then spaces requests by 1 / rate."""
+    bucket = _TokenBucket(rate=10.0, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    # reservations queue up behind each other
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_slot_rate_limits_each_host():
+    """Test that a host's fetches are spaced while other hosts are not held up."""
+    scheduler = HostScheduler(rate=20.0, burst=1, respect_robots=False)
+    start = time.monotonic()
+    for _ in range(3):
+        with scheduler.slot("https://a.org/page"):
+            pass
+    assert time.monotonic() - start >= 0.09
+
+    start = time.monotonic()
+    with scheduler.slot("https://b.org/page"):
+        pass
+    assert time.monotonic() - start < 0.05
+
+
+def test_crawl_delay_from_robots(robots):
+    """Test that Crawl-delay and Request-rate lower a host's rate, once."""
+    robots.files["slow.org"] = "User-agent: *\nCrawl-delay: 5\n"
+    robots.files["rated.org"] = "User-agent: *\nRequest-rate: 1/10\n"
+    robots.files["down.org"] = None
+    scheduler = HostScheduler(rate=2.0, burst=4)
+    assert scheduler.crawl_delay("slow.org") == 5.0
+    assert scheduler.crawl_delay("rated.org") == 10.0
+    assert scheduler.crawl_delay("fast.org") is None
+    assert scheduler.crawl_delay("down.org") is None
+
+    bucket = scheduler._get_bucket("slow.org", "https")
+    assert (bucket.rate, bucket.burst) == (0.2, 1)
+    bucket = scheduler._get_bucket("fast.org", "https")
+    assert (bucket.rate, bucket.burst) == (2.0, 4)
+    # robots.txt is read once per host
+    n_fetched = len(robots.fetched)
+    scheduler._get_bucket("slow.org", "https")
+    assert len(robots.fetched) == n_fetched
+
+    scheduler = HostScheduler(respect_robots=False)
+    assert scheduler.crawl_delay("slow.org") is None
+
+
+def test_interleave_by_host():
+    """Test that urls alternate between hosts, keeping their order per host."""
+    urls = ["https://a.org/1", "https://a.org/2", "https://a.org/3", "https://b.org/1"]
+    assert interleave_by_host(urls) == [
+        "https://a.org/1",
+        "https://b.org/1",
+        "https://a.org/2",
+        "https://a.org/3",
+    ]
+    items = [("Lowell", url) for url in urls]
+    assert interleave_by_host(items, key=lambda item: item[1])[1] == items[3]
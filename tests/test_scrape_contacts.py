@@ -0,0 +1,121 @@
+import asyncio
+import collections
+
+import pytest
+
+from benchmarks.synthetic_site import SyntheticSite
+from schoolparser.scrape import scrape_contacts, scrape_contacts_async
+
+# nothing listens on port 1, so requests fail right away
+DEAD_URL = "http://127.0.0.1:1/"
+
+
+class _StubValidator(object):
+    def validate(self, emails):
+        return {email: email for email in emails}
+
+
+class _StubRenderPool(object):
+    """Picklable render pool recording in ``fpath`` that it was closed."""
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+
+    def render(self, url, timeout=20):
+        raise RuntimeError("not rendered in these tests")
+
+    def close(self):
+        with open(self.fpath, "a") as fout:
+            fout.write("closed\n")
+
+
+@pytest.fixture(scope="module")
+def site():
+    """A local synthetic school site of 10 pages."""
+    with SyntheticSite(n_pages=10, emails_per_page=3, page_size=2000) as site:
+        yield site
+
+
+def _school_urls(site):
+    return [(f"School {idx}", site.page_url(idx)) for idx in range(6)] + [
+        ("Closed", DEAD_URL)
+    ]
+
+
+def _check_results(site, results):
+    assert sorted(result.school for result in results) == sorted(
+        school for school, _ in _school_urls(site)
+    )
+    for result in results:
+        if result.url == DEAD_URL:
+            assert result.error.startswith("ConnectionError")
+            assert result.emails == set()
+        else:
+            assert result.error is None
+            assert len(result.emails) == 3
+            assert all(email.endswith("@district.org") for email in result.emails)
+
+
+def test_scrape_contacts_threads(site):
+    """Test that the thread backend returns one result per url."""
+    results = list(
+        scrape_contacts(
+            _school_urls(site), n_jobs=4, render="never", validator=_StubValidator()
+        )
+    )
+    _check_results(site, results)
+
+
+def test_scrape_contacts_processes(site, tmp_path):
+    """Test that the process backend returns results and closes render pools."""
+    fpath = tmp_path / "closed.txt"
+    stats = collections.Counter()
+    results = list(
+        scrape_contacts(
+            _school_urls(site), backend="processes", n_jobs=2, render="never",
+            validator=_StubValidator(), render_pool=_StubRenderPool(str(fpath)),
+            stats=stats,
+        )
+    )
+    _check_results(site, results)
+    assert stats["static"] == 6
+    # one render pool per worker, closed when the worker exits
+    assert fpath.read_text().splitlines() == ["closed", "closed"]
+
+
+def test_scrape_contacts_async(site):
+    """Test the async generator from inside a running event loop."""
+
+    async def _main():
+        return [
+            result
+            async for result in scrape_contacts_async(
+                _school_urls(site), n_jobs=4, render="never",
+                validator=_StubValidator(),
+            )
+        ]
+
+    _check_results(site, asyncio.run(_main()))
+
+
+def test_scrape_contacts_async_close_cancels(site):
+    """Test that closing the async generator early cancels the other urls."""
+    school_urls = [(f"School {idx}", site.page_url(idx % 10)) for idx in range(50)]
+
+    async def _main():
+        results = scrape_contacts_async(
+            school_urls, n_jobs=1, render="never", validator=_StubValidator()
+        )
+        first = await results.__anext__()
+        await results.aclose()
+        return first
+
+    before = site.requests
+    assert asyncio.run(_main()).error is None
+    assert site.requests - before < 5
+
+
+def test_unknown_backend():
+    """Test that an unknown backend is refused."""
+    with pytest.raises(ValueError, match="backend must be one of"):
+        list(scrape_contacts([], backend="asyncio"))
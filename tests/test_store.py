@@ -0,0 +1,113 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from schoolparser.store import ResultStore
+
+EMAILS = {
+    "Lowell": {
+        "https://lowell.org/staff": ["a@sfusd.edu", "b@sfusd.edu"],
+        "https://lowell.org/counseling": ["a@sfusd.edu"],
+    },
+    "Balboa": {"https://balboa.org/staff": ["c@sfusd.edu"]},
+}
+
+
+def test_add_skips_stored_emails(tmp_path):
+    """Test that only new (school, url, email) rows are appended."""
+    store = ResultStore(tmp_path / "emails.sqlite")
+    assert store.add(EMAILS, date=datetime.datetime(2020, 1, 1)) == 4
+    assert store.add(EMAILS, date=datetime.datetime(2020, 2, 1)) == 0
+    assert store.add(
+        {"Balboa": {"https://balboa.org/staff": ["c@sfusd.edu", "d@sfusd.edu"]}},
+        date=datetime.datetime(2020, 3, 1),
+    ) == 1
+    assert len(store) == 5
+
+    school_df = store.query()
+    assert school_df["email"].tolist() == [
+        "a@sfusd.edu",
+        "b@sfusd.edu",
+        "a@sfusd.edu",
+        "c@sfusd.edu",
+        "d@sfusd.edu",
+    ]
+    # rows keep the date they were first scraped
+    assert (school_df["date"][:4] == pd.Timestamp(2020, 1, 1)).all()
+
+    assert len(store.query(school="Balboa")) == 2
+    assert len(store.query(since=datetime.datetime(2020, 2, 1))) == 1
+    assert len(store.query(until=datetime.datetime(2020, 2, 1))) == 4
+    store.close()
+
+
+def test_import_excel_migrates_once(tmp_path):
+    """Test that a file from before the store is imported into an empty store."""
+    fpath = tmp_path / "emails.xlsx"
+    pd.DataFrame(
+        [
+            {
+                "school": "Galileo",
+                "url": "https://galileo.org/staff",
+                "email": "e@sfusd.edu",
+                "date": pd.Timestamp(2019, 6, 1),
+                "Owner": "Jane",
+                "Notes": None,
+            },
+            {"school": "Galileo", "url": None, "email": "f@sfusd.edu"},
+        ]
+    ).to_excel(fpath, index=None)
+
+    store = ResultStore(tmp_path / "emails.sqlite")
+    assert store.import_excel(fpath) == 1
+    school_df = store.query(annotations=True)
+    row = school_df.iloc[0]
+    assert (row["email"], row["date"], row["Owner"], row["Notes"]) == (
+        "e@sfusd.edu",
+        pd.Timestamp(2019, 6, 1),
+        "Jane",
+        "",
+    )
+    with pytest.raises(ValueError, match="empty store"):
+        store.import_excel(fpath)
+    store.close()
+
+
+def test_to_excel_reads_back_changed_annotations(tmp_path, monkeypatch):
+    """Test that exports keep annotations and only reread edited files."""
+    fpath = tmp_path / "emails.xlsx"
+    store = ResultStore(tmp_path / "emails.sqlite")
+    store.add(EMAILS, date=datetime.datetime(2020, 1, 1))
+    school_df = store.to_excel(fpath)
+    assert len(school_df) == 4
+    assert {"Owner", "Notes"} <= set(school_df.columns)
+
+    # annotated by hand
+    school_df = pd.read_excel(fpath, dtype={"Owner": object, "Notes": object})
+    school_df.loc[0, "Owner"] = "Jane"
+    school_df.loc[0, "Notes"] = "emailed"
+    school_df.to_excel(fpath, index=None)
+    mtime = fpath.stat().st_mtime_ns + 1
+    os.utime(fpath, ns=(mtime, mtime))
+
+    store.add({"Balboa": {"https://balboa.org/staff": ["f@sfusd.edu"]}})
+    school_df = store.to_excel(fpath)
+    assert len(school_df) == 5
+    first = school_df.iloc[0]
+    assert (first["email"], first["Owner"], first["Notes"]) == (
+        "a@sfusd.edu",
+        "Jane",
+        "emailed",
+    )
+    assert store.query(annotations=True)["Owner"].tolist()[:2] == ["Jane", ""]
+
+    # a file unchanged since it was exported is not read again
+    def _read_excel(*args, **kwargs):
+        raise AssertionError("read an unchanged file")
+
+    monkeypatch.setattr(pd, "read_excel", _read_excel)
+    assert store.read_annotations(fpath) == 0
+    assert store.to_excel(fpath).equals(school_df)
+    store.close()
@@ -0,0 +1,172 @@
+import collections
+
+import pytest
+import requests
+
+from schoolparser.cache import ContentFingerprints, FetchRegistry
+from schoolparser.scrape import Page, read_contactinfo_from_webpage
+
+URL = "https://district.org/staff"
+FILLER = "<p>" + "Our counseling office supports students and families. " * 20 + "</p>"
+FOOTER = "<footer>Main office (415)-555-0100</footer>"
+STAFF = "<table><tr><td>jane.doe@district.org</td></tr></table>"
+
+
+class _StubValidator(object):
+    """Offline email validator counting the batches it validates."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def validate(self, emails):
+        self.calls += 1
+        return {email: email for email in emails}
+
+
+class _FakeResponse(object):
+    def __init__(self, content):
+        self.content = content
+
+
+class _StubServer(object):
+    """Offline server of a single page, counting requests."""
+
+    def __init__(self, html):
+        self.html = html
+        self.requests = []
+
+    def get(self, url, timeout=None):
+        self.requests.append(url)
+        return _FakeResponse(f"<html><body>{self.html}</body></html>".encode())
+
+
+class _StubRenderPool(object):
+    """Render pool returning fixed HTML and counting renders."""
+
+    def __init__(self, html):
+        self.html = html
+        self.renders = []
+
+    def render(self, url, timeout=20):
+        self.renders.append(url)
+        return self.html.encode()
+
+
+def _read(static_html, render_pool, render="auto"):
+    stats = collections.Counter()
+    page = Page(URL, f"<html><body>{static_html}</body></html>".encode())
+    emails, phones = read_contactinfo_from_webpage(
+        URL, render_pool=render_pool, render=render, validator=_StubValidator(),
+        stats=stats, page=page,
+    )
+    return emails, phones, stats
+
+
+def test_static_page_is_not_rendered():
+    """Test that a static page with emails is not rendered."""
+    render_pool = _StubRenderPool("")
+    emails, phones, stats = _read(FILLER + STAFF + FOOTER, render_pool)
+    assert emails == {"jane.doe@district.org"}
+    assert phones == {"(415)-555-0100"}
+    assert render_pool.renders == []
+    assert stats == {"static": 1}
+
+
+def test_page_with_only_phones_is_rendered():
+    """Test that staff emails injected by JavaScript are not missed.
+
+    The static page has the office phone in its footer but no emails.
+    """
+    render_pool = _StubRenderPool(f"<html><body>{FILLER}{STAFF}{FOOTER}</body></html>")
+    emails, phones, stats = _read(FILLER + FOOTER, render_pool)
+    assert emails == {"jane.doe@district.org"}
+    assert render_pool.renders == [URL]
+    assert stats == {"rendered": 1}
+
+
+def test_js_only_page_is_rendered():
+    """Test that an app shell is rendered even if it has an email."""
+    render_pool = _StubRenderPool(f"<html><body>{STAFF}</body></html>")
+    _, _, stats = _read('<div id="root"></div>' + STAFF, render_pool)
+    assert render_pool.renders == [URL]
+    assert stats == {"rendered": 1}
+
+
+@pytest.mark.parametrize("render, n_renders", [("never", 0), ("always", 1)])
+def test_render_modes(render, n_renders):
+    """Test that render="never" and "always" override the static result."""
+    render_pool = _StubRenderPool(f"<html><body>{FILLER}{STAFF}</body></html>")
+    emails, _, stats = _read(FILLER + FOOTER, render_pool, render=render)
+    assert len(render_pool.renders) == n_renders
+    assert emails == ({"jane.doe@district.org"} if n_renders else set())
+    assert stats == {"rendered" if n_renders else "static": 1}
+
+
+def test_unknown_render_mode():
+    """Test that an unknown render mode is refused."""
+    with pytest.raises(ValueError, match="render must be one of"):
+        _read(FILLER, _StubRenderPool(""), render="sometimes")
+
+
+def test_registry_shares_contacts_across_schools(monkeypatch):
+    """Test that a district page reached by two schools is fetched once."""
+    server = _StubServer(FILLER + STAFF + FOOTER)
+    monkeypatch.setattr(requests, "get", server.get)
+    registry = FetchRegistry()
+    stats = collections.Counter()
+    results = [
+        read_contactinfo_from_webpage(
+            url, render_pool=_StubRenderPool(""), validator=_StubValidator(),
+            registry=registry, stats=stats,
+        )
+        # the url as listed for two schools of the district
+        for url in (URL, "https://District.org/staff#directory")
+    ]
+    assert server.requests == [URL]
+    assert results[0] is results[1]
+    assert results[0][0] == {"jane.doe@district.org"}
+    assert stats == {"static": 1}
+    assert registry.stats == {"computed": 1, "shared": 1}
+
+
+def test_unchanged_page_reuses_contacts(tmp_path):
+    """Test that contacts of a page unchanged since the last run are reused."""
+    fingerprints = ContentFingerprints(tmp_path)
+    validator = _StubValidator()
+    render_pool = _StubRenderPool("")
+
+    def _read_run(static_html):
+        page = Page(URL, f"<html><body>{static_html}</body></html>".encode())
+        return read_contactinfo_from_webpage(
+            URL, render_pool=render_pool, validator=validator,
+            fingerprints=fingerprints, page=page,
+        )
+
+    emails, _ = _read_run(FILLER + STAFF + FOOTER)
+    assert _read_run(FILLER + STAFF + FOOTER)[0] == emails
+    # markup only changes are not content changes
+    assert _read_run(f"<div>{FILLER}</div>{STAFF}{FOOTER}")[0] == emails
+    assert validator.calls == 1
+
+    emails, _ = _read_run(FILLER + STAFF.replace("jane", "john") + FOOTER)
+    assert emails == {"john.doe@district.org"}
+    assert validator.calls == 2
+    assert fingerprints.stats == {"new": 1, "unchanged": 2, "changed": 1}
+    assert render_pool.renders == []
+    fingerprints.close()
+
+
+def test_js_only_page_is_always_extracted(tmp_path):
+    """Test that a page needing JavaScript is not skipped by its fingerprint."""
+    fingerprints = ContentFingerprints(tmp_path)
+    render_pool = _StubRenderPool(f"<html><body>{STAFF}</body></html>")
+    static_html = f'<html><body><div id="root"></div>{STAFF}</body></html>'
+    for _ in range(2):
+        page = Page(URL, static_html.encode())
+        read_contactinfo_from_webpage(
+            URL, render_pool=render_pool, validator=_StubValidator(),
+            fingerprints=fingerprints, page=page,
+        )
+    assert render_pool.renders == [URL, URL]
+    assert fingerprints.stats == {}
+    fingerprints.close()
@@ -0,0 +1,99 @@
+import threading
+
+from email_validator import EmailUndeliverableError
+
+from schoolparser.validate import EmailValidator
+
+
+class _StubResolver(object):
+    """Offline resolver counting the lookups of each domain."""
+
+    def __init__(self, undeliverable=(), transient=()):
+        self.undeliverable = set(undeliverable)
+        self.transient = set(transient)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, domain):
+        with self._lock:
+            self.calls.append(domain)
+        if domain in self.undeliverable:
+            raise EmailUndeliverableError(f"{domain} does not accept email.")
+        if domain in self.transient:
+            raise TimeoutError(f"DNS lookup of {domain} timed out.")
+
+
+def test_one_lookup_per_domain():
+    """Test that each domain is looked up once, however many emails share it."""
+    resolver = _StubResolver(undeliverable={"nowhere.org"})
+    validator = EmailValidator(resolver=resolver)
+
+    emails = [
+        "a.teacher@sfusd.edu",
+        "b.counselor@sfusd.edu",
+        "a.teacher@sfusd.edu",
+        "staff@district.org",
+        "gone@nowhere.org",
+        "not an email",
+    ]
+    valid_emails = validator.validate(emails)
+    assert set(valid_emails) == {
+        "a.teacher@sfusd.edu",
+        "b.counselor@sfusd.edu",
+        "staff@district.org",
+    }
+    assert sorted(resolver.calls) == ["district.org", "nowhere.org", "sfusd.edu"]
+
+    # a second batch is answered from the cache
+    assert validator.validate(["c.principal@sfusd.edu", "gone@nowhere.org"]) == {
+        "c.principal@sfusd.edu": "c.principal@sfusd.edu"
+    }
+    assert len(resolver.calls) == 3
+    assert validator.stats["lookups"] == 3
+    assert validator.stats["cached"] == 2
+    validator.close()
+
+
+def test_lookups_expire_after_ttl():
+    """Test that a domain is looked up again once its lookup is older than ttl."""
+    resolver = _StubResolver()
+    validator = EmailValidator(resolver=resolver, ttl=0)
+    validator.validate(["a@district.org"])
+    validator.validate(["b@district.org"])
+    assert resolver.calls == ["district.org", "district.org"]
+
+    resolver = _StubResolver()
+    validator = EmailValidator(resolver=resolver, ttl=3600)
+    validator.validate(["a@district.org"])
+    validator.validate(["b@district.org"])
+    assert resolver.calls == ["district.org"]
+
+
+def test_transient_errors_are_not_cached():
+    """Test that a failed lookup keeps the email and is retried next time."""
+    resolver = _StubResolver(transient={"district.org"})
+    validator = EmailValidator(resolver=resolver)
+    assert validator.validate(["a@district.org"]) == {
+        "a@district.org": "a@district.org"
+    }
+    assert validator.validate(["a@district.org"]) == {
+        "a@district.org": "a@district.org"
+    }
+    assert resolver.calls == ["district.org", "district.org"]
+    assert validator.stats["cached"] == 0
+
+
+def test_lookups_persist_in_cache_path(tmp_path):
+    """Test that lookups saved to cache_path are reused by a new validator."""
+    cache_path = tmp_path / "domains.json"
+    resolver = _StubResolver(undeliverable={"nowhere.org"})
+    validator = EmailValidator(resolver=resolver, cache_path=cache_path)
+    validator.validate(["a@district.org", "b@nowhere.org"])
+    validator.close()
+
+    resolver = _StubResolver()
+    validator = EmailValidator(resolver=resolver, cache_path=cache_path)
+    assert validator.validate(["c@district.org", "d@nowhere.org"]) == {
+        "c@district.org": "c@district.org"
+    }
+    assert resolver.calls == []
@@ -0,0 +1,83 @@
+import pickle
+
+from schoolparser.visited import BloomFilter, VisitedStore, url_fingerprint
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added fingerprint is reported as maybe added."""
+    bloom = BloomFilter(1000, error_rate=0.01)
+    fingerprints = [url_fingerprint(f"https://a.org/{i}")[1] for i in range(1000)]
+    for fingerprint in fingerprints:
+        bloom.add(fingerprint)
+    assert all(fingerprint in bloom for fingerprint in fingerprints)
+
+    bloom.clear()
+    assert not any(fingerprint in bloom for fingerprint in fingerprints)
+
+
+def test_bloom_filter_error_rate():
+    """Test that the false positive rate at capacity is about error_rate."""
+    bloom = BloomFilter(5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(url_fingerprint(f"https://a.org/{i}")[1])
+    false_positives = sum(
+        url_fingerprint(f"https://b.org/{i}")[1] in bloom for i in range(20000)
+    )
+    assert false_positives / 20000 < 0.03
+
+
+def test_url_fingerprint_normalizes():
+    """Test that equivalent spellings of a url share a fingerprint."""
+    host, fingerprint = url_fingerprint("https://District.org:443/page#top")
+    assert host == "district.org"
+    assert url_fingerprint("https://district.org/page") == (host, fingerprint)
+    assert url_fingerprint("https://district.org/other")[1] != fingerprint
+
+
+def test_visited_store_in_memory():
+    """Test adding, membership and per-host counts of the in-memory set."""
+    store = VisitedStore()
+    assert store.add("https://a.org/")
+    assert not store.add("https://A.org")
+    # enough urls to merge the buffers into the sorted arrays
+    for i in range(500):
+        assert store.add(f"https://a.org/{i}")
+        assert store.add(f"https://b.org/{i}")
+    assert not store.add("https://a.org/250")
+    assert "https://b.org/499" in store
+    assert "https://b.org/500" not in store
+    assert len(store) == 1001
+    assert store.hosts() == {"a.org": 501, "b.org": 500}
+    assert store.count("A.org") == 501
+    assert store.stats["added"] == 1001
+    assert store.stats["seen"] == 2
+
+    # an in-memory set does not survive pickling
+    assert len(pickle.loads(pickle.dumps(store))) == 0
+
+    store.clear()
+    assert len(store) == 0
+    assert "https://a.org/" not in store
+
+
+def test_visited_store_on_disk(tmp_path):
+    """Test that the on-disk set persists and its Bloom filter skips lookups."""
+    fpath = tmp_path / "visited.sqlite"
+    store = VisitedStore(fpath, bloom_capacity=1000)
+    for i in range(100):
+        store.add(f"https://a.org/{i}")
+    assert "https://a.org/99" in store
+    assert "https://a.org/100" not in store
+    assert store.stats["bloom"] > 0
+
+    # reopened, e.g. when a crawl resumes
+    store = pickle.loads(pickle.dumps(store))
+    assert len(store) == 100
+    assert not store.add("https://a.org/0")
+    assert store.add("https://a.org/100")
+    store.close()
+
+    store = VisitedStore(fpath, bloom_capacity=1000)
+    assert store.count("a.org") == 101
+    assert "https://a.org/100" in store
+    store.close()
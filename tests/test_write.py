@@ -0,0 +1,73 @@
+import pandas as pd
+
+from schoolparser.metrics import Metrics
+from schoolparser.store import ResultStore
+from schoolparser.write import scraped_emails_to_df
+
+EMAILS = {
+    "Lowell": {
+        "https://lowell.org/staff": ["a@sfusd.edu", "b@sfusd.edu"],
+        "https://lowell.org/empty": [],
+        "https://lowell.org/counseling": {"c@sfusd.edu"},
+    },
+    "Balboa": {"https://balboa.org/staff": ["d@sfusd.edu"]},
+    "Galileo": {},
+}
+
+
+def test_scraped_emails_to_df():
+    """Test the rows, in scrape order, and the categorical columns."""
+    metrics = Metrics()
+    school_df = scraped_emails_to_df(EMAILS, metrics=metrics)
+    assert list(school_df.columns) == [
+        "school", "url", "email", "date", "Owner", "Notes"
+    ]
+    assert school_df["school"].tolist() == ["Lowell"] * 3 + ["Balboa"]
+    assert school_df["url"].tolist() == [
+        "https://lowell.org/staff",
+        "https://lowell.org/staff",
+        "https://lowell.org/counseling",
+        "https://balboa.org/staff",
+    ]
+    assert school_df["email"].tolist() == [
+        "a@sfusd.edu", "b@sfusd.edu", "c@sfusd.edu", "d@sfusd.edu"
+    ]
+    # school and url names are stored once each
+    assert isinstance(school_df["school"].dtype, pd.CategoricalDtype)
+    assert isinstance(school_df["url"].dtype, pd.CategoricalDtype)
+    assert school_df["date"].nunique() == 1
+    assert (school_df["Owner"] == "").all() and (school_df["Notes"] == "").all()
+    metrics = metrics.to_dict()
+    assert metrics["counters"]["rows"] == 4
+    assert metrics["stages"]["write"]["n"] == 1
+
+
+def test_scraped_emails_to_df_empty():
+    """Test that no emails make an empty frame with the same columns."""
+    school_df = scraped_emails_to_df({"Galileo": {}})
+    assert len(school_df) == 0
+    assert "email" in school_df.columns
+
+
+def test_scraped_emails_to_df_appends(tmp_path):
+    """Test that rows are appended to an existing file unless overwriting."""
+    fpath = tmp_path / "emails.xlsx"
+    scraped_emails_to_df(EMAILS, fpath)
+    scraped_emails_to_df({"Balboa": {"https://balboa.org/x": ["e@sfusd.edu"]}}, fpath)
+    assert len(pd.read_excel(fpath)) == 5
+    scraped_emails_to_df(EMAILS, fpath, overwrite=True)
+    assert len(pd.read_excel(fpath)) == 4
+
+
+def test_scraped_emails_to_df_with_store(tmp_path):
+    """Test that a store is appended to and exported only if asked."""
+    store = ResultStore(tmp_path / "emails.sqlite")
+    fpath = tmp_path / "emails.xlsx"
+    scraped_emails_to_df(EMAILS, store=store)
+    assert len(store) == 4
+    assert not fpath.exists()
+
+    scraped_emails_to_df(EMAILS, fpath, store=store)
+    assert len(store) == 4
+    assert len(pd.read_excel(fpath)) == 4
+    store.close()